@@ -0,0 +1,112 @@
+"""Pages de catalogue utiles pour un repère : table attributs -> plages de pages.
+
+Chaque entrée de CATALOGUE_SECTIONS donne une plage de pages (numéros du PDF,
+1 = couverture) et les attributs du repère qui la rendent pertinente. Une clé
+absente de `when` ne filtre pas ; 'ouvrants' est satisfait si l'un des types
+d'ouvrant du repère est dans la liste.
+
+Les plages sont relevées à la main sur les catalogues : `validate()` les confronte
+au nombre de pages réel (annex_pages) pour détecter un catalogue remplacé.
+Module importable sans Streamlit.
+"""
+import unicodedata
+
+POSE_R = "Pose en rénovation (R)"
+POSE_RT = "Pose en rénovation Dépose Totale (RT)"
+POSE_A = "Pose en applique avec doublage (A)"
+POSE_E = "Pose en applique avec embrasures (E)"
+POSE_F = "Pose en feuillure (F)"
+POSE_T = "Pose en tunnel nu intérieur (T)"
+POSE_TM = "Pose en tunnel milieu de mur (TM)"
+
+OUVRANTS_FRAPPE = ["1 Vantail", "2 Vantaux", "Soufflet"]
+
+CATALOGUE_SECTIONS = {
+    "FPEE - PVC RFP Fenêtres et Portes Fenêtres.pdf": [
+        {'title': "Performances thermiques et acoustiques", 'pages': (5, 5), 'when': {'mat_type': ["PVC"]}},
+        {'title': "Comparatif des gammes", 'pages': (6, 7), 'when': {'mat_type': ["PVC"]}},
+        {'title': "Nuancier", 'pages': (23, 23), 'when': {'mat_type': ["PVC"]}},
+        {'title': "Accessoires, petits bois, vitrages", 'pages': (24, 25), 'when': {'mat_type': ["PVC"]}},
+        {'title': "Types d'ouvertures", 'pages': (26, 26), 'when': {'mat_type': ["PVC"], 'ouvrants': OUVRANTS_FRAPPE}},
+        {'title': "Volets roulants", 'pages': (27, 27), 'when': {'mat_type': ["PVC"], 'volet': [True]}},
+    ],
+    "FPEE - PVC NOVELIA RFP Fenêtres et Portes Fenêtres.pdf": [
+        {'title': "Novélia : performances", 'pages': (2, 4), 'when': {'mat_type': ["PVC"]}},
+        {'title': "Novélia : coloris et options", 'pages': (6, 7), 'when': {'mat_type': ["PVC"]}},
+    ],
+    "FPEE - ALU _ PVC Portes Tertiaires_.pdf": [
+        {'title': "Coupes techniques ALU (ouverture intérieure)", 'pages': (16, 16),
+         'when': {'mat_type': ["ALU"], 'pose_type': [POSE_E, POSE_F, POSE_T, POSE_TM]}},
+        {'title': "Coupes techniques ALU (ouverture intérieure)", 'pages': (17, 17),
+         'when': {'mat_type': ["ALU"], 'pose_type': [POSE_A, POSE_R, POSE_RT]}},
+        {'title': "Coupes techniques ALU (ouverture extérieure)", 'pages': (18, 18),
+         'when': {'mat_type': ["ALU"], 'pose_type': [POSE_E, POSE_F, POSE_T, POSE_TM]}},
+        {'title': "Coupes techniques ALU (ouverture extérieure)", 'pages': (19, 19),
+         'when': {'mat_type': ["ALU"], 'pose_type': [POSE_A, POSE_R, POSE_RT]}},
+        {'title': "Coupes techniques PVC (ouverture intérieure)", 'pages': (20, 20),
+         'when': {'mat_type': ["PVC"], 'pose_type': [POSE_E, POSE_F, POSE_T, POSE_TM]}},
+        {'title': "Coupes techniques PVC (ouverture intérieure)", 'pages': (21, 21),
+         'when': {'mat_type': ["PVC"], 'pose_type': [POSE_A, POSE_R, POSE_RT]}},
+        {'title': "Coupes techniques PVC (ouverture extérieure)", 'pages': (22, 22),
+         'when': {'mat_type': ["PVC"], 'pose_type': [POSE_F, POSE_T, POSE_TM]}},
+        {'title': "Coupes techniques PVC (ouverture extérieure)", 'pages': (23, 23),
+         'when': {'mat_type': ["PVC"], 'pose_type': [POSE_A, POSE_E, POSE_R]}},
+        {'title': "Habillages ALU", 'pages': (24, 24), 'when': {'mat_type': ["ALU"]}},
+        {'title': "Habillages PVC", 'pages': (25, 25), 'when': {'mat_type': ["PVC"]}},
+    ],
+}
+
+
+def _nfc(name):
+    return unicodedata.normalize("NFC", name)
+
+
+def sections_for(name):
+    """Sections de la table pour un fichier (nom NFC ou NFD), liste vide s'il n'y figure pas."""
+    return [section for catalogue, sections in CATALOGUE_SECTIONS.items()
+            if _nfc(catalogue) == _nfc(name) for section in sections]
+
+
+def matches(when, attrs):
+    for key, accepted in when.items():
+        value = attrs.get(key)
+        if key == 'ouvrants':
+            if not set(value or ()) & set(accepted):
+                return False
+        elif value not in accepted:
+            return False
+    return True
+
+
+def relevant_sections(attrs, available=None):
+    """[(fichier, titre, (début, fin))] pertinentes pour `attrs`, plages contiguës d'un même
+    fichier et d'un même titre fusionnées. `available` : noms de fichiers présents (None : tous)."""
+    available = None if available is None else {_nfc(n) for n in available}
+    found = []
+    for name, sections in CATALOGUE_SECTIONS.items():
+        if available is not None and _nfc(name) not in available:
+            continue
+        for section in sections:
+            if not matches(section['when'], attrs):
+                continue
+            start, end = section['pages']
+            if found and found[-1][0] == name and found[-1][1] == section['title'] and found[-1][2][1] + 1 == start:
+                found[-1] = (name, section['title'], (found[-1][2][0], end))
+            else:
+                found.append((name, section['title'], (start, end)))
+    return found
+
+
+def validate(page_counts):
+    """Erreurs de la table pour {fichier: nombre de pages} (fichiers absents ignorés)."""
+    counts = {_nfc(name): count for name, count in page_counts.items()}
+    errors = []
+    for name, sections in CATALOGUE_SECTIONS.items():
+        count = counts.get(_nfc(name))
+        if count is None:
+            continue
+        for section in sections:
+            start, end = section['pages']
+            if not 1 <= start <= end <= count:
+                errors.append(f"{name} : « {section['title']} » p. {start}-{end} hors du document ({count} pages)")
+    return errors
@@ -0,0 +1,202 @@
+"""Catalogues annexes découpés page par page, avec vignettes, sous static/annexes/.
+
+Un catalogue fait des dizaines de pages alors qu'on n'en consulte que quelques-unes :
+chaque PDF d'assets/ est découpé une fois en pages PDF autonomes (pypdf) et en
+vignettes JPEG (PyMuPDF). Le dossier porte l'empreinte du fichier :
+
+    static/annexes/<empreinte>/index.json, p001.pdf, p001.jpg, ...
+
+Un catalogue modifié obtient un nouveau dossier (et de nouvelles URL : le cache du
+navigateur ne sert jamais une ancienne page). Le dossier est construit à côté puis
+renommé : un index.json présent veut dire que toutes les pages sont là.
+
+Prétraitement hors ligne :  python annex_pages.py [--prune]
+(découpe aussi les extraits des pages utiles d'annex_links ; sinon l'application
+découpe un catalogue à sa première ouverture, et les raccourcis ouvrent le PDF complet).
+Module importable sans Streamlit.
+"""
+import io
+import json
+import os
+import shutil
+import sys
+import time
+
+import brand_assets
+import lazy_deps
+
+ANNEX_SUBDIR = "annexes"
+INDEX_NAME = "index.json"
+THUMB_WIDTH = 240
+THUMB_QUALITY = 75
+TMP_PREFIX = ".tmp-"
+INDEX_VERSION = 1
+
+
+def page_name(no, ext):
+    return f"p{no:03d}.{ext}"
+
+
+class CataloguePages:
+    """Pages découpées d'un catalogue (lecture de index.json)."""
+
+    def __init__(self, directory, index):
+        self.directory = directory
+        self.index = index
+        self.sha = index['sha']
+        self.count = index['pages']
+        self.has_thumbs = index['thumbs']
+        self._ranges = None  # extraits déjà assemblés (un listage du dossier, au premier besoin)
+
+    def url(self, no, ext="pdf"):
+        return f"{brand_assets.STATIC_URL_PREFIX}/{ANNEX_SUBDIR}/{self.sha}/{page_name(no, ext)}"
+
+    def page_url(self, no):
+        return self.url(no, "pdf")
+
+    def thumb_url(self, no):
+        return self.url(no, "jpg") if self.has_thumbs else None
+
+    def range_url(self, start, end, build=True):
+        """URL d'un PDF des pages start..end seulement (assemblé une fois à partir des pages).
+
+        build=False : None si l'extrait n'a pas déjà été assemblé (aucune écriture ; le
+        dossier n'est listé qu'une fois par CataloguePages).
+        """
+        if start == end:
+            return self.page_url(start)
+        name = f"p{start:03d}-{end:03d}.pdf"
+        target = os.path.join(self.directory, name)
+        if self._ranges is None:
+            self._ranges = set(os.listdir(self.directory))
+        if name not in self._ranges:
+            if not build:
+                return None
+            pypdf = lazy_deps.require('pypdf')
+            writer = pypdf.PdfWriter()
+            for no in range(start, end + 1):
+                writer.append(os.path.join(self.directory, page_name(no, "pdf")))
+            tmp = f"{target}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                writer.write(f)
+            os.replace(tmp, target)
+            self._ranges.add(name)
+        return f"{brand_assets.STATIC_URL_PREFIX}/{ANNEX_SUBDIR}/{self.sha}/{name}"
+
+
+def catalogue_dir(sha, static_dir=brand_assets.STATIC_DIR):
+    return os.path.join(static_dir, ANNEX_SUBDIR, sha)
+
+
+def load_pages(path, static_dir=brand_assets.STATIC_DIR, sha=None):
+    """Pages déjà découpées du catalogue, ou None (jamais prétraité, ou modifié depuis)."""
+    sha = sha or brand_assets.file_sha(path)
+    directory = catalogue_dir(sha, static_dir)
+    try:
+        with open(os.path.join(directory, INDEX_NAME), encoding="utf-8") as f:
+            index = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+    return CataloguePages(directory, index)
+
+
+def _render_thumbs(path, out_dir):
+    """Vignettes JPEG avec PyMuPDF ; False s'il n'est pas installé."""
+    try:
+        pymupdf = lazy_deps.require('pymupdf')
+    except ImportError:
+        return False
+    with pymupdf.open(path) as doc:
+        for no, page in enumerate(doc, start=1):
+            zoom = THUMB_WIDTH / page.rect.width
+            pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
+            with open(os.path.join(out_dir, page_name(no, "jpg")), "wb") as f:
+                f.write(pix.tobytes("jpg", jpg_quality=THUMB_QUALITY))
+    return True
+
+
+def build_pages(path, static_dir=brand_assets.STATIC_DIR, thumbs=True, sha=None):
+    """Découpe le catalogue (si besoin) ; renvoie ses CataloguePages."""
+    sha = sha or brand_assets.file_sha(path)
+    pages = load_pages(path, static_dir, sha)
+    if pages is not None:
+        if thumbs and not pages.has_thumbs and _render_thumbs(path, pages.directory):
+            # Découpé sans PyMuPDF : vignettes ajoutées au dossier existant, index réécrit en dernier
+            index = dict(pages.index, thumbs=True)
+            tmp = os.path.join(pages.directory, f"{INDEX_NAME}.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp, os.path.join(pages.directory, INDEX_NAME))
+            pages = CataloguePages(pages.directory, index)
+        return pages
+    pypdf = lazy_deps.require('pypdf')
+    parent = os.path.join(static_dir, ANNEX_SUBDIR)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = os.path.join(parent, f"{TMP_PREFIX}{sha}-{os.getpid()}-{time.monotonic_ns()}")
+    os.makedirs(tmp_dir)
+    try:
+        t0 = time.perf_counter()
+        reader = pypdf.PdfReader(path)
+        for no, page in enumerate(reader.pages, start=1):
+            writer = pypdf.PdfWriter()
+            writer.add_page(page)
+            buf = io.BytesIO()
+            writer.write(buf)
+            with open(os.path.join(tmp_dir, page_name(no, "pdf")), "wb") as f:
+                f.write(buf.getvalue())
+        has_thumbs = thumbs and _render_thumbs(path, tmp_dir)
+        index = {'version': INDEX_VERSION, 'sha': sha, 'source': os.path.basename(path),
+                 'pages': len(reader.pages), 'thumbs': bool(has_thumbs),
+                 'seconds': round(time.perf_counter() - t0, 3)}
+        with open(os.path.join(tmp_dir, INDEX_NAME), "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        try:
+            os.rename(tmp_dir, catalogue_dir(sha, static_dir))
+        except OSError:
+            pass  # un autre processus a fini avant nous : on garde le sien
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return load_pages(path, static_dir, sha)
+
+
+def prune(keep, static_dir=brand_assets.STATIC_DIR):
+    """Supprime les découpages dont l'empreinte n'est pas dans `keep` ; renvoie leur nombre."""
+    parent = os.path.join(static_dir, ANNEX_SUBDIR)
+    removed = 0
+    for name in os.listdir(parent) if os.path.isdir(parent) else ():
+        if name not in keep and not name.startswith(TMP_PREFIX):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def build_ranges(name, pages):
+    """Assemble les extraits des pages utiles (annex_links) d'un catalogue ; renvoie leur nombre."""
+    import annex_links
+    ranges = {section['pages'] for section in annex_links.sections_for(name)}
+    built = 0
+    for start, end in sorted(ranges):
+        if start < end <= pages.count:
+            pages.range_url(start, end)
+            built += 1
+    return built
+
+
+def build_all(asset_dir=brand_assets.ASSET_DIR, static_dir=brand_assets.STATIC_DIR, remove_stale=False):
+    """Prétraite tous les PDF du dossier (pages, vignettes, extraits utiles) ; renvoie {fichier: CataloguePages}."""
+    built = {}
+    for name in sorted(os.listdir(asset_dir)):
+        if name.lower().endswith(".pdf"):
+            built[name] = build_pages(os.path.join(asset_dir, name), static_dir)
+            build_ranges(name, built[name])
+    if remove_stale:
+        prune({pages.sha for pages in built.values()}, static_dir)
+    return built
+
+
+if __name__ == "__main__":
+    for name, pages in build_all(remove_stale="--prune" in sys.argv[1:]).items():
+        thumbs = "vignettes" if pages.has_thumbs else "sans vignettes (PyMuPDF absent)"
+        print(f"{name} : {pages.count} pages, {thumbs} -> {pages.directory}")
@@ -0,0 +1,141 @@
+"""Recherche plein texte hors ligne dans les annexes PDF (SQLite FTS5).
+
+Le texte de chaque page est extrait une fois (pypdf) et indexé dans une base
+locale ; un fichier n'est réindexé que si son empreinte change. Une recherche
+renvoie les pages classées (bm25) avec un extrait, en quelques millisecondes.
+
+    files : nom, empreinte, nombre de pages, pages sans texte
+    pages : table FTS5 (texte, nom, n° de page), accents ignorés
+
+Les pages sans couche texte (catalogues scannés ou vectorisés) ne sont pas
+trouvables : elles sont seulement comptées. Une connexion par opération : la base
+est partagée entre les threads et les processus Streamlit (mode WAL).
+
+Index hors ligne :  python annex_search.py [recherche]
+Module importable sans Streamlit.
+"""
+import contextlib
+import html
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import brand_assets
+import lazy_deps
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.environ.get("CONFIGURATEUR_SEARCH_DB", os.path.join(ROOT_DIR, ".cache", "annex_search.sqlite3"))
+SCHEMA_VERSION = 1
+# Marqueurs d'extrait (jamais présents dans le texte d'un PDF), remplacés après échappement
+HIT_START, HIT_END = "\x02", "\x03"
+SNIPPET_TOKENS = 12
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY, sha TEXT NOT NULL, pages INTEGER NOT NULL,
+    empty_pages INTEGER NOT NULL, indexed_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text, name UNINDEXED, page UNINDEXED, tokenize='unicode61 remove_diacritics 2'
+);
+PRAGMA user_version = {SCHEMA_VERSION};
+"""
+
+
+def match_query(text):
+    """Requête FTS5 sûre : chaque mot devient un préfixe entre guillemets, tous requis."""
+    return " ".join(f'"{token}"*' for token in TOKEN_RE.findall(text))
+
+
+def extract_pages(path):
+    """Texte de chaque page (chaîne vide pour une page sans couche texte)."""
+    pypdf = lazy_deps.require('pypdf')
+    reader = pypdf.PdfReader(path)
+    texts = []
+    for page in reader.pages:
+        try:
+            texts.append(page.extract_text() or "")
+        except Exception:
+            texts.append("")  # flux de contenu illisible : page ignorée
+    return texts
+
+
+class AnnexIndex:
+    """Index FTS5 des annexes, synchronisé sur les empreintes des fichiers."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] not in (0, SCHEMA_VERSION):
+                conn.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS pages;")
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connexion courte : transaction validée (ou annulée) puis fermée."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def sync(self, paths, remove_missing=True):
+        """(Ré)indexe les fichiers dont l'empreinte a changé ; renvoie les noms réindexés."""
+        wanted = {os.path.basename(path): path for path in paths if os.path.exists(path)}
+        with self._connect() as conn:
+            known = dict(conn.execute("SELECT name, sha FROM files"))
+        updated = []
+        for name, path in wanted.items():
+            sha = brand_assets.file_sha(path)
+            if known.get(name) == sha:
+                continue
+            texts = extract_pages(path)  # hors transaction : l'extraction est la partie lente
+            with self._connect() as conn:
+                conn.execute("DELETE FROM pages WHERE name = ?", (name,))
+                conn.executemany("INSERT INTO pages (text, name, page) VALUES (?, ?, ?)",
+                                 [(text, name, no) for no, text in enumerate(texts, start=1) if text.strip()])
+                conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                             (name, sha, len(texts), sum(1 for t in texts if not t.strip()), time.time()))
+            updated.append(name)
+        if remove_missing:
+            with self._connect() as conn:
+                for name in set(known) - set(wanted):
+                    conn.execute("DELETE FROM pages WHERE name = ?", (name,))
+                    conn.execute("DELETE FROM files WHERE name = ?", (name,))
+        return updated
+
+    def search(self, text, limit=20):
+        """[{'name', 'page', 'snippet' (HTML, mots trouvés en <mark>)}] par pertinence."""
+        query = match_query(text)
+        if not query:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, page, snippet(pages, 0, ?, ?, '…', ?) FROM pages WHERE pages MATCH ? "
+                "ORDER BY bm25(pages) LIMIT ?", (HIT_START, HIT_END, SNIPPET_TOKENS, query, limit)).fetchall()
+        return [{'name': name, 'page': page,
+                 'snippet': html.escape(" ".join(snippet.split())).replace(HIT_START, "<mark>").replace(HIT_END, "</mark>")}
+                for name, page, snippet in rows]
+
+    def stats(self):
+        """{nom: (pages, pages sans texte)} des fichiers indexés."""
+        with self._connect() as conn:
+            return {name: (pages, empty) for name, pages, empty in conn.execute("SELECT name, pages, empty_pages FROM files")}
+
+
+if __name__ == "__main__":
+    index = AnnexIndex()
+    pdfs = [os.path.join(brand_assets.ASSET_DIR, n) for n in sorted(os.listdir(brand_assets.ASSET_DIR)) if n.lower().endswith(".pdf")]
+    for name in index.sync(pdfs):
+        print(f"indexé : {name}")
+    for name, (pages, empty) in index.stats().items():
+        print(f"{name} : {pages} pages, {empty} sans texte")
+    if len(sys.argv) > 1:
+        for hit in index.search(" ".join(sys.argv[1:])):
+            print(f"{hit['name']} p. {hit['page']} : {hit['snippet']}")
@@ -3,7 +3,11 @@ import math
 import uuid
 import json
 import copy
-import pandas as pd
+import functools
+import unicodedata
+import hashlib
+import difflib
+import re
 import os
 import base64
 import datetime
@@ -12,23 +16,61 @@ import datetime
 
 
 
-# Dynamic Logo Loader
-def load_logo():
-    try:
-        # Prefer cropped version if available
-        p_cropped = os.path.join(os.path.dirname(__file__), "assets/logo_miroiterie_cropped.jpg")
-        p_original = os.path.join(os.path.dirname(__file__), "assets/logo_miroiterie.jpg")
-        
-        p = p_cropped if os.path.exists(p_cropped) else p_original
-        
-        if os.path.exists(p):
-            with open(p, "rb") as f:
-                return base64.b64encode(f.read()).decode()
-    except:
-        pass
-    return ""
+# Logo : registre brand_assets (fichier lu une fois par processus, pas à chaque rerun).
+# Préfère la version recadrée si elle existe (cf. BRAND_ASSETS).
+import artifact_cache
+import brand_assets
+import fiche_templates
+import lazy_deps
+
+# pandas ne sert qu'aux petits tableaux Habillage : import au premier accès (cf. lazy_deps)
+pd = lazy_deps.lazy('pandas')
 
-LOGO_B64 = load_logo()
+LOGO = brand_assets.get_asset('logo')
+
+def get_asset_src(asset, inline=False):
+    """Source <img> d'une ressource pour les fiches HTML.
+
+    URL statique empreintée (servie par Streamlit, jamais dupliquée dans le document)
+    si le service statique est actif ; URI data: pour un fichier autonome (inline=True).
+    """
+    if asset is None:
+        return None
+    if not inline and st.get_option("server.enableStaticServing"):
+        try:
+            return asset.publish()
+        except OSError:
+            pass
+    return asset.data_uri
+
+def get_logo_src(inline=False):
+    return get_asset_src(LOGO, inline)
+
+# Schémas d'habillage : une variante par contexte (boîte de 160 px dans la fiche, colonne à l'écran)
+SCHEMA_SIZES = {'ecran': (800, 600), 'fiche': (480, 320)}
+
+def get_schema_asset(image_key, context):
+    """Schéma du profil réduit pour `context` (cf. SCHEMA_SIZES), None s'il manque."""
+    path = get_asset_manifest().path(image_key)
+    if not path:
+        return None
+    return brand_assets.load_asset(path).resized(*SCHEMA_SIZES[context])
+
+def file_reader(path):
+    """Callable pour st.download_button : le fichier n'est lu qu'au clic."""
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+def get_static_file_url(record):
+    """URL statique empreintée d'une ressource du manifeste (annexes PDF), None sans service statique."""
+    if not record.exists or not st.get_option("server.enableStaticServing"):
+        return None
+    try:
+        return brand_assets.publish_file(record.path, sha=record.sha)
+    except OSError:
+        return None
 
 st.set_page_config(
     layout="wide", 
@@ -36,10 +78,22 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Préchargement ReportLab/svglib/pypdf/pandas en tâche de fond, une fois par processus serveur :
+# le premier export ne paie plus l'import ni l'init des polices. CONFIGURATEUR_WARM_UP=0 pour couper.
+DEPS_WARM_UP = os.environ.get("CONFIGURATEUR_WARM_UP", "1") != "0"
+
+@st.cache_resource(show_spinner=False)
+def start_deps_warm_up():
+    return lazy_deps.warm_up()
+
+if DEPS_WARM_UP:
+    start_deps_warm_up()
+
 
 # --- PDF GENERATION WITH REPORTLAB & SVGLIB (ROBUST) ---
 def generate_pdf_report(data_dict, svg_string=None):
     try:
+        lazy_deps.require('reportlab', 'svglib')
         from reportlab.lib.pagesizes import A4
         from reportlab.pdfgen import canvas
         from reportlab.graphics import renderPDF
@@ -54,24 +108,10 @@ def generate_pdf_report(data_dict, svg_string=None):
         # 1. LOGO (Haut Gauche)
         # Gestion sécurisée: Si échec, on affiche un texte rouge
         try:
-             # Try decoding as-is, then with padding fix if needed
-             try:
-                 logo_data = base64.b64decode(LOGO_B64, validate=True)
-             except:
-                 b64 = LOGO_B64
-                 b64 += "=" * ((4 - len(b64) % 4) % 4)
-                 logo_data = base64.b64decode(b64)
-             
-             logo_io = io.BytesIO(logo_data)
-             
-             from reportlab.lib.utils import ImageReader
-             img = ImageReader(logo_io)
-             iw, ih = img.getSize()
-             aspect = ih / float(iw)
-             draw_w = 150
-             draw_h = draw_w * aspect
-             c.drawImage(img, 40, height - 40 - draw_h, width=draw_w, height=draw_h, mask='auto', preserveAspectRatio=True)
-             
+             if LOGO is None:
+                 raise FileNotFoundError("logo introuvable dans assets/")
+             # ImageReader partagé par le registre ; JPEG repris tel quel par drawImage
+             brand_assets.draw_asset(c, LOGO, 40, height - 40, 150)
         except Exception as e:
             c.setFont("Helvetica-Oblique", 10)
             c.setFillColor("red")
@@ -149,8 +189,314 @@ def generate_pdf_report(data_dict, svg_string=None):
         # GLOBAL CRASH CATCHER
         return None, f"{str(e)}" # Return error details
 
-def render_html_menuiserie(s, svg_string, logo_b64):
+# --- CACHE DISQUE DES ARTEFACTS ---
+# Rendus des repères enregistrés (SVG, fiches) mis en cache par empreinte des données
+# (artifact_cache.py). La version du moteur est l'empreinte de ce fichier : toute
+# modification du code de rendu invalide le cache.
+RENDERER_VERSION = artifact_cache.source_version(os.path.abspath(__file__))
+
+def repere_svg(module, d, render):
+    """SVG d'un repère enregistré : lu dans le cache disque, sinon `render()` puis mis en cache."""
+    cache = artifact_cache.default_cache()
+    key = cache.key('svg', module, d, RENDERER_VERSION)
+    return cache.get_or_build('svg', key, render, 'svg', text=True)
+
+# --- DOSSIER PDF PROJET (TOUS LES REPÈRES) ---
+# Les SVG sont rendus ici depuis les données enregistrées de chaque repère (rapide) ;
+# la mise en page ReportLab/svglib (lente) part dans le pool de processus de dossier_pdf.
+def project_repere_entry(cfg):
+    """Contenu de la page dossier d'un repère enregistré : infos, dimensions, SVG."""
+    d = cfg.get('data', {})
+    module = d.get('mode_module', 'Menuiserie')
+    entry = {'ref': cfg.get('ref', '-'), 'module': module, 'qte': d.get('qte_val', 1)}
+
+    if module == 'Volet Roulant':
+        dims = f"{d.get('vr_width', 1000)} x {d.get('vr_height', 1000)}"
+        entry.update(qte=d.get('vr_qte', 1), dims=dims, observations=d.get('vr_obs', ''), svg=repere_svg(module, d, lambda: generate_svg_volet(state=d)), infos=[
+            f"Dimensions: {dims} mm",
+            f"Coffre: {d.get('vr_type_coffre', '-')}",
+            f"Manoeuvre: {d.get('vr_type', '-')}",
+            f"Coloris: Coffre {d.get('vr_col_coffre', '-')} / Tablier {d.get('vr_col_tablier', '-')}",
+        ])
+    elif module == 'Vitrage':
+        dims = f"{d.get('vit_width', 1000)} x {d.get('vit_height', 1000)}"
+        entry.update(qte=d.get('vit_qte', entry['qte']), dims=dims, observations=d.get('vit_obs', ''), svg=repere_svg(module, d, lambda: generate_svg_vitrage(state=d)), infos=[
+            f"Dimensions: {dims} mm",
+            f"Forme: {d.get('vit_shape', 'Rectangulaire')}",
+            f"Type: {d.get('vit_type_mode', '-')} - {d.get('vit_mat', '-')}",
+        ])
+    elif module == 'Habillage':
+        key = d.get('hab_model_selector', 'm1')
+        prof = PROFILES_DB.get(key, PROFILES_DB['m1'])
+        inputs = {p: d.get(f"hab_{key}_{p}", prof['defaults'].get(p, 0)) for p in prof.get('params', [])}
+        length = d.get('hab_length_input', 3000)
+        epaisseur = d.get('hab_ep_v2', "15/10ème (1,5 mm)")
+        dev = calc_developpe(key, inputs, epaisseur, state=d)
+        entry.update(dims=f"L {length} / dév. {dev:.0f}", observations=d.get('hab_obs', ''), infos=[
+            f"Modèle: {prof['name']}",
+            f"Longueur: {length} mm - Développé: {dev:.1f} mm",
+            f"Finition: {d.get('hab_type_fin', '-')} - Épaisseur: {epaisseur}",
+            "Cotes: " + ", ".join(f"{p}={v}" for p, v in inputs.items()),
+        ])
+        entry['svg'] = repere_svg(module, d, lambda: generate_profile_svg(key, inputs, length, d.get('col_prelaq1', "Blanc 9016"), state=d))
+    else:
+        dims = f"{d.get('width_dorm', 0)} x {d.get('height_dorm', 0)}"
+        entry.update(dims=dims, observations=d.get('men_obs', ''), svg=repere_svg(module, d, lambda: generate_svg_v73(state=d)), infos=[
+            f"Dimensions: {dims} mm",
+            f"Type: {d.get('mat_type', 'PVC')} - {d.get('pose_type', '-')}",
+            f"Couleur: Int {d.get('col_in','-')} / Ext {d.get('col_ex','-')}",
+            f"Dormant: {d.get('frame_thig', 70)} mm",
+            f"Ailettes: {d.get('fin_val', 0)} mm",
+        ])
+    return entry
+
+def generate_project_pdf(project, workers=None, on_progress=None, out=None):
+    """Dossier PDF complet du projet (couverture, récapitulatif, une page par repère).
+
+    `out` : chemin du fichier résultat (écrit directement), sinon un buffer en mémoire.
+    Renvoie (out ou buffer, stats, erreur) ; même convention d'erreur que generate_pdf_report.
+    """
+    try:
+        import io
+        import dossier_pdf
+        lazy_deps.require('reportlab', 'svglib', 'pypdf')
+        reperes = [project_repere_entry(cfg) for cfg in project.get('configs', [])]
+        logo_path = LOGO.path if LOGO else None
+        jobs = dossier_pdf.dossier_jobs(project.get('name', 'Projet'), reperes, logo_path=logo_path)
+        buffer = io.BytesIO() if out is None else out
+        # Fragments de pages en cache disque : seuls les repères modifiés sont rendus
+        stats = dossier_pdf.build_dossier(jobs, buffer, workers=workers, on_progress=on_progress,
+                                          cache=artifact_cache.default_cache())
+        if out is None:
+            buffer.seek(0)
+        return buffer, stats, None
+    except Exception as e:
+        return None, None, f"{str(e)}"
+
+# --- ARCHIVE ZIP DU PROJET (FICHES HTML) ---
+# Même fiches que l'impression, mais CSS, logo et schémas sont des fichiers partagés
+# de l'archive (project_bundle.py) au lieu d'être recopiés en base64 dans chaque fiche.
+def project_habillage_cfg(d):
+    """cfg de render_html_habillage reconstruit depuis les données enregistrées d'un repère."""
+    key = d.get('hab_model_selector', 'm1')
+    prof = PROFILES_DB.get(key, PROFILES_DB['m1'])
+    inputs = {p: d.get(f"hab_{key}_{p}", prof['defaults'].get(p, 0)) for p in prof.get('params', [])}
+    finition = d.get('hab_type_fin', "Prélaqué 1 face")
+    if "Brut" in finition or "Galva" in finition:
+        couleur = f"Sans ({finition})"
+    elif finition == "Laquage 1 face":
+        couleur = d.get('col_laq1', "Blanc 9016")
+    elif finition == "Laquage 2 faces":
+        couleur = f"F1: {d.get('col_laq2_f1', 'Blanc 9016')} / F2: {d.get('col_laq2_f2', 'Blanc 9016')}"
+    elif finition == "Prélaqué 2 faces":
+        couleur = f"{d.get('col_prelaq2', 'Blanc 9016')} (2 faces)"
+    else:
+        couleur = d.get('col_prelaq1', "Blanc 9016")
+    return {'key': key, 'prof': prof, 'inputs': inputs, 'ref': d.get('ref_id', '-'), 'qte': d.get('qte_val', 1),
+            'length': d.get('hab_length_input', 3000), 'finition': finition,
+            'epaisseur': d.get('hab_ep_v2', "15/10ème (1,5 mm)"), 'couleur': couleur}
+
+FICHE_KINDS = {'Volet Roulant': 'volet', 'Vitrage': 'vitrage', 'Habillage': 'habillage'}
+
+def project_fiche_html(cfg, bundle):
+    """(infos index, HTML) de la fiche d'un repère enregistré, ressources servies par l'archive.
+
+    La fiche est lue dans le cache disque si le repère, le code de rendu, les gabarits
+    et la date n'ont pas changé depuis le dernier export.
+    """
+    d = cfg.get('data', {})
+    entry = project_repere_entry(cfg)
+    module = entry['module']
+    kind = FICHE_KINDS.get(module, 'menuiserie')
+    # Ressources écrites dans l'archive dans tous les cas (même si la fiche vient du cache)
+    logo_href = bundle.asset_href(LOGO) if LOGO else None
+    stylesheet_href = bundle.stylesheet_href(kind)
+    schema_src = None
+    if kind == 'habillage':
+        hcfg = project_habillage_cfg(d)
+        hcfg['ref'] = entry['ref']
+        schema = get_schema_asset(hcfg['prof']['image_key'], 'fiche')
+        if schema:
+            schema_src = bundle.asset_href(schema)
+
+    def render():
+        if kind == 'volet':
+            return render_html_volet(d, entry['svg'], logo_href, stylesheet_href=stylesheet_href)
+        if kind == 'vitrage':
+            return render_html_vitrage(d, entry['svg'], logo_href, stylesheet_href=stylesheet_href)
+        if kind == 'habillage':
+            dev = calc_developpe(hcfg['key'], hcfg['inputs'], hcfg['epaisseur'], state=d)
+            return render_html_habillage(hcfg, entry['svg'], logo_href, dev, "", stylesheet_href=stylesheet_href,
+                                         state=d, schema_src=schema_src, auto_print=False)
+        return render_html_menuiserie(d, entry['svg'], logo_href, stylesheet_href=stylesheet_href)
+
+    cache = artifact_cache.default_cache()
+    key = cache.key('html', kind, entry['ref'], d, RENDERER_VERSION, fiche_templates.TEMPLATE_VERSION,
+                    logo_href, stylesheet_href, schema_src, datetime.date.today().isoformat())
+    html = cache.get_or_build('html', key, render, 'html', text=True)
+    return {'dims': entry.get('dims', '-'), 'qte': entry.get('qte', 1)}, html
+
+# --- RAPPORT HTML DU PROJET (ÉCRIT EN FLUX) ---
+def project_report_reperes(project, on_progress=None):
+    """Repères du rapport HTML, calculés un par un au fil de l'écriture (cf. html_report.py)."""
+    configs = project.get('configs', [])
+    for no, cfg in enumerate(configs, start=1):
+        entry = project_repere_entry(cfg)
+        data = {'Module': entry['module'], 'Dimensions': entry.get('dims', '-'), 'Quantité': entry.get('qte', 1)}
+        for info in entry.get('infos', []):
+            label, sep, value = info.partition(":")
+            data[label.strip() if sep else info] = value.strip() if sep else ""
+        if entry.get('observations'):
+            data['Observations'] = entry['observations']
+        yield {'ref': entry['ref'], 'module': entry['module'], 'svg': entry['svg'], 'data': data}
+        if on_progress:
+            on_progress(no, len(configs))
+
+# --- EXPORTS EN ARRIÈRE-PLAN (FILE DE JOBS) ---
+REPORT_POLL_S = 1.0
+
+@st.cache_resource(show_spinner=False)
+def get_report_queue():
+    """File d'exports partagée par toutes les sessions du serveur (cf. report_jobs.py)."""
+    import atexit
+    import report_jobs
+    queue = report_jobs.ReportQueue(workers=2, per_session=1, ttl=1800)
+    # Dossier temporaire des résultats (PDF, ZIP...) supprimé à l'arrêt du serveur
+    atexit.register(queue.close)
+    return queue
+
+def report_session_id():
+    """Identifiant de la session navigateur (survit à st.session_state.clear())."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return "local"
+
+def submit_project_pdf_job(project, file_name):
+    """Met le dossier PDF du projet en file ; renvoie le job (existant si déjà lancé)."""
+    import dossier_pdf
+    queue = get_report_queue()
+    snapshot = copy.deepcopy(project)  # Projet figé au moment du clic
+    # Les processus de rendu sont partagés entre les exports simultanés
+    workers = max(1, dossier_pdf.default_workers() // queue.workers)
+
+    def run(job):
+        # Écrit directement dans le fichier résultat du job : pas de copie du document en mémoire
+        _, stats, err = generate_project_pdf(
+            snapshot, workers=workers, on_progress=lambda done, total: job.report(done, total, f"Page {done}/{total}"),
+            out=job.path)
+        job.raise_if_cancelled()
+        if err:
+            raise RuntimeError(err)
+        job.note = f"{stats['rendered']} page(s) rendue(s), {stats['reused']} réutilisée(s) - {stats['seconds']:.1f} s"
+
+    return queue.submit(report_session_id(), 'project_pdf', run, file_name, "application/pdf", label="Dossier PDF")
+
+def submit_project_zip_job(project, file_name):
+    """Met l'archive ZIP du projet en file ; écrite directement dans le fichier résultat du job."""
+    import project_bundle
+    snapshot = copy.deepcopy(project)
+
+    def run(job):
+        project_bundle.write_bundle(job.path, snapshot, project_fiche_html, logo=LOGO,
+                                    on_progress=lambda done, total: job.report(done, total, f"Fiche {done}/{total}"))
+
+    return get_report_queue().submit(report_session_id(), 'project_zip', run, file_name, "application/zip", label="Archive ZIP")
+
+def submit_project_report_job(project, file_name):
+    """Met le rapport HTML du projet en file ; écrit morceau par morceau dans le fichier résultat."""
+    import html_report
+    snapshot = copy.deepcopy(project)
+
+    def run(job):
+        reperes = project_report_reperes(snapshot, on_progress=lambda done, total: job.report(done, total, f"Repère {done}/{total}"))
+        html_report.write_report(html_report.iter_report(snapshot.get('name', 'Projet'), reperes), job.path)
+
+    return get_report_queue().submit(report_session_id(), 'project_html', run, file_name, "text/html", label="Rapport HTML")
+
+def render_report_job(session, kind, polling=False):
+    """Suivi du dernier export `kind` de la session (appelé en fragment tant qu'un job est actif)."""
+    queue = get_report_queue()
+    job = next(iter(queue.jobs_for(session, kind)), None)
+    seen_key = f"report_job_seen_{kind}"
+    if job is None:
+        # Job purgé (ttl) depuis son dernier affichage : le dire plutôt que retirer le bouton sans un mot
+        label = st.session_state.get(seen_key)
+        if label:
+            st.warning(f"{label} expiré : relancez la génération.")
+        return
+    st.session_state[seen_key] = job.label if job.status == 'done' else None
+    if job.active:
+        st.progress(job.progress, text=f"{job.label} : {job.message}")
+        if st.button("✖ Annuler", key=f"btn_cancel_{job.id}", disabled=job.cancel_requested):
+            queue.cancel(job.id)
+        return
+    if polling:
+        # Job terminé : rerun complet pour arrêter le rafraîchissement périodique
+        st.rerun()
+    if job.status == 'done':
+        size = job.size
+        if size is None:
+            st.warning(f"{job.label} expiré : relancez la génération.")
+        else:
+            # Contenu lu au clic seulement (callable) : afficher le bouton ne charge pas le fichier.
+            # Purgé entre l'affichage et le clic : JobExpired, puis ce message au rerun qui suit.
+            st.download_button(f"⬇️ Télécharger ({job.label}, {size / 1e6:.1f} Mo)", job.read_or_raise,
+                               file_name=job.filename, mime=job.mime, key=f"dl_job_{job.id}")
+            st.caption(f"{job.note + '. ' if job.note else ''}Disponible {queue.ttl // 60} min après génération.")
+    elif job.status == 'error':
+        st.error(f"{job.label} : {job.error}")
+    elif job.status == 'cancelled':
+        st.caption(f"{job.label} annulé.")
+
+# --- BIBLIOTHÈQUES JS EMBARQUÉES ---
+@st.cache_resource(show_spinner=False)
+def get_three_modules():
+    """Import map three.js : copie de vendor/ publiée sous static/ (CDN seulement sans service statique).
+
+    Copie absente ou altérée : VendorError, affichée comme erreur de la vue 3D.
+    """
+    import vendor_assets
+    return vendor_assets.module_urls('three', local=st.get_option("server.enableStaticServing"))
+
+# --- IMPRESSION PAR URL ---
+# La fiche est écrite une fois dans static/print/ (artifact_store.py) et ouverte par son
+# URL empreintée : plus de document entier échappé dans une chaîne JavaScript.
+PRINT_TTL_S = 3600
+
+@st.cache_resource(show_spinner=False)
+def get_print_store():
+    import artifact_store
+    return artifact_store.ArtifactStore(subdir="print", ttl=PRINT_TTL_S)
+
+def open_print_document(html_doc):
+    """Ouvre la fiche dans un nouvel onglet, qui lance l'impression ; renvoie l'URL (None en repli)."""
+    import artifact_store
+    from streamlit.components.v1 import html
+    doc = fiche_templates.with_auto_print(html_doc)
+    url = None
+    if st.get_option("server.enableStaticServing"):
+        try:
+            url = get_print_store().put(artifact_store.rebase_static_urls(doc))
+        except OSError:
+            pass
+    # Horodatage : le composant change à chaque clic, le script est réexécuté
+    stamp = f"<!-- {datetime.datetime.now().isoformat()} -->"
+    if url is None:
+        # Repli sans service statique : document écrit dans la fenêtre (sérialisé en JSON)
+        html(f"<script>var w=window.open();w.document.write({json.dumps(doc)});w.document.close();</script>{stamp}", height=0)
+        return None
+    html(f"<script>window.open({json.dumps(url)}, '_blank');</script>{stamp}", height=0)
+    st.caption(f"[Ouvrir la fiche à imprimer]({url}) si l'onglet ne s'ouvre pas.")
+    return url
+
+def render_html_menuiserie(s, svg_string, logo_src, stylesheet_href=None):
     """HTML generation for Menuiserie printing (Full Width Bottom Plan)."""
+    s = fiche_templates.StateView(s)  # une lecture du proxy st.session_state par clé
     
     # Pre-calc Observations
     obs_men_html = ""
@@ -164,82 +510,11 @@ def render_html_menuiserie(s, svg_string, logo_b64):
             </div>
         """
 
-    css = """
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
-        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
-        
-        .page-container { 
-            max-width: 210mm; 
-            margin: 0 auto; 
-            padding: 20px;
-        }
-
-        /* HEADER */
-        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
-        .header-left img { max-height: 70px; width: auto; }
-        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
-        
-        .header-right { text-align: right; padding-right: 5px; }
-        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
-        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
-        .header-right .date { font-size: 11px; color: #666; }
-
-        /* STACKED LAYOUT (Sections) */
-        .section-block { margin-bottom: 25px; break-inside: avoid; }
-        
-        /* HEADINGS */
-        h3 { 
-            font-size: 15px; color: #2c3e50; margin: 0 0 12px 0; 
-            border-left: 5px solid #3498db; padding-left: 10px; 
-            line-height: 1.2; text-transform: uppercase; letter-spacing: 0.5px;
-        }
-        
-        /* PANELS */
-        .panel { background: #fdfdfd; padding: 15px; border: 1px solid #eee; border-radius: 4px; font-size: 11px; }
-        .panel-row { display: flex; justify-content: space-between; padding: 6px 0; border-bottom: 1px dotted #ccc; }
-        .panel-row:last-child { border-bottom: none; }
-        .panel-row .lbl { font-weight: bold; color: #444; width: 40%; }
-        .panel-row .val { font-weight: normal; color: #000; text-align: right; width: 60%; }
-        
-        /* ZONES TABLE (Full Width) */
-        table { width: 100%; border-collapse: collapse; font-size: 12px; margin-top: 5px; }
-        th { background: #cfd8dc; color: #2c3e50; padding: 6px; text-align: left; text-transform: uppercase; font-size: 10px; }
-        td { border-bottom: 1px solid #eee; padding: 8px 12px; color: #333; line-height: 1.4; }
-        tr:nth-child(even) { background-color: #f9f9f9; }
-
-        /* BOTTOM SECTION (PLAN) */
-        .visual-box {
-            border: none; margin-top: 20px;
-            display: flex; flex-direction: column; align-items: center; justify-content: center;
-            position: relative;
-            width: 100%; height: 800px; /* Reduced to fit on Page 2 with Title */
-            page-break-inside: avoid;
-        }
-        /* Allow SVG to take more space */
-        .visual-box svg { height: 100%; width: auto; max-width: 98%; }
-        
-        .footer { 
-            position: fixed; bottom: 10mm; left: 0; right: 0;
-            font-size: 9px; color: #999; text-align: center; 
-        }
-
-        @media print {
-            @page { size: A4; margin: 12mm; }
-            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
-            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; }
-            .no-print { display: none; }
-            h3 { break-after: avoid; }
-            /* Explicit Page Breaks with Safety Margin */
-            .page-break { page-break-before: always; padding-top: 30px; }
-        }
-    </style>
-    """
     
     # Logo
     logo_html = f"<h1>Fiche Technique</h1>"
-    if logo_b64:
-        logo_html = f'<img src="data:image/jpeg;base64,{logo_b64}" alt="Logo">'
+    if logo_src:
+        logo_html = f'<img src="{logo_src}" alt="Logo">'
         
     # Zones Processing
     w_d = s.get('width_dorm', 1000)
@@ -356,79 +631,15 @@ def render_html_menuiserie(s, svg_string, logo_b64):
 
     import datetime
     
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>{css}</head>
-    <body>
-        <div class="page-container">
-            <!-- HEADER -->
-            <div class="header">
-                <div class="header-left">
-                    {logo_html}
-                    <div class="subtitle">Menuiserie {s.get('mat_type', 'PVC')}</div>
-                </div>
-                <div class="header-right">
-                    <div class="label">RÉFÉRENCE CHANTIER</div>
-                    <div class="ref">{ref_id}</div>
-                    <div class="date">{datetime.datetime.now().strftime('%d/%m/%Y')}</div>
-                </div>
-            </div>
-            
-            <!-- STACKED SECTIONS -->
-            
-            <!-- 1. INFORMATIONS GENERALES -->
-            <div class="section-block">
-                <h3>Informations Générales</h3>
-                <div class="panel">
-                    <div class="panel-row"><span class="lbl">Repère</span> <span class="val">{ref_id}</span></div>
-                    <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{s.get('qte_val', 1)}</span></div>
-                    <div class="panel-row"><span class="lbl">Projet</span> <span class="val">{s.get('proj_type', 'Rénovation')}</span></div>
-                    <div class="panel-row"><span class="lbl">Pose</span> <span class="val">{s.get('pose_type')}</span></div>
-                    <div class="panel-row"><span class="lbl">Dormant</span> <span class="val">{s.get('frame_thig')} mm</span></div>
-                    <div class="panel-row"><span class="lbl">Ailettes</span> <span class="val">{ail_str}</span></div>
-                    <div class="panel-row"><span class="lbl">Appui</span> <span class="val">{'OUI ('+str(s.get('width_appui'))+'mm)' if s.get('is_appui_rap') else 'NON'}</span></div>
-                    <div class="panel-row"><span class="lbl">Couleur</span> <span class="val">{s.get('col_in')} (Int) / {s.get('col_ex')} (Ext)</span></div>
-                    <div class="panel-row"><span class="lbl">Type Côtes</span> <span class="val">{s.get('dim_type', 'Tableau')}</span></div>
-                    <div class="panel-row"><span class="lbl">Dos Dormant</span> <span class="val">{w_d} x {h_d} mm</span></div>
-                    <div class="panel-row"><span class="lbl">Recouvrement</span> <span class="val">{w_rec} x {h_rec} mm</span></div>
-                    <div class="panel-row"><span class="lbl">Allège</span> <span class="val">{s.get('h_allege', 0)} mm</span></div>
-                    <div class="panel-row"><span class="lbl">Volet R.</span> <span class="val">{'OUI ('+str(int(s.get('vr_h',0)))+'mm)' if s.get('vr_enable') else 'NON'}</span></div>
-                    {common_str}
-                </div>
-            </div>
-            
-            <!-- 2. DETAILS DES ZONES -->
-            <div class="section-block">
-                <h3>Détails des Zones</h3>
-                <div class="panel">
-                    <table>
-                        <tbody>{z_rows}</tbody>
-                    </table>
-                </div>
-            </div>
-            
-            <!-- 3. PLAN TECHNIQUE (New Page) -->
-            <div class="page-break">
-                <h3>Plan Technique</h3>
-                <div class="visual-box">
-                    {svg_string}
-                    <div style="position:absolute; bottom:10px; font-size:10px; color:#aaa;">Vue extérieure - Cotes tableau en mm</div>
-                </div>
-            </div>
-            
-            <!-- OBSERVATIONS -->
-            {obs_men_html}
-            
-            <div class="footer">
-                Document généré automatiquement - Miroiterie Yerroise<br>
-                Merci de vérifier les cotes avant validation définitive.
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return html
+    # Gabarit compilé (fiche_templates) : CSS et mise en page ne sont plus reconstruits à chaque appel
+    values = {
+        'logo': logo_html, 'date': datetime.datetime.now().strftime('%d/%m/%Y'), 'ref': ref_id,
+        'ailettes': ail_str, 'appui': 'OUI ('+str(s.get('width_appui'))+'mm)' if s.get('is_appui_rap') else 'NON',
+        'w_d': w_d, 'h_d': h_d, 'w_rec': w_rec, 'h_rec': h_rec,
+        'volet': 'OUI ('+str(int(s.get('vr_h',0)))+'mm)' if s.get('vr_enable') else 'NON',
+        'common_specs': common_str, 'zone_rows': z_rows, 'svg': svg_string, 'observations': obs_men_html,
+    }
+    return fiche_templates.render_fiche('menuiserie', values, s, stylesheet_href)
 
 # --- CSS MOBILE & PRINT FIX ---
 st.markdown("""
@@ -562,6 +773,9 @@ def serialize_config():
     for k in st.session_state:
         if k in system_keys or k.startswith('FormSubmit'):
             continue
+        # Etat des aperçus SVG (composant) : propre à la session navigateur, pas au repère
+        if isinstance(k, str) and (k.startswith('svg_preview_') or k.startswith('_svg_preview_')):
+            continue
             
         # EXCLUDE BUTTONS
         if isinstance(k, str):
@@ -791,6 +1005,37 @@ def render_top_navigation():
                 dl_name = f"{safe_name}.json"
                 
                 st.download_button("Export (JSON)", proj_data, file_name=dl_name, mime="application/json")
+
+                # Dossier PDF complet : job en arrière-plan (report_jobs.py), suivi par un fragment
+                n_cfg = len(st.session_state['project']['configs'])
+                sid = report_session_id()
+                pdf_active = any(j.active for j in get_report_queue().jobs_for(sid, 'project_pdf'))
+                if st.button(f"📑 Dossier PDF ({n_cfg} repères)", disabled=n_cfg == 0 or pdf_active, use_container_width=True):
+                    submit_project_pdf_job(st.session_state['project'], f"{safe_name}_dossier.pdf")
+                    pdf_active = True
+                st.fragment(render_report_job, run_every=REPORT_POLL_S if pdf_active else None)(sid, 'project_pdf', polling=pdf_active)
+
+                # Archive ZIP : une fiche HTML par repère + index + ressources partagées + JSON
+                zip_active = any(j.active for j in get_report_queue().jobs_for(sid, 'project_zip'))
+                if st.button(f"📦 Archive ZIP ({n_cfg} fiches)", disabled=n_cfg == 0 or zip_active, use_container_width=True):
+                    submit_project_zip_job(st.session_state['project'], f"{safe_name}_fiches.zip")
+                    zip_active = True
+                st.fragment(render_report_job, run_every=REPORT_POLL_S if zip_active else None)(sid, 'project_zip', polling=zip_active)
+
+                # Rapport HTML : un seul document, écrit repère par repère (html_report.py)
+                html_active = any(j.active for j in get_report_queue().jobs_for(sid, 'project_html'))
+                if st.button(f"🧾 Rapport HTML ({n_cfg} repères)", disabled=n_cfg == 0 or html_active, use_container_width=True):
+                    submit_project_report_job(st.session_state['project'], f"{safe_name}_rapport.html")
+                    html_active = True
+                st.fragment(render_report_job, run_every=REPORT_POLL_S if html_active else None)(sid, 'project_html', polling=html_active)
+
+                st.markdown("### Dépendances")
+                for group, seconds, status, by in lazy_deps.import_report():
+                    timing = f"{seconds * 1000:.0f} ms" if seconds is not None else "-"
+                    st.caption(f"{group} : {status} ({timing}{', ' + by if by else ''})")
+
+                st.markdown("### Ressources")
+                render_asset_diagnostics()
                 
                 def import_project_callback():
                     uploaded = st.session_state.get('uploader_json')
@@ -1026,65 +1271,15 @@ def render_top_navigation():
         st.caption(f"✨ **Nouveau fichier :** {active_ref} (Non enregistré)")
 
 
-def generate_html_report(project_name, config_ref, svg_content, data_dict):
+def generate_html_report(project_name, config_ref, svg_content, data_dict, stylesheet_href=None):
     """Génère un rapport HTML complet prêt à l'impression."""
     
-    # Format Table HTML
-    table_rows = ""
-    for k, v in data_dict.items():
-        table_rows += f"<tr><td style='font-weight:bold; width:40%; padding:5px; border-bottom:1px solid #ddd;'>{k}</td><td style='padding:5px; border-bottom:1px solid #ddd;'>{v}</td></tr>"
-
-    # FIXED: Use standard string (not f-string) and .format() to avoid conflicts with CSS braces
-    # We double the braces for CSS/JS {{ }} so .format() ignores them.
-    html_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Fiche Technique - {config_ref}</title>
-        <style>
-            body {{ font-family: sans-serif; margin: 40px; color: #333; }}
-            h1 {{ color: #2c3e50; text-align: center; }}
-            h2 {{ color: #3498db; border-bottom: 2px solid #3498db; padding-bottom: 5px; margin-top: 30px; }}
-            .container {{ max-width: 800px; margin: 0 auto; }}
-            .drawing {{ text-align: center; margin: 20px 0; border: 1px solid #eee; padding: 20px; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 10px; }}
-            .footer {{ margin-top: 50px; font-size: 12px; color: #777; text-align: center; border-top: 1px solid #eee; padding-top: 10px; }}
-            
-            @media print {{
-                body {{ margin: 0; }}
-                .no-print {{ display: none; }}
-                .container {{ max-width: 100%; }}
-                .page-break {{ page-break-before: always; }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Fiche Technique Menuiserie</h1>
-            <p style="text-align:center;"><strong>Projet :</strong> {project_name} | <strong>Réf :</strong> {config_ref}</p>
-            
-            <div class="drawing">
-                {svg_content}
-            </div>
-            
-            <h2>Caractéristiques Techniques</h2>
-            <table>
-                {table_rows}
-            </table>
-            
-            <div class="footer">
-                Généré par FenêtrePro V73 - {project_name}
-            </div>
-        </div>
-        <script>
-            // Auto print if desired, or let user click
-            // window.print();
-        </script>
-    </body>
-    </html>
-    """
-    return html_template.format(project_name=project_name, config_ref=config_ref, svg_content=svg_content, table_rows=table_rows)
+    import html_report
+    # Format Table HTML (join : pas de concaténation quadratique)
+    table_rows = "".join(html_report.table_rows(data_dict))
+
+    values = {'project_name': project_name, 'config_ref': config_ref, 'svg': svg_content, 'table_rows': table_rows}
+    return fiche_templates.render_fiche('rapport', values, {}, stylesheet_href)
 
 # ==============================================================================
 
@@ -1602,14 +1797,206 @@ def reset_config(rerun=True):
 
 
 
+# --- MÉTRIQUES POLICE (ARIAL / HELVETICA) ---
+# Chasses AFM Helvetica (métriquement identiques à Arial), en 1/1000 em, ASCII 32..126.
+FONT_WIDTHS_REGULAR = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,  #  !"#$%&'()*+,-./
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,  # 0-9 :;<=>?
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778, # @A-O
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,  # P-Z [\]^_
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,  # `a-o
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,       # p-z {|}~
+)
+FONT_WIDTHS_BOLD = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+FONT_WIDTHS_EXTRA = {"°": 400, "²": 333, "³": 333, "×": 584, "Ø": 778, "ø": 611, "€": 556, "œ": 944, "Œ": 1000, "’": 222}
+FONT_WIDTH_DEFAULT = 556
+FONT_ASCENT = 0.75   # Haut capitales / ascendantes (em)
+FONT_DESCENT = 0.21  # Bas des descendantes (em)
+FONT_MIDDLE = 0.26   # Baseline -> dominant-baseline="middle" (demi hauteur d'x)
+
+def _char_width(c, widths):
+    o = ord(c)
+    if 32 <= o <= 126:
+        return widths[o - 32]
+    if c in FONT_WIDTHS_EXTRA:
+        return FONT_WIDTHS_EXTRA[c]
+    base = unicodedata.normalize("NFD", c)[0] # é -> e
+    if base != c and 32 <= ord(base) <= 126:
+        return widths[ord(base) - 32]
+    return FONT_WIDTH_DEFAULT
+
+# lru_cache (par exécution du script) : moins coûteux que le hachage de st.cache_data
+@functools.lru_cache(maxsize=4096)
+def measure_text(text, font_size, weight="normal"):
+    """Largeur (unités SVG) d'un libellé Arial à font_size, d'après la table de chasses."""
+    widths = FONT_WIDTHS_BOLD if weight == "bold" else FONT_WIDTHS_REGULAR
+    return sum(_char_width(c, widths) for c in str(text)) * font_size / 1000.0
+
+def text_bbox(x, y, text, font_size, weight="normal", anchor="middle", rotation=0, baseline="middle"):
+    """Boîte englobante (x0, y0, x1, y1) d'un <text> SVG, rotation autour de (x, y) incluse."""
+    w = measure_text(text, font_size, weight)
+    lx0 = {"start": 0, "end": -w}.get(anchor, -w / 2)
+    if baseline == "middle":
+        ly0, ly1 = -(FONT_ASCENT - FONT_MIDDLE) * font_size, (FONT_DESCENT + FONT_MIDDLE) * font_size
+    elif baseline == "hanging":
+        ly0, ly1 = 0, (FONT_ASCENT + FONT_DESCENT) * font_size
+    else: # alphabetic
+        ly0, ly1 = -FONT_ASCENT * font_size, FONT_DESCENT * font_size
+    corners = [(lx0, ly0), (lx0 + w, ly0), (lx0, ly1), (lx0 + w, ly1)]
+    if rotation:
+        a = math.radians(rotation)
+        ca, sa = math.cos(a), math.sin(a)
+        corners = [(cx * ca - cy * sa, cx * sa + cy * ca) for cx, cy in corners]
+    xs = [x + c[0] for c in corners]
+    ys = [y + c[1] for c in corners]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def bbox_extend(bbox, box):
+    """Agrandit bbox [x0, y0, x1, y1] (modifiée en place) pour contenir box."""
+    bbox[0] = min(bbox[0], box[0]); bbox[1] = min(bbox[1], box[1])
+    bbox[2] = max(bbox[2], box[2]); bbox[3] = max(bbox[3], box[3])
+
+def dimension_track(font_size):
+    """Pas entre deux pistes de cotation de draw_dimension_line (texte + écart + tic + jeu)."""
+    # Texte à 0.6 em du trait (centré en hauteur), tic de 0.4 em de l'autre côté, jeu 0.3 em
+    return font_size * (0.6 + (FONT_ASCENT - FONT_MIDDLE) + 0.4 + 0.3)
+
+# --- NIVEAUX DE DÉTAIL (LOD) ---
+# full : fiche complète. schematic : géométrie + symboles d'ouverture, sans poignées,
+# hachures, graduations ni cotes. outline : contours seuls (vignettes, vues de façade).
+LOD_FULL = "full"
+LOD_SCHEMATIC = "schematic"
+LOD_OUTLINE = "outline"
+LOD_RANK = {LOD_OUTLINE: 0, LOD_SCHEMATIC: 1, LOD_FULL: 2}
+LOD_MIN_PX = 2.0 # Détail plus petit que ça à l'écran : non émis
+
+def lod_keep(size, level, lod=LOD_FULL, px_per_unit=None):
+    """True si une primitive de niveau `level` et de taille `size` (unités SVG) doit être émise."""
+    if LOD_RANK.get(lod, 2) < LOD_RANK[level]:
+        return False
+    return px_per_unit is None or size * px_per_unit >= LOD_MIN_PX
+
+# --- APERÇU SVG INCRÉMENTAL (COMPOSANT) ---
+# Le composant components/svg_preview garde le DOM du dessin dans le navigateur :
+# à chaque rerun on n'envoie que les primitives ajoutées/retirées, repérées par un
+# pid stable (empreinte du markup). Envoi complet au premier affichage ou sur demande
+# de resynchronisation du client (iframe rechargée).
+SVG_TAG_RE = re.compile(r'<(/?)([A-Za-z][\w:.-]*)(?:"[^"]*"|\'[^\']*\'|[^\'">])*?(/?)>')
+SVG_PREVIEW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "svg_preview")
+
+try:
+    import streamlit.components.v1 as _components
+    _svg_preview_component = _components.declare_component("svg_preview", path=SVG_PREVIEW_DIR) if os.path.isdir(SVG_PREVIEW_DIR) else None
+except Exception:
+    _svg_preview_component = None
+
+def _split_svg_children(body):
+    """Éléments de premier niveau d'un fragment SVG (un groupe <g> nu est aplati)."""
+    items = []
+    depth = 0
+    start = 0
+    for t in SVG_TAG_RE.finditer(body):
+        closing, _name, self_closing = t.groups()
+        if closing:
+            depth -= 1
+            if depth == 0:
+                items.append(body[start:t.end()])
+        elif self_closing:
+            if depth == 0:
+                items.append(t.group(0))
+        else:
+            if depth == 0:
+                start = t.start()
+            depth += 1
+    out = []
+    for it in items:
+        if it.startswith('<g>') and it.endswith('</g>'):
+            out.extend(_split_svg_children(it[3:-4]))
+        else:
+            out.append(it)
+    return out
+
+def svg_primitives(svg):
+    """(balise <svg> racine, [(pid, markup)]) ; pid identique d'un rerun à l'autre pour une primitive inchangée."""
+    m = re.match(r'\s*(<svg\b[^>]*>)', svg)
+    if not m:
+        return "<svg>", []
+    root = m.group(1)
+    end = svg.rfind('</svg>')
+    items = []
+    seen = {}
+    for markup in _split_svg_children(svg[m.end():end if end >= 0 else len(svg)]):
+        h = hashlib.blake2b(markup.encode('utf-8'), digest_size=6).hexdigest()
+        n = seen.get(h, 0)
+        seen[h] = n + 1
+        items.append((h if n == 0 else f"{h}.{n}", markup))
+    return root, items
+
+def svg_patch(prev, svg, full=False):
+    """Patch entre l'état affiché côté client `prev` (None = rien) et `svg`. Renvoie (nouvel état, patch)."""
+    root, items = svg_primitives(svg)
+    ids = [pid for pid, _ in items]
+    rev = prev['rev'] + 1 if prev else 1
+    # sid : identifiant de l'état serveur, pour qu'un état recréé (rev repartant à 1) ne soit pas confondu
+    sid = prev['sid'] if prev else uuid.uuid4().hex[:8]
+    state = {'sid': sid, 'rev': rev, 'root': root, 'ids': ids}
+    if not prev or full:
+        return state, {'full': True, 'sid': sid, 'rev': rev, 'root': root, 'items': [list(it) for it in items]}
+    if prev['root'] == root and prev['ids'] == ids:
+        # Rien à transmettre : même révision, le client l'ignore
+        return prev, {'sid': sid, 'rev': prev['rev'], 'base': prev['rev'], 'remove': [], 'insert': []}
+
+    remove, insert = [], []
+    ops = difflib.SequenceMatcher(None, prev['ids'], ids, autojunk=False).get_opcodes()
+    for tag, i1, i2, j1, j2 in ops:
+        if tag in ('replace', 'delete'):
+            remove.extend(prev['ids'][i1:i2])
+        if tag in ('replace', 'insert'):
+            insert.extend([j, ids[j], items[j][1]] for j in range(j1, j2))
+    patch = {'sid': sid, 'rev': rev, 'base': prev['rev'], 'remove': remove, 'insert': insert}
+    if prev['root'] != root:
+        patch['root'] = root
+    return state, patch
+
+def render_svg_preview(svg, key, height=620):
+    """Affiche `svg` via le composant incrémental (repli st.markdown si indisponible)."""
+    if _svg_preview_component is None:
+        style_container = f'width:100%; height:{height}px; border:1px solid #ddd; background:white; display:flex; align-items:center; justify-content:center; overflow:hidden;'
+        st.markdown(f'<div style="{style_container}">{svg}</div>', unsafe_allow_html=True)
+        return
+
+    state_key = f"_svg_preview_state_{key}"
+    prev = st.session_state.get(state_key)
+    # Valeur renvoyée par le client : {'resync': rev} s'il a perdu le fil des patchs
+    req = st.session_state.get(key)
+    resync = prev.get('resync') if prev else None
+    full = False
+    if prev and isinstance(req, dict) and req.get('resync') and req['resync'] != resync:
+        resync = req['resync']
+        full = True
+
+    state, patch = svg_patch(prev, svg, full)
+    state['resync'] = resync
+    st.session_state[state_key] = state
+    _svg_preview_component(patch=patch, height=height, key=key, default=None)
+
 def draw_rect(svg, x, y, w, h, fill, stroke="black", sw=1, z_index=1):
     svg.append((z_index, f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="{fill}" stroke="{stroke}" stroke-width="{sw}" />'))
 
-def draw_text(svg, x, y, text, font_size=12, fill="black", weight="normal", anchor="middle", z_index=10, rotation=0):
+def draw_text(svg, x, y, text, font_size=12, fill="black", weight="normal", anchor="middle", z_index=10, rotation=0, bbox=None):
     transform = f'transform="rotate({rotation}, {x}, {y})"' if rotation != 0 else ""
+    if bbox is not None:
+        bbox_extend(bbox, text_bbox(x, y, text, font_size, weight, anchor, rotation))
     svg.append((z_index, f'<text x="{x}" y="{y}" font-family="Arial" font-size="{font_size}" fill="{fill}" font-weight="{weight}" text-anchor="{anchor}" dominant-baseline="middle" {transform}>{text}</text>'))
 
-def draw_dimension_line(svg_content, x1, y1, x2, y2, value, text_prefix="", offset=50, orientation="H", font_size=24, z_index=8, leader_fixed_start=None):
+def draw_dimension_line(svg_content, x1, y1, x2, y2, value, text_prefix="", offset=50, orientation="H", font_size=24, z_index=8, leader_fixed_start=None, bbox=None):
     # V77 FIX: Fully Proportional Dimensions
     # Derive tick size and layout spacing from font_size to ensure visibility at all scales
     tick_size = font_size * 0.4  # e.g. 24 -> 10, 60 -> 24
@@ -1628,7 +2015,9 @@ def draw_dimension_line(svg_content, x1, y1, x2, y2, value, text_prefix="", offs
         
         svg_content.append((z_index, f'<line x1="{x1}" y1="{start_y1}" x2="{x1}" y2="{y_line + tick_size}" stroke="black" stroke-width="{stroke_w}" stroke-dasharray="{stroke_w*4},{stroke_w*4}" />'))
         svg_content.append((z_index, f'<line x1="{x2}" y1="{start_y2}" x2="{x2}" y2="{y_line + tick_size}" stroke="black" stroke-width="{stroke_w}" stroke-dasharray="{stroke_w*4},{stroke_w*4}" />'))
-        draw_text(svg_content, (x1 + x2) / 2, y_line - text_gap, display_text, font_size=font_size, weight="bold", z_index=z_index)
+        draw_text(svg_content, (x1 + x2) / 2, y_line - text_gap, display_text, font_size=font_size, weight="bold", z_index=z_index, bbox=bbox)
+        if bbox is not None:
+            bbox_extend(bbox, (min(x1, x2), min(start_y1, start_y2, y_line), max(x1, x2), y_line + tick_size))
     elif orientation == "V":
         x_line = x1 - offset
         # V79 FIX: Ensure height is positive for rect
@@ -1647,7 +2036,9 @@ def draw_dimension_line(svg_content, x1, y1, x2, y2, value, text_prefix="", offs
         
         txt_x = x_line - text_gap
         txt_y = (y1 + y2) / 2
-        draw_text(svg_content, txt_x, txt_y, display_text, font_size=font_size, fill="black", weight="bold", anchor="middle", z_index=z_index, rotation=-90)
+        draw_text(svg_content, txt_x, txt_y, display_text, font_size=font_size, fill="black", weight="bold", anchor="middle", z_index=z_index, rotation=-90, bbox=bbox)
+        if bbox is not None:
+            bbox_extend(bbox, (x_line - tick_size, min(y1, y2), max(start_x1, start_x2, x_line), max(y1, y2)))
 
 # --- FONCTION DESSIN CONTENU ZONE ---
 def draw_handle_icon(svg, x, y, z_index=20, rotation=0):
@@ -1669,6 +2060,12 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
     c_frame = config_global['color_frame']
     vis_ouvrant = 55 
     
+    # Niveau de détail (cf. lod_keep) transmis par le générateur via config_global
+    lod = config_global.get('lod', LOD_FULL)
+    ppu = config_global.get('px_per_unit')
+    def keep(size, level):
+        return lod_keep(size, level, lod, ppu)
+    
     # Helper interne pour dessiner un "bloc vitré/panneau"
     def draw_leaf_interior(lx, ly, lw, lh, z_start=None):
         nb_h = params.get('traverses', 0)
@@ -1700,11 +2097,14 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
                 col_h = "#F0F0F0" if params.get('remp_haut') == "Panneau" else config_global['color_glass']
                 draw_rect(svg, lx, ly, lw, h_rect_haut, col_h, "black", 1, z_eff+1)
             
-            draw_rect(svg, lx, y_trav_start, lw, ep_trav, c_frame, "black", 1, z_eff+2)
+            if keep(ep_trav, LOD_SCHEMATIC):
+                draw_rect(svg, lx, y_trav_start, lw, ep_trav, c_frame, "black", 1, z_eff+2)
             
             # --- COTE HAUTEUR TRAVERSE (V74 FIX) ---
             ltx = lx + lw - 30 
-            if pos_trav == "Sur mesure (du bas)":
+            if not keep(font_dim_ref, LOD_FULL):
+                pass
+            elif pos_trav == "Sur mesure (du bas)":
                # Cote depuis le bas
                draw_dimension_line(svg, ltx, y_center, ltx, ly+lh, h_custom, "", -10, "V", font_size=font_dim_ref, z_index=z_eff+10)
             else:
@@ -1720,8 +2120,8 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
             draw_rect(svg, lx, ly, lw, lh, col_g, "black", 1, z_eff+1)
             
             # Only draw grid if there are traverses
-            if nb_h > 0 or nb_v > 0:
-                ep_trav = params.get('epaisseur_traverse', 20)
+            ep_trav = params.get('epaisseur_traverse', 20)
+            if (nb_h > 0 or nb_v > 0) and keep(ep_trav, LOD_SCHEMATIC):
                 
                 # DRAW HORIZONTAL
                 if nb_h > 0:
@@ -1745,7 +2145,8 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
         vis_fixe = 42 # Épaississement du dormant visible pour le Fixe (~65mm total)
         # draw_rect(svg, x, y, w, h, c_frame, "black", 1, z_base) <- Removed to avoid double border
         draw_leaf_interior(x+vis_fixe, y+vis_fixe, w-2*vis_fixe, h-2*vis_fixe)
-        draw_text(svg, x+w/2, y+h/2, "F", font_size=40, fill="#335c85", weight="bold", z_index=z_base+5)
+        if keep(40, LOD_SCHEMATIC):
+            draw_text(svg, x+w/2, y+h/2, "F", font_size=40, fill="#335c85", weight="bold", z_index=z_base+5)
         
     elif type_ouv in ["1 Vantail", "Oscillo-Battant"]:
         adj = 24 # Visuel dormant (Increased V73)
@@ -1753,13 +2154,15 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
         draw_leaf_interior(x+vis_ouvrant, y+vis_ouvrant, w-2*vis_ouvrant, h-2*vis_ouvrant)
         
         # LABEL VP (Vantail Principal)
-        draw_text(svg, x+w/2, y+h/2, "VP", font_size=40, fill="#335c85", weight="bold", z_index=z_base+7)
+        if keep(40, LOD_SCHEMATIC):
+            draw_text(svg, x+w/2, y+h/2, "VP", font_size=40, fill="#335c85", weight="bold", z_index=z_base+7)
         
         sens = params.get('sens', 'TG')
         mid_y = y + h/2
         if sens == 'TD': p = f"{x+w},{y} {x},{mid_y} {x+w},{y+h}"
         else: p = f"{x},{y} {x+w},{mid_y} {x},{y+h}"
-        svg.append((z_base+6, f'<polygon points="{p}" fill="none" stroke="black" stroke-width="1" />'))
+        if keep(w, LOD_SCHEMATIC):
+            svg.append((z_base+6, f'<polygon points="{p}" fill="none" stroke="black" stroke-width="1" />'))
         
         # DESSIN POIGNÉE
         hp_val = params.get('h_poignee', 0)
@@ -1779,13 +2182,14 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
         if sens == 'TG': x_h_vis = x + w - handle_offset_edge
         else: x_h_vis = x + handle_offset_edge
             
-        if hp_val > 0:
+        if hp_val > 0 and keep(75, LOD_FULL):
             draw_handle_icon(svg, x_h_vis, y_h_vis, z_index=z_base+8)
         
-        if params.get('ob', False):
+        if params.get('ob', False) and keep(h, LOD_SCHEMATIC):
             p_ob = f"{x},{y+h} {x+w},{y+h} {x+w/2},{y}"
             svg.append((z_base+6, f'<polygon points="{p_ob}" fill="none" stroke="black" stroke-width="1" />'))
-            draw_text(svg, x+w/2, y+h-30, "OB", font_size=20, fill="black", weight="bold", z_index=z_base+7)
+            if keep(20, LOD_SCHEMATIC):
+                draw_text(svg, x+w/2, y+h-30, "OB", font_size=20, fill="black", weight="bold", z_index=z_base+7)
 
     elif type_ouv == "2 Vantaux":
         w_vtl = w / 2
@@ -1825,8 +2229,9 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
         # Symboles
         p_g = f"{x},{y} {x+w_vtl},{y+h/2} {x},{y+h}"
         p_d = f"{x+w},{y} {x+w_vtl},{y+h/2} {x+w},{y+h}"
-        svg.append((z_base+6, f'<polygon points="{p_g}" fill="none" stroke="black" stroke-width="1" />'))
-        svg.append((z_base+6, f'<polygon points="{p_d}" fill="none" stroke="black" stroke-width="1" />'))
+        if keep(w_vtl, LOD_SCHEMATIC):
+            svg.append((z_base+6, f'<polygon points="{p_g}" fill="none" stroke="black" stroke-width="1" />'))
+            svg.append((z_base+6, f'<polygon points="{p_d}" fill="none" stroke="black" stroke-width="1" />'))
         
         is_princ_right = (params.get('principal', 'D') == 'D')
         
@@ -1847,7 +2252,7 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
             # Its right stile is vis_middle (35). Center is 17.5 from edge.
             x_h_vis = (x + w_vtl) - 17.5
             
-        if hp_val > 0:
+        if hp_val > 0 and keep(75, LOD_FULL):
             draw_handle_icon(svg, x_h_vis, y_h_vis, z_index=z_base+8)
             
             # HANDLE ON SECONDARY SASH (VS) - Symmetric
@@ -1865,24 +2270,29 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
         txt_g = "VS" if is_princ_right else "VP"
         txt_d = "VP" if is_princ_right else "VS"
         
-        draw_text(svg, x+w_vtl/2, y+h/2, txt_g, font_size=30, fill="#335c85", weight="bold", z_index=z_base+7)
-        draw_text(svg, x+w_vtl+w_vtl/2, y+h/2, txt_d, font_size=30, fill="#335c85", weight="bold", z_index=z_base+7)
+        if keep(30, LOD_SCHEMATIC):
+            draw_text(svg, x+w_vtl/2, y+h/2, txt_g, font_size=30, fill="#335c85", weight="bold", z_index=z_base+7)
+            draw_text(svg, x+w_vtl+w_vtl/2, y+h/2, txt_d, font_size=30, fill="#335c85", weight="bold", z_index=z_base+7)
 
-        if params.get('ob', False):
+        if params.get('ob', False) and keep(h, LOD_SCHEMATIC):
             ox, oy, ow, oh = (x+w_vtl, y, w_vtl, h) if is_princ_right else (x, y, w_vtl, h)
             p_ob = f"{ox},{oy+oh} {ox+ow},{oy+oh} {ox+ow/2},{oy}"
             svg.append((z_base+6, f'<polygon points="{p_ob}" fill="none" stroke="black" stroke-width="1" />'))
-            draw_text(svg, ox+ow/2, oy+oh-30, "OB", font_size=20, fill="black", weight="bold", z_index=z_base+8)
+            if keep(20, LOD_SCHEMATIC):
+                draw_text(svg, ox+ow/2, oy+oh-30, "OB", font_size=20, fill="black", weight="bold", z_index=z_base+8)
 
     elif type_ouv == "Soufflet":
         adj = 24
         draw_rect(svg, x+adj, y+adj, w-2*adj, h-2*adj, c_frame, "black", 1, z_base)
         draw_leaf_interior(x+vis_ouvrant, y+vis_ouvrant, w-2*vis_ouvrant, h-2*vis_ouvrant)
-        draw_text(svg, x+w/2, y+h/2, "S", font_size=40, fill="#335c85", weight="bold", z_index=z_base+5)
+        if keep(40, LOD_SCHEMATIC):
+            draw_text(svg, x+w/2, y+h/2, "S", font_size=40, fill="#335c85", weight="bold", z_index=z_base+5)
         
         p_ob = f"{x},{y+h} {x+w},{y+h} {x+w/2},{y}"
-        svg.append((z_base+6, f'<polygon points="{p_ob}" fill="none" stroke="black" stroke-width="1" />'))
-        draw_text(svg, x+w/2, y+h-30, "OB", font_size=20, fill="black", weight="bold", z_index=z_base+7)
+        if keep(h, LOD_SCHEMATIC):
+            svg.append((z_base+6, f'<polygon points="{p_ob}" fill="none" stroke="black" stroke-width="1" />'))
+        if keep(20, LOD_SCHEMATIC):
+            draw_text(svg, x+w/2, y+h-30, "OB", font_size=20, fill="black", weight="bold", z_index=z_base+7)
         
         # HANDLE FOR SOUFFLET: Top Center
         # Top Rail center:
@@ -1893,7 +2303,8 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
         h_soufflet_y = y + 39.5
         
         # User wants Horizontal, Tail to the Right.
-        draw_handle_icon(svg, h_soufflet_x, h_soufflet_y, z_index=z_base+8, rotation=-90)
+        if keep(75, LOD_FULL):
+            draw_handle_icon(svg, h_soufflet_x, h_soufflet_y, z_index=z_base+8, rotation=-90)
          
     elif type_ouv == "Coulissant":
         # Dimensions standard
@@ -1936,37 +2347,39 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
         txt_d = "VP" if is_princ_right else "VS"
         
         # Z-Index Textes : au dessus des deux (z_base+10)
-        draw_text(svg, x+w_vtl/2, text_y, txt_g, font_size=30, fill="#335c85", weight="bold", z_index=z_base+10)
-        draw_text(svg, x+w/2-25+w_vtl/2, text_y, txt_d, font_size=30, fill="#335c85", weight="bold", z_index=z_base+10)
+        if keep(30, LOD_SCHEMATIC):
+            draw_text(svg, x+w_vtl/2, text_y, txt_g, font_size=30, fill="#335c85", weight="bold", z_index=z_base+10)
+            draw_text(svg, x+w/2-25+w_vtl/2, text_y, txt_d, font_size=30, fill="#335c85", weight="bold", z_index=z_base+10)
 
         # Flèches de refoulement (Indiquent l'ouverture)
         # Vantail Gauche s'ouvre vers la Droite (->)
         # Vantail Droit s'ouvre vers la Gauche (<-)
         # On les dessine en dessous du texte.
         
-        # Flèche Gauche (->)
-        x1_g = x + vis_ouvrant + 30
-        x2_g = x + w_vtl - vis_ouvrant - 30
+        if keep(20, LOD_SCHEMATIC):
+            # Flèche Gauche (->)
+            x1_g = x + vis_ouvrant + 30
+            x2_g = x + w_vtl - vis_ouvrant - 30
         
-        # Line
-        svg.append((z_base+10, f'<line x1="{x1_g}" y1="{arrow_y}" x2="{x2_g}" y2="{arrow_y}" stroke="#335c85" stroke-width="3" />'))
+            # Line
+            svg.append((z_base+10, f'<line x1="{x1_g}" y1="{arrow_y}" x2="{x2_g}" y2="{arrow_y}" stroke="#335c85" stroke-width="3" />'))
         
-        # Manual Arrow Head (Right)
-        # Tip at x2_g, arrow_y
-        p_arrow_g = f"{x2_g},{arrow_y} {x2_g-30},{arrow_y-10} {x2_g-30},{arrow_y+10}"
-        svg.append((z_base+10, f'<polygon points="{p_arrow_g}" fill="#335c85" />'))
+            # Manual Arrow Head (Right)
+            # Tip at x2_g, arrow_y
+            p_arrow_g = f"{x2_g},{arrow_y} {x2_g-30},{arrow_y-10} {x2_g-30},{arrow_y+10}"
+            svg.append((z_base+10, f'<polygon points="{p_arrow_g}" fill="#335c85" />'))
         
-        # Flèche Droite (<-)
-        x1_d = x + w - vis_ouvrant - 30
-        x2_d = x + w/2 - 25 + vis_ouvrant + 30
+            # Flèche Droite (<-)
+            x1_d = x + w - vis_ouvrant - 30
+            x2_d = x + w/2 - 25 + vis_ouvrant + 30
         
-        # Line
-        svg.append((z_base+10, f'<line x1="{x1_d}" y1="{arrow_y}" x2="{x2_d}" y2="{arrow_y}" stroke="#335c85" stroke-width="3" />'))
+            # Line
+            svg.append((z_base+10, f'<line x1="{x1_d}" y1="{arrow_y}" x2="{x2_d}" y2="{arrow_y}" stroke="#335c85" stroke-width="3" />'))
         
-        # Manual Arrow Head (Left)
-        # Tip at x2_d, arrow_y
-        p_arrow_d = f"{x2_d},{arrow_y} {x2_d+30},{arrow_y-10} {x2_d+30},{arrow_y+10}"
-        svg.append((z_base+10, f'<polygon points="{p_arrow_d}" fill="#335c85" />'))
+            # Manual Arrow Head (Left)
+            # Tip at x2_d, arrow_y
+            p_arrow_d = f"{x2_d},{arrow_y} {x2_d+30},{arrow_y-10} {x2_d+30},{arrow_y+10}"
+            svg.append((z_base+10, f'<polygon points="{p_arrow_d}" fill="#335c85" />'))
         
         # HANDLES FOR COULISSANT
         # Centered vertically (roughly) or at HP.
@@ -1985,17 +2398,18 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
 
         # Handle Left Sash (on its Left Stile - Jamb Side)
         # Offset from Left Edge = 39.5mm (Dormant 24 + Half Sash 15.5)
-        x_h_c_left = x + 39.5
-        draw_handle_icon(svg, x_h_c_left, y_handle_c, z_index=z_base+12)
-        
-        # Handle Right Sash (on its Right Stile - Jamb Side)
-        # Offset from Right Edge = 39.5mm
-        x_h_c_right = (x + w) - 39.5
-        draw_handle_icon(svg, x_h_c_right, y_handle_c, z_index=z_base+12)
+        if keep(75, LOD_FULL):
+            x_h_c_left = x + 39.5
+            draw_handle_icon(svg, x_h_c_left, y_handle_c, z_index=z_base+12)
+            
+            # Handle Right Sash (on its Right Stile - Jamb Side)
+            # Offset from Right Edge = 39.5mm
+            x_h_c_right = (x + w) - 39.5
+            draw_handle_icon(svg, x_h_c_right, y_handle_c, z_index=z_base+12)
 
     # GRILLE D'AÉRATION - V73 FIX
     pos_grille = params.get('pos_grille', 'Aucune')
-    if pos_grille != "Aucune":
+    if pos_grille != "Aucune" and keep(12, LOD_SCHEMATIC):
         gx, gy = 0, 0
         
         # FIXED: Center logic
@@ -2058,9 +2472,10 @@ def draw_sash_content(svg, x, y, w, h, type_ouv, params, config_global, z_base=1
             gy = y + (vis_ouvrant - 12) / 2
 
         draw_rect(svg, gx, gy, 250, 12, "#eeeeee", "black", 1, z_base+8)
-        for k in range(1, 10):
-            lx = gx + (250/10)*k
-            svg.append((z_base+8, f'<line x1="{lx}" y1="{gy}" x2="{lx}" y2="{gy+12}" stroke="black" stroke-width="0.5" />'))
+        if keep(250/10, LOD_FULL):
+            for k in range(1, 10):
+                lx = gx + (250/10)*k
+                svg.append((z_base+8, f'<line x1="{lx}" y1="{gy}" x2="{lx}" y2="{gy+12}" stroke="black" stroke-width="0.5" />'))
 
 
 
@@ -2148,50 +2563,40 @@ PROFILES_DB = {
     }
 }
 
-def calc_developpe(type_p, inputs):
-    """Calculates developed length (raw material width)."""
+# --- MOTEUR GÉOMÉTRIE PLIAGE (CACHE) ---
+# Les cotes saisies sont des cotes extérieures. Rayon intérieur de pliage = épaisseur
+# (presse plieuse standard), fibre neutre placée par le facteur K.
+# st.cache_data plutôt que lru_cache : le script est ré-exécuté à chaque rerun.
+BEND_K_FACTOR = 0.33
+BEND_MAX_ANGLE = 170 # Au-delà (ourlet écrasé) la formule de retrait diverge
+CUSTOM_SEG_FIELDS = ('angle_type', 'val_L', 'val_H')
+
+def parse_epaisseur_mm(epaisseur):
+    """'15/10ème (1,5 mm)' -> 1.5. Accepte aussi un nombre. 0.0 si illisible."""
+    if isinstance(epaisseur, (int, float)):
+        return float(epaisseur)
+    try:
+        return float(str(epaisseur).split('(')[1].split('mm')[0].replace(',', '.').strip())
+    except (IndexError, ValueError):
+        return 0.0
+
+def get_profile_dims_key(type_p, inputs, state=None):
+    """Clé hashable des cotes utiles d'un profil (clé du cache géométrie)."""
     if type_p == "m11":
-        segs = st.session_state.get('custom_segments', [])
-        total = 0
-        if not segs: return 100 # Default
-        
-        # Seg 0 is always Flat -> Length
-        total += segs[0].get('val_L', 0)
-        
-        for s in segs[1:]:
-             atype = s.get('angle_type', '90')
-             if atype in ['90', '45', '135', '180']:
-                 total += s.get('val_L', 0)
-             else:
-                 # Custom: L and H
-                 l = s.get('val_L', 0)
-                 h = s.get('val_H', 0)
-                 total += math.sqrt(l*l + h*h)
-        return total
-
-    # Existing logic for fixed profiles (fallback)
-    # Quick sum of all single-letter params
-    keys = [k for k in inputs if len(k)==1 and k.isupper()]
-    total = sum([inputs.get(k, 0) for k in keys])
-    return total
-
-def generate_profile_svg(type_p, inputs, length, color_name):
-    w_svg, h_svg = 700, 500
-    
-    colors = {
-        "Blanc 9016": "#FFFFFF",
-        "Gris 7016": "#383E42",
-        "Noir 9005": "#000000",
-        "Chêne Doré": "#C6930A",
-        "Autre": "#999999"
-    }
-    fill_col = colors.get(color_name, "#CCCCCC")
-    
+        segs = (st.session_state if state is None else state).get('custom_segments', [])
+        return tuple(tuple(s.get(f) for f in CUSTOM_SEG_FIELDS) for s in segs)
+    prof = PROFILES_DB.get(type_p, {})
+    defaults = prof.get("defaults", {})
+    return tuple((k, inputs.get(k, defaults.get(k, 0))) for k in prof.get("params", []))
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def compute_profile_vertices(type_p, dims_key):
+    """Vertex array du profil (mm, Y vers le bas), calculé une fois par jeu de cotes."""
     points = [(0,0)] # Start at origin
 
     # CUSTOM MODEL LOGIC (M11)
     if type_p == "m11":
-        segs = st.session_state.get('custom_segments', [])
+        segs = [{k: v for k, v in zip(CUSTOM_SEG_FIELDS, s) if v is not None} for s in dims_key]
         if not segs:
             # Default Start if no segments defined
             points.append((100, 0))
@@ -2264,6 +2669,7 @@ def generate_profile_svg(type_p, inputs, length, color_name):
         points = [] 
         
         # Load params
+        inputs = dict(dims_key)
         defaults = PROFILES_DB[type_p]["defaults"]
         P = lambda k: inputs.get(k, defaults.get(k, 0))
         
@@ -2459,6 +2865,82 @@ def generate_profile_svg(type_p, inputs, length, color_name):
             # Fallback
             points = [(0,0), (100,0), (100,100)]
 
+    return tuple((float(p[0]), float(p[1])) for p in points)
+
+def _bend_deduction(angle_deg, thickness_mm):
+    """Retrait de pliage (mm) pour un pli de angle_deg (déviation) sur cotes extérieures."""
+    t = thickness_mm
+    r = t
+    theta = math.radians(min(angle_deg, BEND_MAX_ANGLE))
+    setback = (r + t) * math.tan(theta / 2)
+    allowance = theta * (r + BEND_K_FACTOR * t)
+    return 2 * setback - allowance
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def compute_profile_geometry(type_p, dims_key, thickness_mm=0.0):
+    """Géométrie de pliage mémoïsée par (modèle, cotes, épaisseur).
+
+    Retourne un dict : points, longueurs de segments, angles de pli,
+    développé brut (somme des cotes) et développé réel (retraits de pliage déduits).
+    """
+    points = compute_profile_vertices(type_p, dims_key)
+    segments = []
+    directions = []
+    for p1, p2 in zip(points, points[1:]):
+        dx = p2[0] - p1[0]; dy = p2[1] - p1[1]
+        l = math.hypot(dx, dy)
+        segments.append(l)
+        if l > 0:
+            directions.append((dx / l, dy / l))
+
+    bends = []
+    for d1, d2 in zip(directions, directions[1:]):
+        cross = d1[0] * d2[1] - d1[1] * d2[0]
+        dot = d1[0] * d2[0] + d1[1] * d2[1]
+        ang = abs(math.degrees(math.atan2(cross, dot)))
+        if ang > 0.5:
+            bends.append(ang)
+
+    brut = sum(segments)
+    deduction = sum(_bend_deduction(a, thickness_mm) for a in bends) if thickness_mm > 0 else 0
+    return {
+        "points": points,
+        "segments": tuple(segments),
+        "bends": tuple(bends),
+        "developpe_brut": round(brut, 1),
+        "developpe": round(max(0.0, brut - deduction), 1),
+    }
+
+def calc_developpe(type_p, inputs, epaisseur=None, state=None):
+    """Calculates developed length (raw material width).
+
+    Sans épaisseur : somme des cotes. Avec épaisseur : retraits de pliage déduits.
+    """
+    geo = compute_profile_geometry(type_p, get_profile_dims_key(type_p, inputs, state), parse_epaisseur_mm(epaisseur))
+    return geo["developpe"]
+
+def generate_profile_svg(type_p, inputs, length, color_name, lod=LOD_FULL, target_px=None, state=None):
+    return _render_profile_svg(type_p, get_profile_dims_key(type_p, inputs, state), length, color_name, lod, target_px)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _render_profile_svg(type_p, dims_key, length, color_name, lod=LOD_FULL, target_px=None):
+    w_svg, h_svg = 700, 500
+    px_per_unit = (target_px / w_svg) if target_px else None
+    def keep(size, level):
+        return lod_keep(size, level, lod, px_per_unit)
+    
+    colors = {
+        "Blanc 9016": "#FFFFFF",
+        "Gris 7016": "#383E42",
+        "Noir 9005": "#000000",
+        "Chêne Doré": "#C6930A",
+        "Autre": "#999999"
+    }
+    fill_col = colors.get(color_name, "#CCCCCC")
+    
+    # Points issus du moteur de pliage (mêmes arrays que le développé)
+    points = list(compute_profile_vertices(type_p, dims_key))
+
     # Normalize coordinates to fit in View
     xs = [p[0] for p in points]
     ys = [p[1] for p in points]
@@ -2514,13 +2996,16 @@ def generate_profile_svg(type_p, inputs, length, color_name):
     # DRAW SVG
     svg_els = []
     style_line = f'stroke="black" stroke-width="2" fill="none"'
-    path_back = "M " + " L ".join([f"{p[0]},{p[1]}" for p in back_points])
-    svg_els.append(f'<path d="{path_back}" stroke="#999" stroke-width="1" fill="none" stroke-dasharray="4,4" />')
-    
-    for p1, p2 in zip(scaled_points, back_points):
-        svg_els.append(f'<line x1="{p1[0]}" y1="{p1[1]}" x2="{p2[0]}" y2="{p2[1]}" stroke="#555" stroke-width="1" />')
+    # Face arrière + arêtes : perspective (schematic) ; libellés : fiche complète (full)
+    if keep(depth_x, LOD_SCHEMATIC):
+        path_back = "M " + " L ".join([f"{p[0]},{p[1]}" for p in back_points])
+        svg_els.append(f'<path d="{path_back}" stroke="#999" stroke-width="1" fill="none" stroke-dasharray="4,4" />')
+        
+        for p1, p2 in zip(scaled_points, back_points):
+            svg_els.append(f'<line x1="{p1[0]}" y1="{p1[1]}" x2="{p2[0]}" y2="{p2[1]}" stroke="#555" stroke-width="1" />')
     
-    if len(scaled_points) > 0:
+    show_labels = keep(14, LOD_FULL)
+    if len(scaled_points) > 0 and show_labels:
         p_front = scaled_points[0]
         p_back = back_points[0]
         t = 0.8
@@ -2539,7 +3024,7 @@ def generate_profile_svg(type_p, inputs, length, color_name):
     else:
         cx, cy = 0, 0
 
-    for i in range(len(scaled_points)-1):
+    for i in range(len(scaled_points)-1 if show_labels else 0):
         p1 = scaled_points[i]; p2 = scaled_points[i+1]
         mx = (p1[0]+p2[0])/2; my = (p1[1]+p2[1])/2
         dx = p2[0]-p1[0]; dy = p2[1]-p1[1]
@@ -2585,7 +3070,7 @@ def generate_profile_svg(type_p, inputs, length, color_name):
 
     # Face Labels
     max_len = -1; best_idx = 0
-    if len(scaled_points) > 1:
+    if len(scaled_points) > 1 and show_labels:
         for i in range(len(scaled_points)-1):
             p1=scaled_points[i]; p2=scaled_points[i+1]
             l = math.sqrt((p2[0]-p1[0])**2 + (p2[1]-p1[1])**2)
@@ -2609,91 +3094,22 @@ def generate_profile_svg(type_p, inputs, length, color_name):
     final_svg += '</svg>'
     return final_svg
 
-def render_html_habillage(cfg, svg_string, logo_b64, dev_val, schema_b64):
+def render_html_habillage(cfg, svg_string, logo_src, dev_val, schema_b64, stylesheet_href=None,
+                          state=None, schema_src=None, auto_print=True):
+    state = fiche_templates.StateView(st.session_state if state is None else state)
     # Pre-calc Observations
     obs_hab_html = ""
-    if st.session_state.get('hab_obs'):
+    if state.get('hab_obs'):
         obs_hab_html = f"""
             <div class="section-block">
                 <h3>Observations</h3>
                 <div class="panel">
-                    <div class="panel-row" style="display:block; min-height:auto; padding:10px;"><span class="val" style="text-align:left; width:100%; white-space: pre-wrap;">{st.session_state.get('hab_obs')}</span></div>
+                    <div class="panel-row" style="display:block; min-height:auto; padding:10px;"><span class="val" style="text-align:left; width:100%; white-space: pre-wrap;">{state.get('hab_obs')}</span></div>
                 </div>
             </div>
         """
     """HTML generation for Habillage printing (Single Page, Compact, Logo Header)."""
     
-    css = """
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
-        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
-        
-        .page-container { 
-            max-width: 210mm; 
-            margin: 0 auto; 
-            padding: 20px;
-        }
-
-        /* HEADER */
-        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
-        .header-left img { max-height: 70px; width: auto; }
-        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
-        
-        .header-right { text-align: right; padding-right: 5px; }
-        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
-        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
-        .header-right .date { font-size: 11px; color: #666; }
-
-        /* GRID LAYOUT */
-        .grid-container { display: grid; grid-template-columns: 35% 60%; gap: 5%; margin-bottom: 20px; }
-        
-        /* HEADINGS */
-        h3 { 
-            font-size: 14px; color: #2c3e50; margin: 0 0 10px 0; 
-            border-left: 4px solid #3498db; padding-left: 8px; 
-            line-height: 1.2;
-        }
-        
-        /* PANELS */
-        .panel { background: #f9f9f9; padding: 10px; border-radius: 4px; font-size: 12px; }
-        .panel-row { display: flex; justify-content: space-between; padding: 4px 0; border-bottom: 1px solid #eee; }
-        .panel-row:last-child { border-bottom: none; }
-        .panel-row .lbl { font-weight: bold; color: #555; }
-        .panel-row .val { font-weight: normal; color: #000; text-align: right; }
-        
-        .schema-box { 
-            border: 1px solid #eee; border-radius: 4px; padding: 5px; 
-            text-align: center; height: 160px; display: flex; align-items: center; justify-content: center;
-            margin-bottom: 15px;
-        }
-        .schema-box img { max-width: 100%; max-height: 100%; object-fit: contain; }
-        
-        .visual-box {
-            border: 1px solid #eee; border-radius: 4px; height: 280px;
-            display: flex; flex-direction: column; align-items: center; justify-content: center;
-            position: relative;
-        }
-        .visual-box svg { max-height: 250px; width: auto; max-width: 95%; }
-        
-        /* TABLE DETAILS */
-        table { width: 100%; border-collapse: collapse; font-size: 11px; margin-top: 10px; }
-        th { background: #2c3e50; color: white; padding: 6px; text-align: left; text-transform: uppercase; font-size: 10px; }
-        td { border-bottom: 1px solid #eee; padding: 6px; color: #444; }
-        tr:nth-child(even) { background-color: #f8f9fa; }
-        
-        .footer { 
-            margin-top: 25px; border-top: 1px solid #eee; padding-top: 10px; 
-            font-size: 9px; color: #999; text-align: center; 
-        }
-
-        @media print {
-            @page { size: A4; margin: 5mm; }
-            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
-            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; transform: scale(0.95); transform-origin: top center; }
-            .no-print { display: none; }
-        }
-    </style>
-    """
     
     # Precompute
     import datetime
@@ -2711,103 +3127,27 @@ def render_html_habillage(cfg, svg_string, logo_b64, dev_val, schema_b64):
 
     # Schema Image HTML
     schema_html = ""
-    if schema_b64:
+    if schema_src:
+        schema_html = f'<img src="{schema_src}">'
+    elif schema_b64:
         schema_html = f'<img src="data:image/jpeg;base64,{schema_b64}">'
     else:
         schema_html = '<span style="color:#ccc;">Aucune image</span>'
 
     # Logo HTML (Replaces Title)
     logo_html = f"<h1>Fiche Technique</h1>"
-    if logo_b64:
-        logo_html = f'<img src="data:image/jpeg;base64,{logo_b64}" alt="Logo">'
-
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>{css}</head>
-    <body>
-        <div class="page-container">
-            <!-- HEADER -->
-            <div class="header">
-                <div class="header-left">
-                    {logo_html}
-                    <div class="subtitle">{prof_name}</div>
-                </div>
-                <div class="header-right">
-                    <div class="label">RÉFÉRENCE CHANTIER</div>
-                    <div class="ref">{cfg['ref']}</div>
-                    <div class="date">{datetime.datetime.now().strftime('%d/%m/%Y')}</div>
-                </div>
-            </div>
-            
-            <!-- MAIN GRID -->
-            <div class="grid-container">
-                <!-- LEFT COLUMN -->
-                <div>
-                    <h3>Schéma de Principe</h3>
-                    <div class="schema-box">
-                        {schema_html}
-                    </div>
-                    
-                    <h3>Caractéristiques</h3>
-                    <div class="panel">
-                        <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{cfg['qte']}</span></div>
-                        <div class="panel-row"><span class="lbl">Longueur</span> <span class="val">{cfg['length']} mm</span></div>
-                        <div class="panel-row"><span class="lbl">Développé</span> <span class="val">{int(dev_val)} mm</span></div>
-                        <div class="panel-row"><span class="lbl">Matière</span> <span class="val">{cfg['finition']}</span></div>
-                        <div class="panel-row"><span class="lbl">Couleur</span> <span class="val">{cfg['couleur']}</span></div>
-                        <div class="panel-row"><span class="lbl">Épaisseur</span> <span class="val">{cfg['epaisseur']}</span></div>
-                        
-                        <div style="margin-top:10px; padding-top:10px; border-top:1px solid #ddd;">
-                            <span class="lbl">Dimensions :</span> <br>
-                            <span style="font-family:monospace; color:#333;">{dim_str_display}</span>
-                        </div>
-                    </div>
-                </div>
-                
-                <!-- RIGHT COLUMN -->
-                <div>
-                    <h3>Visualisation 3D</h3>
-                    <div class="visual-box">
-                        {svg_string}
-                        <div style="position:absolute; bottom:10px; font-size:10px; color:#aaa;">Vue filaire indicative</div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- OBSERVATIONS -->
-            <!-- OBSERVATIONS -->
-            {obs_hab_html}
-            
-            <!-- FOOTER TABLE -->
-            <h3>Détails de Commande</h3>
-            <table>
-                <thead>
-                    <tr><th>Libellé</th><th style="text-align:right;">Valeur</th></tr>
-                </thead>
-                <tbody>
-                    <tr><td>Référence</td><td style="text-align:right;">{cfg['ref']}</td></tr>
-                    <tr><td>Modèle</td><td style="text-align:right;">{prof_name}</td></tr>
-                    <tr><td>Quantité</td><td style="text-align:right;">{cfg['qte']}</td></tr>
-                    <tr><td>Dimensions</td><td style="text-align:right;">{dim_str_display}</td></tr>
-                    <tr><td>Longueur</td><td style="text-align:right;">{cfg['length']} mm</td></tr>
-                    <tr><td>Développé</td><td style="text-align:right;">{int(dev_val)} mm</td></tr>
-                    <tr><td>Surface Totale</td><td style="text-align:right;">{surface:.2f} m²</td></tr>
-                </tbody>
-            </table>
-            
-            <div class="footer">
-                Document généré automatiquement - Miroiterie Yerroise<br>
-                Merci de vérifier les cotes avant validation définitive.
-            </div>
-        </div>
-        <script>
-            setTimeout(() => {{ window.print(); }}, 800);
-        </script>
-    </body>
-    </html>
-    """
-    return html
+    if logo_src:
+        logo_html = f'<img src="{logo_src}" alt="Logo">'
+
+    # Gabarit compilé (fiche_templates) : CSS et mise en page ne sont plus reconstruits à chaque appel
+    values = {
+        'logo': logo_html, 'date': datetime.datetime.now().strftime('%d/%m/%Y'), 'profile': prof_name, 'ref': cfg['ref'],
+        'schema': schema_html, 'qte': cfg['qte'], 'length': cfg['length'], 'dev': int(dev_val),
+        'finition': cfg['finition'], 'couleur': cfg['couleur'], 'epaisseur': cfg['epaisseur'],
+        'dims': dim_str_display, 'surface': f"{surface:.2f}", 'svg': svg_string, 'observations': obs_hab_html,
+        'print_script': fiche_templates.AUTO_PRINT_SCRIPT if auto_print else "",
+    }
+    return fiche_templates.render_fiche('habillage', values, state, stylesheet_href)
 
 def get_html_download_link(content_html, filename, label):
     import base64
@@ -2819,7 +3159,7 @@ def render_habillage_main_ui(cfg):
     prof = cfg['prof']
     st.header(f"🧱 {prof['name']}") 
     
-    dev = calc_developpe(cfg['key'], cfg['inputs'])
+    dev = calc_developpe(cfg['key'], cfg['inputs'], cfg['epaisseur'])
     
     c1, c2 = st.columns([2, 3])
     
@@ -2836,12 +3176,15 @@ def render_habillage_main_ui(cfg):
     
     with c1:
         st.subheader("Schéma de Principe")
-        image_path = os.path.join(ARTIFACT_DIR, prof['image_key'])
-        if os.path.exists(image_path):
-            st.image(image_path, use_container_width=True)
+        schema = get_schema_asset(prof['image_key'], 'ecran')
+        if schema:
+            # URL statique (cache navigateur) ou URI data: préparée : pas de lecture disque par rerun.
+            # st.image ne reconnaît que la forme absolue "/app/static/..." (Streamlit >= 1.56 ;
+            # requirements.txt exige 1.58, avant quoi la chaîne est lue comme un chemin de fichier)
+            src = get_asset_src(schema)
+            st.image(src if src.startswith("data:") else "/" + src, use_container_width=True)
         else:
             st.warning(f"Image non trouvée: {prof['image_key']}")
-            st.caption(f"Chemin cherché: {image_path}") # Debug helper
 
         st.markdown("---")
         st.subheader("Informations Clés")
@@ -2856,11 +3199,7 @@ def render_habillage_main_ui(cfg):
     with c2:
         st.subheader("Visualisation 3D")
         svg = generate_profile_svg(cfg['key'], cfg['inputs'], cfg['length'], cfg['couleur'])
-        st.markdown(f'''
-        <div style="border: 1px solid #ddd; border-radius: 5px; padding: 10px; background-color: white; text-align: center;">
-            {svg}
-        </div>
-        ''', unsafe_allow_html=True)
+        render_svg_preview(svg, key="svg_preview_habillage", height=460)
         st.caption("Vue filaire 3D indicative.")
         
         st.download_button("🖼️ Télécharger SVG", svg, f"profil_{cfg['ref']}.svg", "image/svg+xml")
@@ -2868,29 +3207,17 @@ def render_habillage_main_ui(cfg):
     # --- PRINT BUTTON (HTML) ---
     st.markdown("---")
     if st.button("🖨️ Imprimer", key="btn_print_hab"):
-        # Import helper (or define it in app.py)
-        # For simplicity, we inline the logic or assume the function is pasted in app.py
-        # Since I wrote it to a separate file, I should read it or paste it. 
-        # But wait, I can just define it inside app.py for simplicity as requested by user constraints (single file preference?)
-        # Let's assume I actually put `render_html_habillage` IN app.py in a previous step or will do it now.
-        # I'll put the function definition at the top of app.py or near render_html_template.
-        
-        # Prepare Schema B64 (Restored)
-        schema_b64 = ""
-        img_p = os.path.join(ARTIFACT_DIR, prof['image_key'])
-        if os.path.exists(img_p):
-             import base64
-             with open(img_p, "rb") as f:
-                 schema_b64 = base64.b64encode(f.read()).decode()
+        # Schéma servi par URL comme le logo (repli : URI data:)
+        schema_src = None
+        schema = get_schema_asset(prof['image_key'], 'fiche')
+        if schema:
+             schema_src = get_asset_src(schema)
 
         st.session_state['print_ts_hab'] = datetime.datetime.now().isoformat()
         
         # Pass SVG, Logo (Global), Dev, and Schema
-        html_content = render_html_habillage(cfg, svg, LOGO_B64, dev, schema_b64)
-        html_content += f"<!-- TS: {st.session_state['print_ts_hab']} -->"
-        
-        import streamlit.components.v1 as components
-        components.html(html_content, height=0, width=0)
+        html_content = render_html_habillage(cfg, svg, get_logo_src(), dev, "", schema_src=schema_src)
+        open_print_document(html_content)
         st.info(f"Impression lancée... ({st.session_state['print_ts_hab'].split('T')[1][:8]})")
 
     st.subheader("Récapitulatif (Habillage)")
@@ -3417,7 +3744,7 @@ def render_menuiserie_form():
     import streamlit.components.v1 as components
     
     def render_3d_menuiserie(width_mm, height_mm, depth_mm=70, frame_color="#ffffff", glass_color="#aaddff", zones=[], 
-                             wall_depth=340, ext_reveal_w=0, ext_reveal_h=0, overlap=30, allege_mm=0):
+                             wall_depth=340, ext_reveal_w=0, ext_reveal_h=0, overlap=30, allege_mm=0, high_quality=False):
         """
         Renders a 3D visualization.
         FEATURES:
@@ -3425,26 +3752,28 @@ def render_menuiserie_form():
         - Strict Z-Layering
         - Allège (Sill Height) Support: Generates separate Floor and Wall extension.
         - Sash logic: ensure adjacent sashes form a mullion.
+        La géométrie est calculée côté serveur (scene_mesh.py, NumPy) et mise en cache par
+        empreinte de la configuration : le navigateur reçoit des tampons prêts pour le GPU.
+        Rendu à la demande (mouvement de caméra, redimensionnement) : une vue immobile ne
+        consomme rien. high_quality active ombres, lissage et pleine densité de pixels.
         """
+        import scene_mesh
         
         if ext_reveal_w <= 0: ext_reveal_w = width_mm - (2 * overlap)
         if ext_reveal_h <= 0: ext_reveal_h = height_mm - overlap 
         
-        # JSON data
+        # JSON data (couleurs) + tampons du maillage (JSON base64, déjà sérialisé dans le cache)
         data_json = json.dumps({
-            "width": width_mm,
-            "height": height_mm,
-            "depth": depth_mm,
             "color": frame_color,
             "glassColor": glass_color,
-            "zones": zones,
-            "wallDepth": wall_depth,
-            "revealW": ext_reveal_w,
-            "revealH": ext_reveal_h,
-            "overlap": overlap,
-            "allege": allege_mm
+            "highQuality": bool(high_quality),
         })
+        mesh_json = scene_mesh.cached_payload(scene_mesh.scene_params(
+            width_mm, height_mm, depth_mm, zones, wall_depth, ext_reveal_w, ext_reveal_h, allege_mm))
     
+        # three.js local (vendor_assets.py) : URL empreintée servie par Streamlit
+        three_import_map = json.dumps({"imports": get_three_modules()})
+
         html_code = f"""
         <!DOCTYPE html>
         <html lang="en">
@@ -3470,21 +3799,17 @@ def render_menuiserie_form():
                 }};
             </script>
             <script type="importmap">
-                {{
-                    "imports": {{
-                        "three": "https://unpkg.com/three@0.128.0/build/three.module.js",
-                        "three/examples/jsm/controls/OrbitControls": "https://unpkg.com/three@0.128.0/examples/jsm/controls/OrbitControls.js"
-                    }}
-                }}
+                {three_import_map}
             </script>
         </head>
         <body>
             <div id="err"></div>
-            <div id="info">Visualisation 3D (Configuration & Details) - v{datetime.datetime.now().strftime('%H:%M:%S')}</div>
+            <div id="info">Visualisation 3D (Configuration & Details)</div>
             
             <script type="application/json" id="3d-data">
                 {data_json}
             </script>
+            <script type="application/json" id="3d-mesh">{mesh_json}</script>
     
             <script type="module">
                 import * as THREE from 'three';
@@ -3501,10 +3826,15 @@ def render_menuiserie_form():
                     const camera = new THREE.PerspectiveCamera(45, window.innerWidth / window.innerHeight, 0.1, 100000);
                     camera.position.set(0, 1500, 6000);
                     
-                    const renderer = new THREE.WebGLRenderer({{ antialias: true, alpha: true }});
+                    const hq = !!data.highQuality;
+                    // Rendu des couleurs identique à three r128 (gestion des espaces colorimétriques désactivée)
+                    THREE.ColorManagement.enabled = false;
+                    const renderer = new THREE.WebGLRenderer({{ antialias: hq, alpha: true }});
+                    renderer.outputColorSpace = THREE.LinearSRGBColorSpace;
+                    renderer.setPixelRatio(hq ? window.devicePixelRatio : 1);
                     renderer.setSize(window.innerWidth, window.innerHeight);
-                    renderer.shadowMap.enabled = true;
-                    renderer.shadowMap.type = THREE.PCFSoftShadowMap; 
+                    renderer.shadowMap.enabled = hq;
+                    renderer.shadowMap.type = THREE.PCFSoftShadowMap;
                     document.body.appendChild(renderer.domElement);
                     
                     const controls = new OrbitControls(camera, renderer.domElement);
@@ -3516,7 +3846,7 @@ def render_menuiserie_form():
                     
                     const sunLight = new THREE.DirectionalLight(0xffffff, 0.8);
                     sunLight.position.set(1000, 2000, 2000);
-                    sunLight.castShadow = true;
+                    sunLight.castShadow = hq;
                     scene.add(sunLight);
                      
                     const backLight = new THREE.DirectionalLight(0xffffff, 0.3);
@@ -3541,306 +3871,52 @@ def render_menuiserie_form():
                     const bavetteMat = new THREE.MeshStandardMaterial({{ color: 0xffffff, roughness: 0.3, metalness: 0.1, side: THREE.DoubleSide, transparent: false, depthWrite: true }});
                     const floorMat = new THREE.MeshStandardMaterial({{ color: colorFloor, roughness: 0.8, transparent: false, depthWrite: true }});
     
-                    const rootGroup = new THREE.Group();
-                    scene.add(rootGroup);
-                    
-                    const fW = data.width;
-                    const fH = data.height;
-                    const fD = data.depth;       
-                    const frameW = 50;
-                    
-                    const wDepth = data.wallDepth;
-                    const holeW = data.revealW;
-                    const holeH = data.revealH;
-                    const allege = data.allege || 0;
-                    
-                    const wallCanvasW = Math.max(3000, holeW * 3);
-                    const wallCanvasH = Math.max(3000, (holeH + allege) * 2);
-    
-                    function createWallWithHole(fullW, fullH, cutW, cutH, depth, mat, shiftY) {{
-                        const shape = new THREE.Shape();
-                        shape.moveTo(-fullW/2, -fullH/2 + shiftY);
-                        shape.lineTo(-fullW/2, fullH/2 + shiftY);
-                        shape.lineTo(fullW/2, fullH/2 + shiftY);
-                        shape.lineTo(fullW/2, -fullH/2 + shiftY);
-                         shape.lineTo(-fullW/2, -fullH/2 + shiftY);
-                        
-                        const hole = new THREE.Path();
-                        hole.moveTo(-cutW/2, -cutH/2);
-                        hole.lineTo(cutW/2, -cutH/2);
-                        hole.lineTo(cutW/2, cutH/2);
-                        hole.lineTo(-cutW/2, cutH/2);
-                        hole.lineTo(-cutW/2, -cutH/2);
-                        shape.holes.push(hole);
-                        
-                        const geo = new THREE.ExtrudeGeometry(shape, {{ depth: depth, bevelEnabled: false }});
-                        const mesh = new THREE.Mesh(geo, mat);
-                        return mesh;
-                    }}
+                    const handleMat = new THREE.MeshStandardMaterial({{ color: 0xeeeeee }});
+                    const materials = {{ wall: wallExtMat, sill: sillMat, floor: floorMat, frame: frameMat, glass: glassMat,
+                                        handle: handleMat, habillage: habillageMat, bavette: bavetteMat }};
     
-                    const winTopY = holeH/2;
-                    const winBotY = -holeH/2;
-                    const rejH = 40;
-                    const frameCenterY_World = winBotY + 15 + fH/2;
-                    
-                    const floorY = winBotY - allege;
-                    const roomHeight = 3000;
-                    const wallH = roomHeight;
-                    const wallCenterY = floorY + roomHeight/2;
-                    const fullWallDepth = wDepth; 
-                    const wallStartZ = -fullWallDepth; 
-                    const wallW = Math.max(4000, holeW * 4);
-                    
-                    const unifiedWallMesh = createWallWithHole(wallW, wallH, holeW, holeH, fullWallDepth, wallExtMat, wallCenterY);
-                    unifiedWallMesh.position.set(0, 0, wallStartZ);
-                    rootGroup.add(unifiedWallMesh);
-    
-                    // --- 3-PART SILL ---
-                    const upH = 15;
-                    const sillOffset = -5;
-                    const extension = 20; 
-                    const noseH = 50; 
-                    
-                    // MIDDLE
-                    const sShapeMid = new THREE.Shape();
-                    sShapeMid.moveTo(0, upH); 
-                    sShapeMid.lineTo(-fD, upH); 
-                    sShapeMid.lineTo(-fD, 0); 
-                    sShapeMid.lineTo(-(wDepth + extension), -10); 
-                    sShapeMid.lineTo(-(wDepth + extension), -noseH); 
-                    sShapeMid.lineTo(0, -noseH); 
-                    sShapeMid.lineTo(0, upH);
-                    
-                    const sGeoMid = new THREE.ExtrudeGeometry(sShapeMid, {{ depth: fW, bevelEnabled: false }});
-                    const sMeshMid = new THREE.Mesh(sGeoMid, sillMat);
-                    sMeshMid.rotation.y = -Math.PI/2;
-                    sMeshMid.position.set(fW/2, winBotY, sillOffset);
-                    rootGroup.add(sMeshMid);
-                    
-                    // SIDES
-                    const sideW = ((holeW + 60) - fW) / 2;
-                    const sShapeSide = new THREE.Shape();
-                    sShapeSide.moveTo(0, 0); 
-                    sShapeSide.lineTo(-fD, 0); 
-                    sShapeSide.lineTo(-(wDepth + extension), -10); 
-                    sShapeSide.lineTo(-(wDepth + extension), -noseH); 
-                    sShapeSide.lineTo(0, -noseH); 
-                    sShapeSide.lineTo(0, 0);
-                    
-                    const sGeoSide = new THREE.ExtrudeGeometry(sShapeSide, {{ depth: sideW, bevelEnabled: false }});
-                    
-                    const sMeshLeft = new THREE.Mesh(sGeoSide, sillMat);
-                    sMeshLeft.rotation.y = -Math.PI/2;
-                    const sMeshLeftPos = new THREE.Mesh(sGeoSide, sillMat);
-                    sMeshLeftPos.rotation.y = -Math.PI/2;
-                    sMeshLeftPos.position.set(-fW/2, winBotY, sillOffset);
-                    rootGroup.add(sMeshLeftPos);
-                    
-                    const sMeshRightPos = new THREE.Mesh(sGeoSide, sillMat);
-                    sMeshRightPos.rotation.y = -Math.PI/2;
-                    sMeshRightPos.position.set((holeW+60)/2, winBotY, sillOffset);
-                    rootGroup.add(sMeshRightPos);
-                    
-                    // DOUBLAGE FILLER
-                    const doubGeo = new THREE.BoxGeometry(holeW + 2, 65, 5);
-                    const doubMesh = new THREE.Mesh(doubGeo, wallExtMat);
-                    doubMesh.position.set(0, winBotY - 17.5, -2.5);
-                    rootGroup.add(doubMesh);
-                    
-                    const floorGeo = new THREE.PlaneGeometry(wallW, wallW);
-                    const floorMesh = new THREE.Mesh(floorGeo, floorMat);
-                    floorMesh.rotation.x = -Math.PI/2;
-                    floorMesh.position.set(0, floorY, 0);
-                    rootGroup.add(floorMesh);
-                    
-                    const ceilGeo = new THREE.PlaneGeometry(wallW, wallW);
-                    const ceilMesh = new THREE.Mesh(ceilGeo, wallExtMat); 
-                    ceilMesh.rotation.x = Math.PI/2;
-                    ceilMesh.position.set(0, floorY + roomHeight, 0);
-                    rootGroup.add(ceilMesh);
-                    
-                    const winGroup = new THREE.Group();
-                    winGroup.position.set(0, frameCenterY_World, -fD/2);
-                    rootGroup.add(winGroup);
-    
-                    // FRAMES
-                    const fLeftMesh = new THREE.Mesh(new THREE.BoxGeometry(frameW, fH, fD), frameMat);
-                    fLeftMesh.position.set(-fW/2 + frameW/2, 0, 0);
-                    winGroup.add(fLeftMesh);
-                    const fRightMesh = new THREE.Mesh(new THREE.BoxGeometry(frameW, fH, fD), frameMat);
-                    fRightMesh.position.set(fW/2 - frameW/2, 0, 0);
-                    winGroup.add(fRightMesh);
-                    const fTopMesh = new THREE.Mesh(new THREE.BoxGeometry(fW, frameW, fD), frameMat);
-                    fTopMesh.position.set(0, fH/2 - frameW/2, 0);
-                    winGroup.add(fTopMesh);
-                    const fBotMesh = new THREE.Mesh(new THREE.BoxGeometry(fW, frameW, fD), frameMat);
-                    fBotMesh.position.set(0, -fH/2 + frameW/2, 0);
-                    winGroup.add(fBotMesh);
-                    
-                    const wingS = 27; 
-                    const wingTh = 2;
-                    
-                    const ailTop = new THREE.Mesh(new THREE.BoxGeometry(fW + 2*wingS, wingS, wingTh), frameMat);
-                    ailTop.position.set(0, fH/2 + wingS/2, fD/2 + wingTh/2); 
-                    winGroup.add(ailTop);
-                    
-                    const ailLeft = new THREE.Mesh(new THREE.BoxGeometry(wingS, fH + 2*wingS, wingTh), frameMat);
-                    ailLeft.position.set(-fW/2 - wingS/2, 0, fD/2 + wingTh/2);
-                    winGroup.add(ailLeft);
-                    
-                    const ailRight = new THREE.Mesh(new THREE.BoxGeometry(wingS, fH + 2*wingS, wingTh), frameMat);
-                    ailRight.position.set(fW/2 + wingS/2, 0, fD/2 + wingTh/2);
-                    winGroup.add(ailRight);
-                    
-                    const ailBot = new THREE.Mesh(new THREE.BoxGeometry(fW + 2*wingS, wingS, wingTh), frameMat);
-                    ailBot.position.set(0, -fH/2 - wingS/2, fD/2 + wingTh/2);
-                    winGroup.add(ailBot);
-                    
-                    const wingThick = 2; const wingW = 20; const wingZ = fD/2 + wingThick/2;
-                    const wTopM = new THREE.Mesh(new THREE.BoxGeometry(fW, wingW, wingThick), frameMat);
-                    wTopM.position.set(0, fH/2 - wingW/2, wingZ);
-                    winGroup.add(wTopM);
-                    const wBotM = new THREE.Mesh(new THREE.BoxGeometry(fW, wingW, wingThick), frameMat);
-                    wBotM.position.set(0, -fH/2 + wingW/2, wingZ);
-                    winGroup.add(wBotM);
-                    const wLeftM = new THREE.Mesh(new THREE.BoxGeometry(wingW, fH, wingThick), frameMat);
-                    wLeftM.position.set(-fW/2 + wingW/2, 0, wingZ);
-                    winGroup.add(wLeftM);
-                    const wRightM = new THREE.Mesh(new THREE.BoxGeometry(wingW, fH, wingThick), frameMat);
-                    wRightM.position.set(fW/2 - wingW/2, 0, wingZ);
-                    winGroup.add(wRightM);
-    
-                    // --- SASHES & MULLIONS ---
-                    const drawSashFrame = (grp, w, h, depth, withGlass, handlePos) => {{
-                        const sP = 55;
-                        const shape = new THREE.Shape();
-                        shape.moveTo(-w/2, -h/2); shape.lineTo(w/2, -h/2); shape.lineTo(w/2, h/2); shape.lineTo(-w/2, h/2); shape.lineTo(-w/2, -h/2);
-                        const hole = new THREE.Path();
-                        hole.moveTo(-w/2+sP, -h/2+sP); hole.lineTo(w/2-sP, -h/2+sP); hole.lineTo(w/2-sP, h/2-sP); hole.lineTo(-w/2+sP, h/2-sP); hole.lineTo(-w/2+sP, -h/2+sP);
-                        shape.holes.push(hole);
-                        const geo = new THREE.ExtrudeGeometry(shape, {{ depth: depth, bevelEnabled: false }});
-                        const mesh = new THREE.Mesh(geo, frameMat); mesh.position.set(0, 0, -depth/2); grp.add(mesh);
-                        
-                        if (withGlass) {{
-                            const gl = new THREE.Mesh(new THREE.BoxGeometry(w - 2*sP, h - 2*sP, 6), glassMat); 
-                            grp.add(gl);
-                        }}
-                        
-                        if (handlePos) {{
-                            const hM = new THREE.Mesh(new THREE.BoxGeometry(20, 100, 20), new THREE.MeshStandardMaterial({{color: 0xeeeeee}}));
-                            let hX = 0, hY = 0;
-                            if (handlePos === 'left') hX = -w/2 + sP/2;
-                            else if (handlePos === 'right') hX = w/2 - sP/2;
-                            else if (handlePos === 'top') {{ hY = h/2 - sP/2; hM.rotation.z = Math.PI/2; }}
-                            hM.position.set(hX, hY, depth/2 + 10); 
-                            grp.add(hM);
-                        }}
+                    // --- GEOMETRY: tampons calculés côté serveur (scene_mesh.py), envoyés tels quels au GPU ---
+                    const decode = (b64, Type) => {{
+                        const bin = atob(b64);
+                        const bytes = new Uint8Array(bin.length);
+                        for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+                        return new Type(bytes.buffer);
                     }};
-    
-                    if (data.zones && data.zones.length > 0) {{
-                        data.zones.forEach((zone, idx) => {{
-                            let sX = zone.x; let sY = zone.y; let sW = zone.w; let sH = zone.h;
-                            const tol = 1;
-                            if (sX < tol) {{ sX += frameW; sW -= frameW; }}
-                            if ((zone.x + zone.w) > fW - tol) {{ sW -= frameW; }}
-                            if (sY < tol) {{ sY += frameW; sH -= frameW; }}
-                            if ((zone.y + zone.h) > fH - tol) {{ sH -= frameW; }}
-    
-                            // MULLIONS
-                            if (zone.x > tol) {{
-                                const mul = new THREE.Mesh(new THREE.BoxGeometry(frameW, zone.h, fD), frameMat);
-                                const mX = (-fW/2) + zone.x;
-                                const mY = (fH/2) - (zone.y + zone.h/2);
-                                mul.position.set(mX, mY, 0);
-                                winGroup.add(mul);
-                                sX += frameW/2; sW -= frameW/2; 
-                            }}
-                            if (zone.y > tol) {{
-                                const tr = new THREE.Mesh(new THREE.BoxGeometry(zone.w, frameW, fD), frameMat);
-                                const tX = (-fW/2) + (zone.x + zone.w/2);
-                                const tY = (fH/2) - zone.y;
-                                tr.position.set(tX, tY, 0);
-                                winGroup.add(tr);
-                                sY += frameW/2; sH -= frameW/2;
-                            }}
-    
-                            let newW = sW; let newH = sH;
-                            if (newW <= 0 || newH <= 0) return;
-                            
-                            const zCenterX = (-fW/2) + sX + newW/2;
-                            const zCenterY = (fH/2) - sY - newH/2;
-                            
-                            const sGroup = new THREE.Group();
-                            sGroup.position.set(zCenterX, zCenterY, 0);
-                            winGroup.add(sGroup);
-                            
-                            const type = (zone.type || '').toLowerCase();
-                            const sD = fD - 10;
-                            
-                            if (type.includes('fixe')) {{
-                                drawSashFrame(sGroup, newW, newH, sD, true, null);
-                            }} else if (type.includes('coulissant')) {{
-                                const sashW = (newW / 2) + 20; 
-                                const lGrp = new THREE.Group(); lGrp.position.set(-newW/4, 0, -10); sGroup.add(lGrp);
-                                drawSashFrame(lGrp, sashW, newH, sD, true, 'right');
-                                const rGrp = new THREE.Group(); rGrp.position.set(newW/4, 0, 10); sGroup.add(rGrp);
-                                drawSashFrame(rGrp, sashW, newH, sD, true, 'left');
-                            }} else if (type.includes('soufflet')) {{
-                                drawSashFrame(sGroup, newW, newH, sD, true, 'top');
-                            }} else if (type.includes('2 vantaux') || type.includes('double')) {{
-                                const sashW = (newW / 2) - 2;
-                                const lGrp = new THREE.Group(); lGrp.position.set(-newW/4, 0, 0); sGroup.add(lGrp);
-                                drawSashFrame(lGrp, sashW, newH, sD, true, null);
-                                const rGrp = new THREE.Group(); rGrp.position.set(newW/4, 0, 0); sGroup.add(rGrp);
-                                drawSashFrame(rGrp, sashW, newH, sD, true, 'left');
-                                const batt = new THREE.Mesh(new THREE.BoxGeometry(40, newH, sD+5), frameMat);
-                                batt.position.set(0, 0, 5); sGroup.add(batt);
-                            }} else {{
-                                drawSashFrame(sGroup, newW, newH, sD, true, 'left');
-                            }}
-                        }});
+                    const meshData = JSON.parse(document.getElementById('3d-mesh').textContent);
+                    const rootGroup = new THREE.Group();
+                    scene.add(rootGroup);
+                    for (const [name, buf] of Object.entries(meshData.materials)) {{
+                        const geo = new THREE.BufferGeometry();
+                        geo.setAttribute('position', new THREE.BufferAttribute(decode(buf.position, Float32Array), 3));
+                        geo.setAttribute('normal', new THREE.BufferAttribute(decode(buf.normal, Float32Array), 3));
+                        geo.setIndex(new THREE.BufferAttribute(decode(buf.index, Uint32Array), 1));
+                        const m = new THREE.Mesh(geo, materials[name]);
+                        m.castShadow = m.receiveShadow = hq && name !== 'glass';
+                        rootGroup.add(m);
                     }}
     
-                    // HABILLAGE
-                    const gapH = (holeW - fW);
-                    const gapTop = Math.max(0, holeH - 40 - fH);
-                    const habThick = 4;
-                    const habDepth = 40; 
-                    const habZ = -fD - habThick/2;
-                    
-                    const topH_Height = Math.max(habDepth, gapTop);
-                    const hTop = new THREE.Mesh(new THREE.BoxGeometry(holeW + 80, topH_Height, habThick), habillageMat);
-                    hTop.position.set(0, winTopY - topH_Height/2, habZ); 
-                    rootGroup.add(hTop);
-                    
-                    const gapSide = Math.max(0, gapH / 2);
-                    const cornierW = Math.max(habDepth, gapSide);
-                    
-                    const hLeft = new THREE.Mesh(new THREE.BoxGeometry(cornierW, holeH + topH_Height, habThick), habillageMat);
-                    hLeft.position.set(-fW/2 - cornierW/2, 0 + topH_Height/2 - habDepth/2, habZ); 
-                    rootGroup.add(hLeft);
-                    
-                    const hRight = new THREE.Mesh(new THREE.BoxGeometry(cornierW, holeH + topH_Height, habThick), habillageMat);
-                    hRight.position.set(fW/2 + cornierW/2, 0 + topH_Height/2 - habDepth/2, habZ);
-                    rootGroup.add(hRight);
-    
-                    const bavGeo = new THREE.PlaneGeometry(fW + 40, 60);
-                    const bav = new THREE.Mesh(bavGeo, bavetteMat);
-                    bav.rotation.x = 0.5; 
-                    bav.position.set(0, winBotY + 15 + 2, -fD - 20); 
-                    rootGroup.add(bav);
-    
-                    function animate() {{
-                        requestAnimationFrame(animate);
-                        controls.update();
+                    // --- RENDER ON DEMAND: une image par changement, rien quand la caméra est immobile ---
+                    // controls.update() renvoie true tant que l'amortissement (damping) bouge encore.
+                    let frameRequested = false;
+                    function render() {{
+                        frameRequested = false;
+                        if (controls.update()) requestRender();
                         renderer.render(scene, camera);
                     }}
-                    animate();
+                    function requestRender() {{
+                        if (!frameRequested) {{
+                            frameRequested = true;
+                            requestAnimationFrame(render);
+                        }}
+                    }}
+                    controls.addEventListener('change', requestRender);
+                    requestRender();
                     
                     window.addEventListener('resize', () => {{
                         camera.aspect = window.innerWidth / window.innerHeight;
                         camera.updateProjectionMatrix();
                         renderer.setSize(window.innerWidth, window.innerHeight);
+                        requestRender();
                     }});
                 }} catch (e) {{
                     const d = document.getElementById('err');
@@ -3859,6 +3935,8 @@ def render_menuiserie_form():
     with st.expander("🖥️ Visualisation 3D 360°", expanded=False):
         st.info("Visualisation 3D expérimentale (WebGL). Cliquez pour activer.")
         if st.checkbox("Activer la vue 3D", key="view_3d_toggle"):
+            # Ombres + lissage : plus joli mais coûteux (GPU, batterie) ; désactivé par défaut
+            high_quality_3d = st.checkbox("Rendu haute qualité (ombres, lissage)", key="view_3d_hq")
             # Prepare Data
             d_mm = 70
             try:
@@ -3877,7 +3955,8 @@ def render_menuiserie_form():
                     zones=zones_config,
                     ext_reveal_w=st.session_state.get('men_w_tab_ex', 0),
                     ext_reveal_h=st.session_state.get('men_h_tab_ex', 0),
-                    allege_mm=st.session_state.get('h_allege', 0)
+                    allege_mm=st.session_state.get('h_allege', 0),
+                    high_quality=high_quality_3d
                 )
             except Exception as e:
                 st.error(f"Erreur 3D : {e}")
@@ -3980,32 +4059,36 @@ def render_menuiserie_form():
 
 
 # --- 3. GÉNÉRATEUR SVG FINAL ---
-def generate_svg_v73():
+def generate_svg_v73(lod=LOD_FULL, target_px=None, state=None):
+    # lod : niveau de détail (LOD_FULL / LOD_SCHEMATIC / LOD_OUTLINE)
+    # target_px : largeur d'affichage visée (px), pour écarter les détails illisibles
+    # state : données d'un repère enregistré (défaut : session en cours)
+    s = st.session_state if state is None else state
     # RETRIEVE VARIABLES FROM SESSION STATE (Fix NameError)
     # Must match keys used in Sidebar
     
     # 1. Basic Dimensions
-    l_dos_dormant = st.session_state.get('width_dorm', 1200)
-    h_dos_dormant = st.session_state.get('height_dorm', 1400)
+    l_dos_dormant = s.get('width_dorm', 1200)
+    h_dos_dormant = s.get('height_dorm', 1400)
     
     # 2. Options
-    vr_opt = st.session_state.get('vr_enable', False)
-    h_vr = st.session_state.get('vr_h', 185) if vr_opt else 0
-    vr_grille = st.session_state.get('vr_g', False)
+    vr_opt = s.get('vr_enable', False)
+    h_vr = s.get('vr_h', 185) if vr_opt else 0
+    vr_grille = s.get('vr_g', False)
     
     h_menuiserie = h_dos_dormant - h_vr
     
     # 3. Ailettes & Dormant
-    ep_dormant = st.session_state.get('frame_thig', 70)
-    ail_val = st.session_state.get('fin_val', 60)
+    ep_dormant = s.get('frame_thig', 70)
+    ail_val = s.get('fin_val', 60)
     
-    same_bot = st.session_state.get('same_bot', False)
+    same_bot = s.get('same_bot', False)
     # Logic from Sidebar: if same, use ail_val, else use fin_bot input
     if same_bot: ail_bas = ail_val
-    else: ail_bas = st.session_state.get('fin_bot', 0)
+    else: ail_bas = s.get('fin_bot', 0)
     
     # 4. Colors
-    col_int = st.session_state.get('col_in', 'Blanc')
+    col_int = s.get('col_in', 'Blanc')
     # Config Global
     color_map = {"Blanc": "#FFFFFF", "Gris": "#383E42", "Noir": "#1F1F1F", "Chêne": "#C19A6B"}
     hex_col = "#FFFFFF"
@@ -4014,11 +4097,13 @@ def generate_svg_v73():
         
     cfg_global = {
         'color_frame': hex_col,
-        'color_glass': "#d6eaff"
+        'color_glass': "#d6eaff",
+        'lod': lod,
+        'px_per_unit': None
     }
 
     # 5. Zones
-    zones_config = flatten_tree(st.session_state.get('zone_tree', init_node('root')), 0, 0, l_dos_dormant, h_menuiserie)
+    zones_config = flatten_tree(s.get('zone_tree', init_node('root')), 0, 0, l_dos_dormant, h_menuiserie)
     
     svg = []
     col_fin = "#D3D3D3"
@@ -4036,19 +4121,27 @@ def generate_svg_v73():
     max_dim = max(bw, bh)
     font_dim = max(16, int(max_dim * 0.02))
     
+    px_per_unit = (target_px / bw) if target_px else None
+    cfg_global['px_per_unit'] = px_per_unit
+    
+    # Emprise réelle du dessin (objet + cotes), étendue au fil des cotations
+    bbox = [bx, by, bx + bw, by + bh]
+    
     # V73 FIX: Visible Dormant Frame (Stroke black)
     draw_rect(svg, bx, by, bw, bh, col_fin, "black", 1, 0)
     
     if vr_opt:
         draw_rect(svg, 0, -h_vr, l_dos_dormant, h_vr, cfg_global['color_frame'], "black", 1, 1)
-        draw_text(svg, l_dos_dormant/2, -h_vr/2, f"COFFRE {int(h_vr)}", font_size=font_dim, fill="white" if "Blanc" not in col_int else "black", weight="bold", z_index=5)
-        if vr_grille:
+        if lod_keep(font_dim, LOD_SCHEMATIC, lod, px_per_unit):
+            draw_text(svg, l_dos_dormant/2, -h_vr/2, f"COFFRE {int(h_vr)}", font_size=font_dim, fill="white" if "Blanc" not in col_int else "black", weight="bold", z_index=5)
+        if vr_grille and lod_keep(12, LOD_SCHEMATIC, lod, px_per_unit):
              gx = (l_dos_dormant - 250)/2
              gy = -h_vr/2 + 20
              draw_rect(svg, gx, gy, 250, 12, "#eeeeee", "black", 1, 6)
-             for k in range(1, 10):
-                lx = gx + (250/10)*k
-                svg.append((6, f'<line x1="{lx}" y1="{gy}" x2="{lx}" y2="{gy+12}" stroke="black" stroke-width="0.5" />'))
+             if lod_keep(250/10, LOD_FULL, lod, px_per_unit):
+                 for k in range(1, 10):
+                    lx = gx + (250/10)*k
+                    svg.append((6, f'<line x1="{lx}" y1="{gy}" x2="{lx}" y2="{gy+12}" stroke="black" stroke-width="0.5" />'))
 
     th_dorm = float(ep_dormant) / 3.0
     draw_rect(svg, 0, 0, l_dos_dormant, h_menuiserie, cfg_global['color_frame'], "black", 2, 2)
@@ -4072,7 +4165,7 @@ def generate_svg_v73():
         draw_sash_content(svg, z['x'], z['y'], z['w'], z['h'], z['type'], z['params'], cfg_global, z_base=4, font_dim_ref=font_dim)
         
         # DRAW ZONE LABEL (V73 REFINED: Discreet, Top-Left)
-        if 'label' in z:
+        if 'label' in z and lod_keep(30, LOD_SCHEMATIC, lod, px_per_unit):
             # Discreet style: matches labels like "F", "VP" (Size 30, Blue #335c85)
             # Position: Top-Left with padding
             font_size = 30
@@ -4094,146 +4187,140 @@ def generate_svg_v73():
         # V78 FIX: Robust Layering System
         # We define 3 layers of dimensions: Details, Frame, Total
         # Each layer is spaced by 'dim_step'
-        dim_step = font_dim * 2.0 # Generous spacing
+        # Pas mesuré sur la police (hauteur de texte + écart + tic), pistes partant du bord de l'objet
+        dim_step = dimension_track(font_dim)
         
         # OFFSETS (Positive values, direction handled by draw_dimension_line)
         # H: Added to y (Down)
         # V: Subtracted from x (Left)
         layer_1 = dim_step       # Details
-        layer_2 = dim_step * 2.2 # Frame (Slightly more gap)
-        layer_3 = dim_step * 3.4 # Total
-
-        # 1. COTES CUMULEES (Détails des zones)
-        # Display only if there are multiple zones (otherwise redundant with overall dimensions)
-        if len(zones_config) > 1:
-            # Horizontal (Largeur)
-            xs = sorted(list(set([z['x'] for z in zones_config] + [z['x']+z['w'] for z in zones_config])))
-            for k in range(len(xs)-1):
-                val = xs[k+1] - xs[k]
-                if val > 1: # Ignore micro-gaps
-                    draw_dimension_line(svg, xs[k], 0, xs[k+1], 0, val, "", h_menuiserie+layer_1, "H", font_dim-4, 9)
+        h_base = h_menuiserie + ht_bas # Bas de l'objet (ailette basse incluse)
+        v_base = ail_val               # Gauche de l'objet (ailette incluse)
+        layer_2 = dim_step * 2   # Frame
+        layer_3 = dim_step * 3   # Total
+
+        # Cotes : niveau "full" uniquement, et seulement si le texte reste lisible
+        if lod_keep(font_dim - 4, LOD_FULL, lod, px_per_unit):
+            # 1. COTES CUMULEES (Détails des zones)
+            # Display only if there are multiple zones (otherwise redundant with overall dimensions)
+            if len(zones_config) > 1:
+                # Horizontal (Largeur)
+                xs = sorted(list(set([z['x'] for z in zones_config] + [z['x']+z['w'] for z in zones_config])))
+                for k in range(len(xs)-1):
+                    val = xs[k+1] - xs[k]
+                    if val > 1: # Ignore micro-gaps
+                        draw_dimension_line(svg, xs[k], 0, xs[k+1], 0, val, "", h_base+layer_1, "H", font_dim-4, 9, bbox=bbox)
                     
-            # Vertical (Hauteur)
-            # Vertical (Hauteur)
-            # Use Layer 1 
-            v_dim_offset = layer_1
+                # Vertical (Hauteur)
+                # Vertical (Hauteur)
+                # Use Layer 1 
+                v_dim_offset = v_base + layer_1
             
-            ys = sorted(list(set([z['y'] for z in zones_config] + [z['y']+z['h'] for z in zones_config])))
-            for k in range(len(ys)-1):
-                val = ys[k+1] - ys[k]
-                if val > 1:
-                    # Pass offset as POSITIVE because function subtracts it for "V"
-                    draw_dimension_line(svg, 0, ys[k], 0, ys[k+1], val, "", v_dim_offset, "V", font_dim-4, 9)
-
-        # 2. COTES TOTALES (Existantes, repoussées)
-        # 2. COTES TOTALES (Existantes, repoussées)
-        # Cadre (Largeur) -> Layer 2
-        draw_dimension_line(svg, 0, 0, l_dos_dormant, 0, l_dos_dormant, "", h_menuiserie+layer_2, "H", font_dim, 9)
-        
-        # Hors Tout (Largeur) -> Layer 3
-        l_ht = l_dos_dormant + 2*ail_val
-        draw_dimension_line(svg, -ail_val, 0, l_dos_dormant+ail_val, 0, l_ht, "", h_menuiserie+layer_3, "H", font_dim, 9)
-
-
-        # Cadre (Hauteur)
-        top_dormant_y = -h_vr if vr_opt else 0
-        h_dos_calc = h_menuiserie + (h_vr if vr_opt else 0)
-        # Offset positif pour "V" part vers la gauche.
-        draw_dimension_line(svg, 0, top_dormant_y, 0, h_menuiserie, h_dos_calc, "", layer_2, "V", font_dim, 9)
-
-        # Hors Tout (Hauteur)
-        ht_haut = h_vr + ail_val if vr_opt else ail_val
-        ht_bas = ail_bas
-        y_start_ht = -ht_haut
-        y_end_ht = h_menuiserie + ht_bas
-        h_visuel_total = abs(y_end_ht - y_start_ht)
-        draw_dimension_line(svg, 0, y_start_ht, 0, y_end_ht, h_visuel_total, "", layer_3, "V", font_dim, 9)
-
-        # HP (si applicable) - Iterate ALL valid zones (V75 Fix)
-        for hp_z in zones_config:
-            if 'h_poignee' in hp_z['params'] and hp_z['params']['h_poignee'] > 0:
-                 hp_val = hp_z['params']['h_poignee']
-                 # Reference : Bas de la zone concernée
-                 y_bottom_zone = hp_z['y'] + hp_z['h']
+                ys = sorted(list(set([z['y'] for z in zones_config] + [z['y']+z['h'] for z in zones_config])))
+                for k in range(len(ys)-1):
+                    val = ys[k+1] - ys[k]
+                    if val > 1:
+                        # Pass offset as POSITIVE because function subtracts it for "V"
+                        draw_dimension_line(svg, 0, ys[k], 0, ys[k+1], val, "", v_dim_offset, "V", font_dim-4, 9, bbox=bbox)
+
+            # 2. COTES TOTALES (Existantes, repoussées)
+            # 2. COTES TOTALES (Existantes, repoussées)
+            # Cadre (Largeur) -> Layer 2
+            draw_dimension_line(svg, 0, 0, l_dos_dormant, 0, l_dos_dormant, "", h_base+layer_2, "H", font_dim, 9, bbox=bbox)
+        
+            # Hors Tout (Largeur) -> Layer 3
+            l_ht = l_dos_dormant + 2*ail_val
+            draw_dimension_line(svg, -ail_val, 0, l_dos_dormant+ail_val, 0, l_ht, "", h_base+layer_3, "H", font_dim, 9, bbox=bbox)
+
+
+            # Cadre (Hauteur)
+            top_dormant_y = -h_vr if vr_opt else 0
+            h_dos_calc = h_menuiserie + (h_vr if vr_opt else 0)
+            # Offset positif pour "V" part vers la gauche.
+            draw_dimension_line(svg, 0, top_dormant_y, 0, h_menuiserie, h_dos_calc, "", v_base+layer_2, "V", font_dim, 9, bbox=bbox)
+
+            # Hors Tout (Hauteur)
+            ht_haut = h_vr + ail_val if vr_opt else ail_val
+            ht_bas = ail_bas
+            y_start_ht = -ht_haut
+            y_end_ht = h_menuiserie + ht_bas
+            h_visuel_total = abs(y_end_ht - y_start_ht)
+            draw_dimension_line(svg, 0, y_start_ht, 0, y_end_ht, h_visuel_total, "", v_base+layer_3, "V", font_dim, 9, bbox=bbox)
+
+            # HP (si applicable) - Iterate ALL valid zones (V75 Fix)
+            for hp_z in zones_config:
+                if 'h_poignee' in hp_z['params'] and hp_z['params']['h_poignee'] > 0:
+                     hp_val = hp_z['params']['h_poignee']
+                     # Reference : Bas de la zone concernée
+                     y_bottom_zone = hp_z['y'] + hp_z['h']
                  
-                 # Position Poignée (Y dans SVG)
-                 y_hp = y_bottom_zone - hp_val
+                     # Position Poignée (Y dans SVG)
+                     y_hp = y_bottom_zone - hp_val
                  
-                 # CALCUL POSITION REELLE POIGNEE (Copie logique draw_sash_content)
-                 vis_ouvrant = 55
-                 ox, oy, ow, oh = hp_z['x'], hp_z['y'], hp_z['w'], hp_z['h']
-                 type_ouv = hp_z['type']
-                 params = hp_z['params']
+                     # CALCUL POSITION REELLE POIGNEE (Copie logique draw_sash_content)
+                     vis_ouvrant = 55
+                     ox, oy, ow, oh = hp_z['x'], hp_z['y'], hp_z['w'], hp_z['h']
+                     type_ouv = hp_z['type']
+                     params = hp_z['params']
                  
-                 # Default Center
-                 x_handle_pos = ox + ow / 2 
+                     # Default Center
+                     x_handle_pos = ox + ow / 2 
                  
-                 if type_ouv == "1 Vantail":
-                     sens = params.get('sens', 'TG')
-                     if sens == 'TG': x_handle_pos = ox + ow - 28
-                     else: x_handle_pos = ox + 28
-                 elif type_ouv == "2 Vantaux":
-                     w_vtl = ow / 2
-                     is_princ_right = (params.get('principal', 'D') == 'D')
-                     if is_princ_right: x_handle_pos = (ox + w_vtl) + 28
-                     else: x_handle_pos = (ox + w_vtl) - 28
+                     if type_ouv == "1 Vantail":
+                         sens = params.get('sens', 'TG')
+                         if sens == 'TG': x_handle_pos = ox + ow - 28
+                         else: x_handle_pos = ox + 28
+                     elif type_ouv == "2 Vantaux":
+                         w_vtl = ow / 2
+                         is_princ_right = (params.get('principal', 'D') == 'D')
+                         if is_princ_right: x_handle_pos = (ox + w_vtl) + 28
+                         else: x_handle_pos = (ox + w_vtl) - 28
                  
-                 # Draw Cote - Aligned with Handle X but shifted slightly
-                 # Dynamic Offset to push AWAY from Center (Towards Frame)
-                 # Use font_dim proportional offset
-                 dist_offset = font_dim * 3.5
-                 sash_center_x = ox + ow / 2
-                 if x_handle_pos < sash_center_x:
-                     offset_line = -dist_offset 
-                 else:
-                     offset_line = dist_offset
+                     # Draw Cote - Aligned with Handle X but shifted slightly
+                     # Dynamic Offset to push AWAY from Center (Towards Frame)
+                     # Use font_dim proportional offset
+                     dist_offset = font_dim * 3.5
+                     sash_center_x = ox + ow / 2
+                     if x_handle_pos < sash_center_x:
+                         offset_line = -dist_offset 
+                     else:
+                         offset_line = dist_offset
                  
-                 # Only draw if handle pos is reasonable
-                 draw_dimension_line(svg, x_handle_pos + offset_line, y_hp, x_handle_pos + offset_line, y_bottom_zone, hp_val, "HP : ", 0, "V", font_dim, 20, leader_fixed_start=x_handle_pos)
+                     # Only draw if handle pos is reasonable
+                     draw_dimension_line(svg, x_handle_pos + offset_line, y_hp, x_handle_pos + offset_line, y_bottom_zone, hp_val, "HP : ", 0, "V", font_dim, 20, leader_fixed_start=x_handle_pos, bbox=bbox)
 
              
 
         
-        # ANCIEN CODE (Supprimé)
-        # has_ouvrant = any(z['type'] != "Fixe" for z in zones_config)
-        # if has_ouvrant:
-        #    hp_val = 1050 ...
+            # ANCIEN CODE (Supprimé)
+            # has_ouvrant = any(z['type'] != "Fixe" for z in zones_config)
+            # if has_ouvrant:
+            #    hp_val = 1050 ...
 
-        # Cadre (Hauteur) -> Layer 2
-        top_dormant_y = -h_vr if vr_opt else 0
-        h_dos_calc = h_menuiserie + (h_vr if vr_opt else 0)
-        # Offset is POSITIVE for V because it goes Left
-        draw_dimension_line(svg, 0, top_dormant_y, 0, h_menuiserie, h_dos_calc, "", layer_2, "V", font_dim, 9)
+            # Cadre (Hauteur) -> Layer 2
+            top_dormant_y = -h_vr if vr_opt else 0
+            h_dos_calc = h_menuiserie + (h_vr if vr_opt else 0)
+            # Offset is POSITIVE for V because it goes Left
+            draw_dimension_line(svg, 0, top_dormant_y, 0, h_menuiserie, h_dos_calc, "", v_base+layer_2, "V", font_dim, 9, bbox=bbox)
 
-        # Hors Tout (Hauteur) -> Layer 3
-        ht_haut = h_vr + ail_val if vr_opt else ail_val
-        ht_bas = ail_bas
-        y_start_ht = -ht_haut
-        y_end_ht = h_menuiserie + ht_bas
-        h_visuel_total = abs(y_end_ht - y_start_ht)
-        draw_dimension_line(svg, 0, y_start_ht, 0, y_end_ht, h_visuel_total, "", layer_3, "V", font_dim, 9)
+            # Hors Tout (Hauteur) -> Layer 3
+            ht_haut = h_vr + ail_val if vr_opt else ail_val
+            ht_bas = ail_bas
+            y_start_ht = -ht_haut
+            y_end_ht = h_menuiserie + ht_bas
+            h_visuel_total = abs(y_end_ht - y_start_ht)
+            draw_dimension_line(svg, 0, y_start_ht, 0, y_end_ht, h_visuel_total, "", v_base+layer_3, "V", font_dim, 9, bbox=bbox)
 
         # DEFS & RETURN
         defs = ""
         svg_str = "".join([el[1] for el in sorted(svg, key=lambda x:x[0])])
         
-        # V79 FIX: Dynamic ViewBox Margins
-        # Ensure the viewbox includes the furthest dimension layer (layer_3) plus padding for text
-        safe_margin = layer_3 + (font_dim * 2.5) 
-        
-        # Current Bounding Box of the Object
-        obj_x_min = -ail_val
-        obj_y_min = -ht_haut
-        obj_x_max = l_dos_dormant + ail_val
-        obj_y_max = h_menuiserie + ht_bas
-        
-        # ViewBox definition
-        vb_x = obj_x_min - safe_margin  # Left Margin (for Vertical dims)
-        vb_y = obj_y_min - 50            # Top Margin (Minimal, unless Top dims added later)
-        
-        vb_w = (obj_x_max - vb_x) + safe_margin   # Right Margin Dynamic
-
-        vb_h = (obj_y_max - vb_y) + safe_margin # Height = Object Bottom - VB Top + Bottom Margin (for Horizontal dims)
+        # ViewBox ajustée sur l'emprise mesurée (cotes + libellés), petite marge
+        pad = font_dim * 0.5
+        vb_x = bbox[0] - pad
+        vb_y = bbox[1] - pad
+        vb_w = (bbox[2] - bbox[0]) + 2 * pad
+        vb_h = (bbox[3] - bbox[1]) + 2 * pad
         
         return f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{vb_x} {vb_y} {vb_w} {vb_h}" style="background-color:white;">{defs}{svg_str}</svg>'
     except Exception as e:
@@ -4584,9 +4671,9 @@ def render_volet_form():
 
     return s
 
-def generate_svg_volet():
-    """Génère le dessin SVG simplifié du Volet Roulant"""
-    s = st.session_state
+def generate_svg_volet(lod=LOD_FULL, target_px=None, state=None):
+    """Génère le dessin SVG simplifié du Volet Roulant (lod / target_px : cf. lod_keep)"""
+    s = st.session_state if state is None else state
     w = s.get('vr_width', 1000)
     h = s.get('vr_height', 1000)
     
@@ -4613,17 +4700,13 @@ def generate_svg_volet():
     tick_size = font_dim * 0.6
     text_offset = font_dim * 1.2
     
-    # 2. ViewBox Margins (Dynamic) - INCREASED
-    safe_margin = font_dim * 8.0 # Was 4.0 - Doubled to ensure no clipping
+    # 2. ViewBox : emprise mesurée (objet + manivelle + cotes), calculée en fin de dessin
+    # Origin is (0,0) for the object (coffre top-left), object goes from (0,0) to (dw, dh)
+    bbox = [0, 0, dw, dh]
     
-    # Define bounding box including the box (coffre)
-    # Origin is (0,0) for the object (coffre top-left) excluding margins
-    # Object goes from (0,0) to (dw, dh)
-    
-    vb_x = -safe_margin
-    vb_y = -safe_margin
-    vb_w = dw + (safe_margin * 2)
-    vb_h = dh + (safe_margin * 2)
+    px_per_unit = (target_px / dw) if target_px else None
+    def keep(size, level):
+        return lod_keep(size, level, lod, px_per_unit)
 
     # Helper for Color Mapping
     def get_color_hex(c_name, default="#e0e0e0"):
@@ -4681,7 +4764,7 @@ def generate_svg_volet():
         lame_type = s.get('vr_lame_thick', '40 mm')
         slat_h = 50 if "50" in lame_type else 40
         curr_y = y_tablier + slat_h
-        while curr_y < dh - 20: 
+        while curr_y < dh - 20 and keep(slat_h, LOD_FULL): 
             svg_parts.append(f'<line x1="{coulisse_w}" y1="{curr_y}" x2="{dw-coulisse_w}" y2="{curr_y}" style="{style_lame}" />')
             curr_y += slat_h
 
@@ -4712,7 +4795,7 @@ def generate_svg_volet():
         # Draw slats lines on the roll - Use consistent slat_h
         # Start slightly offset so we see a line if space is tight
         roll_y = axe_y + (slat_h * 0.5) 
-        while roll_y < axe_mid_y:
+        while roll_y < axe_mid_y and keep(slat_h, LOD_FULL):
             svg_parts.append(f'<line x1="{coulisse_w}" y1="{roll_y}" x2="{dw-coulisse_w}" y2="{roll_y}" style="{style_lame}" />')
             roll_y += slat_h 
             
@@ -4720,14 +4803,17 @@ def generate_svg_volet():
         # Bottom half height is also roll_h basically
         svg_parts.append(draw_rect(10, axe_mid_y, dw-20, roll_h, "#d0d0d0", stroke="#999"))
         # Tube visual details
-        svg_parts.append(draw_rect(10, axe_mid_y+5, dw-20, 1, "#bbb"))
-        svg_parts.append(draw_rect(10, axe_mid_y+15, dw-20, 1, "#bbb"))
+        if keep(10, LOD_FULL):
+            svg_parts.append(draw_rect(10, axe_mid_y+5, dw-20, 1, "#bbb"))
+            svg_parts.append(draw_rect(10, axe_mid_y+15, dw-20, 1, "#bbb"))
         
         # D. ATTACHES / CLIPS (On top of Tube)
         nb_attaches = 2 if dw < 1200 else (3 if dw < 2000 else 4)
         spacing = (dw - 20) / (nb_attaches + 1)
         clip_w = 20
         
+        if not keep(clip_w, LOD_FULL): nb_attaches = 0
+        
         for i in range(1, nb_attaches + 1):
              cx = 10 + (spacing * i) - (clip_w / 2)
              # Draw strap/clip crossing the tube/tablier junction
@@ -4746,7 +4832,7 @@ def generate_svg_volet():
         lame_type = s.get('vr_lame_thick', '40 mm')
         slat_h = 50 if "50" in lame_type else 40
         curr_y = y_tablier + slat_h
-        while curr_y < dh - 20: 
+        while curr_y < dh - 20 and keep(slat_h, LOD_FULL): 
             svg_parts.append(f'<line x1="{coulisse_w}" y1="{curr_y}" x2="{dw-coulisse_w}" y2="{curr_y}" style="{style_lame}" />')
             curr_y += slat_h
             
@@ -4761,7 +4847,7 @@ def generate_svg_volet():
         svg_parts.append(f'<rect x="0" y="0" width="{dw}" height="{coffre_h}" style="{style_coffre}" />')
     
     # Solar Panel
-    if s.get('vr_proto') == "IO SOLAIRE":
+    if s.get('vr_proto') == "IO SOLAIRE" and keep(80, LOD_SCHEMATIC):
         side = s.get('vr_cable_side', 'Droite')
         sp_w = 400 
         sp_h = 80 
@@ -4772,16 +4858,17 @@ def generate_svg_volet():
         svg_parts.append(f'<line x1="{sp_x + sp_w/2}" y1="{sp_y}" x2="{sp_x + sp_w/2}" y2="{sp_y+sp_h}" stroke="#555" />')
 
     # Cable Exit
-    if s.get('vr_type') == "Motorisé":
+    if s.get('vr_type') == "Motorisé" and keep(30, LOD_SCHEMATIC):
         side = s.get('vr_cable_side', 'Droite')
         cx = dw if side == "Droite" else 0
         cy = coffre_h / 2
         d_cable = f"M{cx},{cy} Q{cx+15},{cy} {cx+15},{cy+15} T{cx+15},{cy+30}" if side == "Droite" else f"M{cx},{cy} Q{cx-15},{cy} {cx-15},{cy+15} T{cx-15},{cy+30}"
         svg_parts.append(f'<path d="{d_cable}" stroke="orange" stroke-width="3" fill="none" />')
         svg_parts.append(f'<circle cx="{cx}" cy="{cy}" r="3" fill="orange" />')
+        bbox_extend(bbox, (cx - 18, cy - 3, cx + 18, cy + 30))
         
     # Crank
-    if s.get('vr_type') == "Manuel":
+    if s.get('vr_type') == "Manuel" and keep(font_dim, LOD_FULL):
         side = s.get('vr_crank_side', 'Droite')
         offset = 15 if side == "Droite" else -15 
         cx = (dw - (coulisse_w/2)) if side == "Droite" else (coulisse_w/2)
@@ -4812,44 +4899,59 @@ def generate_svg_volet():
         text_y = cy_top + (l_vis / 2)
         svg_parts.append(f'<text x="{text_x}" y="{text_y}" text-anchor="middle" transform="rotate(-90, {text_x}, {text_y})" font-family="sans-serif" font-size="{font_dim}" fill="#444">{l_mm}</text>')
         svg_parts.append(f'<line x1="{rod_x}" y1="{cy_top}" x2="{dim_x}" y2="{cy_top}" stroke="#ccc" stroke-dasharray="2,2" />')
+        bbox_extend(bbox, (min(rod_x - 13, dim_x - ts), cy_top, max(rod_x + 13, dim_x + ts), cy_bot + 13))
+        bbox_extend(bbox, text_bbox(text_x, text_y, l_mm, font_dim, rotation=-90, baseline="alphabetic"))
 
     # Box X cross
-    svg_parts.append(f'<line x1="0" y1="0" x2="{dw}" y2="{coffre_h}" stroke="#ccc" />')
-    svg_parts.append(f'<line x1="0" y1="{coffre_h}" x2="{dw}" y2="0" stroke="#ccc" />')
+    if keep(coffre_h, LOD_SCHEMATIC):
+        svg_parts.append(f'<line x1="0" y1="0" x2="{dw}" y2="{coffre_h}" stroke="#ccc" />')
+        svg_parts.append(f'<line x1="0" y1="{coffre_h}" x2="{dw}" y2="0" stroke="#ccc" />')
     
     # 4. Dimensions Arrows (FIXED PROPORTIONS)
-    # Width (Bottom)
-    dim_y_w = dh + (font_dim * 3.5) # Pushed down (was 2)
-    svg_parts.append(f'<line x1="0" y1="{dim_y_w}" x2="{dw}" y2="{dim_y_w}" stroke="black" />')
-    # Width Ticks
-    svg_parts.append(f'<path d="M{tick_size},{dim_y_w-tick_size} L0,{dim_y_w} L{tick_size},{dim_y_w+tick_size}" fill="none" stroke="black" />')
-    svg_parts.append(f'<path d="M{dw-tick_size},{dim_y_w-tick_size} L{dw},{dim_y_w} L{dw-tick_size},{dim_y_w+tick_size}" fill="none" stroke="black" />')
-    # Width Text
-    svg_parts.append(f'<text x="{dw/2}" y="{dim_y_w - text_offset}" text-anchor="middle" font-family="sans-serif" font-size="{font_dim*1.2}">{int(w)} mm</text>')
-    
-    # Height (Left)
-    dim_x_h = -(font_dim * 3.5) # Pushed left (was 2)
-    svg_parts.append(f'<line x1="{dim_x_h}" y1="0" x2="{dim_x_h}" y2="{dh}" stroke="black" />')
-    # Height Ticks
-    svg_parts.append(f'<path d="M{dim_x_h-tick_size},{tick_size} L{dim_x_h},0 L{dim_x_h+tick_size},{tick_size}" fill="none" stroke="black" />')
-    svg_parts.append(f'<path d="M{dim_x_h-tick_size},{dh-tick_size} L{dim_x_h},{dh} L{dim_x_h+tick_size},{dh-tick_size}" fill="none" stroke="black" />')
-    # Height Text
-    svg_parts.append(f'<text x="{dim_x_h - text_offset}" y="{dh/2}" text-anchor="middle" transform="rotate(-90, {dim_x_h - text_offset}, {dh/2})" font-family="sans-serif" font-size="{font_dim*1.2}">{int(h)} mm</text>')
-    
-    # Projection lines for dimensions
-    # Vertical projections for Width Dim
-    svg_parts.append(f'<line x1="0" y1="{dh}" x2="0" y2="{dim_y_w}" stroke="#ccc" stroke-dasharray="4,4" />')
-    svg_parts.append(f'<line x1="{dw}" y1="{dh}" x2="{dw}" y2="{dim_y_w}" stroke="#ccc" stroke-dasharray="4,4" />')
-    # Horizontal projections for Height Dim
-    svg_parts.append(f'<line x1="0" y1="0" x2="{dim_x_h}" y2="0" stroke="#ccc" stroke-dasharray="4,4" />')
-    svg_parts.append(f'<line x1="0" y1="{dh}" x2="{dim_x_h}" y2="{dh}" stroke="#ccc" stroke-dasharray="4,4" />')
+    if keep(font_dim, LOD_FULL):
+        # Piste de cote mesurée : écart texte + hauteur des chiffres + jeu
+        dim_track = text_offset + FONT_ASCENT * font_dim * 1.2 + font_dim * 0.5
+        # Width (Bottom)
+        dim_y_w = dh + dim_track
+        svg_parts.append(f'<line x1="0" y1="{dim_y_w}" x2="{dw}" y2="{dim_y_w}" stroke="black" />')
+        # Width Ticks
+        svg_parts.append(f'<path d="M{tick_size},{dim_y_w-tick_size} L0,{dim_y_w} L{tick_size},{dim_y_w+tick_size}" fill="none" stroke="black" />')
+        svg_parts.append(f'<path d="M{dw-tick_size},{dim_y_w-tick_size} L{dw},{dim_y_w} L{dw-tick_size},{dim_y_w+tick_size}" fill="none" stroke="black" />')
+        # Width Text
+        svg_parts.append(f'<text x="{dw/2}" y="{dim_y_w - text_offset}" text-anchor="middle" font-family="sans-serif" font-size="{font_dim*1.2}">{int(w)} mm</text>')
+        bbox_extend(bbox, (0, dim_y_w - tick_size, dw, dim_y_w + tick_size))
+        bbox_extend(bbox, text_bbox(dw/2, dim_y_w - text_offset, f"{int(w)} mm", font_dim*1.2, baseline="alphabetic"))
+    
+        # Height (Left)
+        dim_x_h = -dim_track
+        svg_parts.append(f'<line x1="{dim_x_h}" y1="0" x2="{dim_x_h}" y2="{dh}" stroke="black" />')
+        # Height Ticks
+        svg_parts.append(f'<path d="M{dim_x_h-tick_size},{tick_size} L{dim_x_h},0 L{dim_x_h+tick_size},{tick_size}" fill="none" stroke="black" />')
+        svg_parts.append(f'<path d="M{dim_x_h-tick_size},{dh-tick_size} L{dim_x_h},{dh} L{dim_x_h+tick_size},{dh-tick_size}" fill="none" stroke="black" />')
+        # Height Text
+        svg_parts.append(f'<text x="{dim_x_h - text_offset}" y="{dh/2}" text-anchor="middle" transform="rotate(-90, {dim_x_h - text_offset}, {dh/2})" font-family="sans-serif" font-size="{font_dim*1.2}">{int(h)} mm</text>')
+        bbox_extend(bbox, (dim_x_h - tick_size, 0, dim_x_h + tick_size, dh))
+        bbox_extend(bbox, text_bbox(dim_x_h - text_offset, dh/2, f"{int(h)} mm", font_dim*1.2, rotation=-90, baseline="alphabetic"))
+    
+        # Projection lines for dimensions
+        # Vertical projections for Width Dim
+        svg_parts.append(f'<line x1="0" y1="{dh}" x2="0" y2="{dim_y_w}" stroke="#ccc" stroke-dasharray="4,4" />')
+        svg_parts.append(f'<line x1="{dw}" y1="{dh}" x2="{dw}" y2="{dim_y_w}" stroke="#ccc" stroke-dasharray="4,4" />')
+        # Horizontal projections for Height Dim
+        svg_parts.append(f'<line x1="0" y1="0" x2="{dim_x_h}" y2="0" stroke="#ccc" stroke-dasharray="4,4" />')
+        svg_parts.append(f'<line x1="0" y1="{dh}" x2="{dim_x_h}" y2="{dh}" stroke="#ccc" stroke-dasharray="4,4" />')
     
     svg_parts.append('</g>')
     
+    pad = font_dim * 0.5
+    vb_x, vb_y = bbox[0] - pad, bbox[1] - pad
+    vb_w, vb_h = (bbox[2] - bbox[0]) + 2 * pad, (bbox[3] - bbox[1]) + 2 * pad
+    
     return f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{vb_x} {vb_y} {vb_w} {vb_h}" style="background-color:white;">{"".join(svg_parts)}</svg>'
 
-def render_html_volet(s, svg_string, logo_b64):
+def render_html_volet(s, svg_string, logo_src, stylesheet_href=None):
     """Génération HTML pour Volet Roulant"""
+    s = fiche_templates.StateView(s)  # une lecture du proxy st.session_state par clé
     
     # Pre-calc Observations
     obs_vr_html = ""
@@ -4863,42 +4965,6 @@ def render_html_volet(s, svg_string, logo_b64):
             </div>
         """
 
-    css = """
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
-        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
-        .page-container { max-width: 210mm; margin: 0 auto; padding: 20px; }
-        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
-        .header-left img { max-height: 70px; width: auto; }
-        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
-        .header-right { text-align: right; padding-right: 5px; }
-        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
-        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
-        .header-right .date { font-size: 11px; color: #666; }
-        
-        .section-block { margin-bottom: 25px; break-inside: avoid; }
-        h3 { font-size: 15px; color: #2c3e50; margin: 0 0 12px 0; border-left: 5px solid #3498db; padding-left: 10px; line-height: 1.2; text-transform: uppercase; letter-spacing: 0.5px; }
-        
-        .panel { background: #fdfdfd; padding: 15px; border: 1px solid #eee; border-radius: 4px; font-size: 11px; }
-        .panel-row { display: flex; justify-content: space-between; align-items: center; padding: 5px 0; border-bottom: 1px dotted #ccc; height: 26px; }
-        .panel-row:last-child { border-bottom: none; }
-        .panel-row .lbl { font-weight: bold; color: #444; width: 40%; display: flex; align-items: center; }
-        .panel-row .val { font-weight: normal; color: #000; text-align: right; width: 60%; display: flex; align-items: center; justify-content: flex-end; }
-        
-        .visual-box { border: 1px solid #eee; margin-top: 20px; display: flex; flex-direction: column; align-items: center; justify-content: center; position: relative; width: 100%; height: auto; min-height: 500px; padding: 20px 0 40px 0; }
-        .visual-box svg { height: auto; width: auto; max-width: 95%; max-height: 450px; }
-        
-        .footer { position: fixed; bottom: 5mm; left: 0; right: 0; font-size: 9px; color: #999; text-align: center; }
-
-        @media print {
-            @page { size: A4; margin: 12mm; }
-            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
-            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; }
-            h3 { break-after: avoid; }
-            .page-break { page-break-before: always; padding-top: 30px; }
-        }
-    </style>
-    """
     
     # Pre-calc Observations
     obs_vr_html = ""
@@ -4914,8 +4980,8 @@ def render_html_volet(s, svg_string, logo_b64):
 
     # Logo
     logo_html = "<h1>Fiche Technique</h1>"
-    if logo_b64:
-        logo_html = f'<img src="data:image/jpeg;base64,{logo_b64}" alt="Logo">'
+    if logo_src:
+        logo_html = f'<img src="{logo_src}" alt="Logo">'
     
     ref_id = s.get('ref_id', 'VR-01')
     import datetime
@@ -4935,73 +5001,13 @@ def render_html_volet(s, svg_string, logo_b64):
                     <div class="panel-row"><span class="lbl">Longueur Manivelle</span> <span class="val">{s.get('vr_crank_len', '-')} mm</span></div>
         """
 
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>{css}</head>
-    <body>
-        <div class="page-container">
-            <!-- HEADER -->
-            <div class="header">
-                <div class="header-left">
-                    {logo_html}
-                    <div class="subtitle">Volet Roulant {s.get('vr_mat', 'Aluminium')}</div>
-                </div>
-                <div class="header-right">
-                    <div class="label">RÉFÉRENCE CHANTIER</div>
-                    <div class="ref">{ref_id}</div>
-                    <div class="date">{datetime.datetime.now().strftime('%d/%m/%Y')}</div>
-                </div>
-            </div>
-            
-            <!-- INFORMATIONS -->
-            <div class="section-block">
-                <h3>Informations Générales</h3>
-                <div class="panel">
-                    <div class="panel-row"><span class="lbl">Repère</span> <span class="val">{ref_id}</span></div>
-                    <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{s.get('vr_qte', 1)}</span></div>
-                    <div class="panel-row"><span class="lbl">Type de Coffre</span> <span class="val">{s.get('vr_type_coffre', '-')}</span></div>
-                    <div class="panel-row"><span class="lbl">Type de côtes</span> <span class="val">{s.get('vr_dim_type', 'Côtes Tableau')}</span></div>
-                    <div class="panel-row"><span class="lbl">Dimensions</span> <span class="val">L {s.get('vr_width', 0)} x H {s.get('vr_height', 0)} mm{" + enroulement" if s.get('vr_add_winding') else ""}</span></div>
-                </div>
-            </div>
-
-            <!-- DETAILS TECHNIQUES -->
-            <div class="section-block">
-                <h3>Détails Techniques</h3>
-                <div class="panel">
-                    <div class="panel-row"><span class="lbl">Couleur Coffre</span> <span class="val">{s.get('vr_col_coffre', '-')}</span></div>
-                    <div class="panel-row"><span class="lbl">Couleur Coulisses</span> <span class="val">{s.get('vr_col_coulisses', '-')}</span></div>
-                    <div class="panel-row"><span class="lbl">Couleur Tablier</span> <span class="val">{s.get('vr_col_tablier', '-')}</span></div>
-                    <div class="panel-row"><span class="lbl">Couleur Lame Finale</span> <span class="val">{s.get('vr_col_lame_fin', '-')}</span></div>
-                    
-                    <div class="panel-row" style="border-top: 2px solid #eee; margin-top: 5px; padding-top: 5px;"><span class="lbl">Type de Manoeuvre</span> <span class="val">{s.get('vr_type', 'Manuel')}</span></div>
-                    
-                    {motor_details_html}
-                </div>
-            </div>
-            
-            <!-- PLAN -->
-            <div class="section-block">
-                <h3>Schéma Technique</h3>
-                <div class="visual-box">
-                    {svg_string}
-                    <div style="position:absolute; bottom:10px; font-size:10px; color:#aaa;">Vue Extérieure - {s.get('vr_dim_type')}</div>
-                </div>
-            </div>
-
-            <!-- OBSERVATIONS -->
-            <!-- OBSERVATIONS -->
-            {obs_vr_html}
-            
-            <div class="footer">
-                Document généré automatiquement - Miroiterie Yerroise
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return html
+    # Gabarit compilé (fiche_templates) : CSS et mise en page ne sont plus reconstruits à chaque appel
+    values = {
+        'logo': logo_html, 'date': datetime.datetime.now().strftime('%d/%m/%Y'), 'ref': ref_id,
+        'winding': " + enroulement" if s.get('vr_add_winding') else "",
+        'motor_details': motor_details_html, 'svg': svg_string, 'observations': obs_vr_html,
+    }
+    return fiche_templates.render_fiche('volet', values, s, stylesheet_href)
 
 # --- MODULE HABILLAGE (INTÉGRÉ) ---
 # ==============================================================================
@@ -5352,9 +5358,9 @@ def render_vitrage_form():
 
 
 
-def generate_svg_vitrage():
-    """Génère le dessin SVG Vitrage (Style Menuiserie V73) - V7 White + Axis Dims"""
-    s = st.session_state
+def generate_svg_vitrage(lod=LOD_FULL, target_px=None, state=None):
+    """Génère le dessin SVG Vitrage (Style Menuiserie V73) - V7 White + Axis Dims (lod / target_px : cf. lod_keep)"""
+    s = st.session_state if state is None else state
     
     # 1. Setup Canvas
     w_mm = s.get('vit_width', 1000)
@@ -5363,7 +5369,12 @@ def generate_svg_vitrage():
     # V76 FIX: Dynamic Font
     max_dim = max(w_mm, h_mm)
     font_dim = max(16, int(max_dim * 0.025))
-
+    
+    px_per_unit = (target_px / w_mm) if target_px else None
+    def keep(size, level):
+        return lod_keep(size, level, lod, px_per_unit)
+    # Cotes (de forme, d'usinage, globales) : niveau "full" et texte lisible
+    draw_dims = keep(font_dim, LOD_FULL)
     
     # Layers (Z-Index equivalent via sort)
     # 0: BG, 10: Frame, 20: Glass, 30: Petit Bois/Usi, 40: Dims
@@ -5382,6 +5393,7 @@ def generate_svg_vitrage():
     }
 
     def add_smart_dim(edge, val, x1, y1, x2, y2, color="blue", label="", avoid_pt=None):
+        if not draw_dims: return
         dim_buckets[edge].append({
             "val": val, 
             "pts": (x1, y1, x2, y2),
@@ -5390,11 +5402,22 @@ def generate_svg_vitrage():
             "avoid": avoid_pt
         })
 
+    # HELPER: Libellé de cote et encombrement du texte selon la normale du trait
+    def dim_label(label_prefix, val):
+        suffix = " mm" if "Axe" in label_prefix else ""
+        return f"{label_prefix}{val:.0f}{suffix}"
+
+    def label_depth(txt, nx, ny):
+        # Texte toujours horizontal : largeur sur X, hauteur de ligne sur Y
+        tw = measure_text(txt, font_dim, "bold")
+        th = (FONT_ASCENT + FONT_DESCENT) * font_dim
+        return abs(nx) * tw + abs(ny) * th
+
     # HELPER: Draw Dimension (Low Level) - V79 Dynamic
     def draw_dim(x1, y1, x2, y2, val, offset=50, color="blue", label_prefix="", avoid_point=None):
         import math
         d = math.sqrt((x2-x1)**2 + (y2-y1)**2)
-        if d == 0: return ""
+        if d == 0 or not draw_dims: return ""
         ux, uy = (x2-x1)/d, (y2-y1)/d
         nx, ny = -uy, ux # Initial Normal
         
@@ -5430,15 +5453,18 @@ def generate_svg_vitrage():
         mx_dim, my_dim = (ax+bx)/2, (ay+by)/2
         
         sign_off = 1 if offset >= 0 else -1
-        txt_gap = font_dim * 0.6 
+        txt_gap = font_dim * 0.3
         
-        tx = mx_dim + nx * (sign_off * txt_gap)
-        ty = my_dim + ny * (sign_off * txt_gap)
+        # Texte horizontal : son bord le plus proche est à txt_gap du trait (largeur mesurée)
+        txt = dim_label(label_prefix, val)
+        txt_depth = label_depth(txt, nx, ny)
+        tx = mx_dim + nx * (sign_off * (txt_gap + txt_depth / 2))
+        ty = my_dim + ny * (sign_off * (txt_gap + txt_depth / 2))
         
-        suffix = ""
-        if "Axe" in label_prefix: suffix = " mm"
+        out += f'<text x="{tx}" y="{ty}" fill="{color}" font-size="{font_dim}" font-weight="bold" text-anchor="middle" dominant-baseline="middle" transform="rotate(0, {mx_dim}, {my_dim})" paint-order="stroke" stroke="white" stroke-width="3">{txt}</text>'
         
-        out += f'<text x="{tx}" y="{ty}" fill="{color}" font-size="{font_dim}" font-weight="bold" text-anchor="middle" dominant-baseline="middle" transform="rotate(0, {mx_dim}, {my_dim})" paint-order="stroke" stroke="white" stroke-width="3">{label_prefix}{val:.0f}{suffix}</text>'
+        bbox_extend(bbox, (min(ax, bx) - mk_len, min(ay, by) - mk_len, max(ax, bx) + mk_len, max(ay, by) + mk_len))
+        bbox_extend(bbox, text_bbox(tx, ty, txt, font_dim, "bold"))
         return out
 
     # 2. Logic: Glass Only?
@@ -5451,18 +5477,10 @@ def generate_svg_vitrage():
     # Origin is (0,0) inside the SVG, but we use ViewBox to shift margins
     # The Object (Glass/Frame) starts at (0,0) in our coordinate system
     
-    # Dynamic Margins for ViewBox - INCREASED AGAIN for Extreme Sizes
-    margin_safe = font_dim * 10.0 
-    
     x0, y0 = 0, 0 # Object Start
     
-    # ViewBox definition
-    # Left/Top needs negative margin to show dimensions
-    vb_x = -margin_safe
-    vb_y = -margin_safe
-    # Width/Height extends beyond object size
-    vb_w = w_mm + (margin_safe * 2)
-    vb_h = h_mm + (margin_safe * 2)
+    # Emprise réelle (objet + cotes + libellés) : la ViewBox est calculée en fin de dessin
+    bbox = [x0, y0, x0 + w_mm, y0 + h_mm]
 
     
     svg_list = []
@@ -5483,10 +5501,12 @@ def generate_svg_vitrage():
         ow, oh = w_mm + (th_outer*2), h_mm + (th_outer*2)
         
         svg_list.append((z_outer, f'<rect x="{ox}" y="{oy}" width="{ow}" height="{oh}" fill="white" stroke="#999" stroke-width="1" />'))
-        svg_list.append((z_outer, f'<line x1="{ox}" y1="{oy}" x2="{x0}" y2="{y0}" stroke="#aaa" stroke-width="1" />'))
-        svg_list.append((z_outer, f'<line x1="{ox+ow}" y1="{oy}" x2="{x0+w_mm}" y2="{y0}" stroke="#aaa" stroke-width="1" />'))
-        svg_list.append((z_outer, f'<line x1="{ox}" y1="{oy+oh}" x2="{x0}" y2="{y0+h_mm}" stroke="#aaa" stroke-width="1" />'))
-        svg_list.append((z_outer, f'<line x1="{ox+ow}" y1="{oy+oh}" x2="{x0+w_mm}" y2="{y0+h_mm}" stroke="#aaa" stroke-width="1" />'))
+        bbox_extend(bbox, (ox, oy, ox + ow, oy + oh))
+        if keep(th_outer, LOD_SCHEMATIC):
+            svg_list.append((z_outer, f'<line x1="{ox}" y1="{oy}" x2="{x0}" y2="{y0}" stroke="#aaa" stroke-width="1" />'))
+            svg_list.append((z_outer, f'<line x1="{ox+ow}" y1="{oy}" x2="{x0+w_mm}" y2="{y0}" stroke="#aaa" stroke-width="1" />'))
+            svg_list.append((z_outer, f'<line x1="{ox}" y1="{oy+oh}" x2="{x0}" y2="{y0+h_mm}" stroke="#aaa" stroke-width="1" />'))
+            svg_list.append((z_outer, f'<line x1="{ox+ow}" y1="{oy+oh}" x2="{x0+w_mm}" y2="{y0+h_mm}" stroke="#aaa" stroke-width="1" />'))
 
         # Inner Frame
         col_stroke = "#AAA"
@@ -5497,10 +5517,11 @@ def generate_svg_vitrage():
         iw, ih = w_mm - (th_inner*2), h_mm - (th_inner*2)
         
         svg_list.append((z_frame, f'<rect x="{ix}" y="{iy}" width="{iw}" height="{ih}" fill="none" stroke="#555" stroke-width="1" />'))
-        svg_list.append((z_frame, f'<line x1="{x0}" y1="{y0}" x2="{ix}" y2="{iy}" stroke="{col_stroke}" stroke-width="1" />'))
-        svg_list.append((z_frame, f'<line x1="{x0+w_mm}" y1="{y0}" x2="{ix+iw}" y2="{iy}" stroke="{col_stroke}" stroke-width="1" />'))
-        svg_list.append((z_frame, f'<line x1="{x0}" y1="{y0+h_mm}" x2="{ix}" y2="{iy+ih}" stroke="{col_stroke}" stroke-width="1" />'))
-        svg_list.append((z_frame, f'<line x1="{x0+w_mm}" y1="{y0+h_mm}" x2="{ix+iw}" y2="{iy+ih}" stroke="{col_stroke}" stroke-width="1" />'))
+        if keep(th_inner, LOD_SCHEMATIC):
+            svg_list.append((z_frame, f'<line x1="{x0}" y1="{y0}" x2="{ix}" y2="{iy}" stroke="{col_stroke}" stroke-width="1" />'))
+            svg_list.append((z_frame, f'<line x1="{x0+w_mm}" y1="{y0}" x2="{ix+iw}" y2="{iy}" stroke="{col_stroke}" stroke-width="1" />'))
+            svg_list.append((z_frame, f'<line x1="{x0}" y1="{y0+h_mm}" x2="{ix}" y2="{iy+ih}" stroke="{col_stroke}" stroke-width="1" />'))
+            svg_list.append((z_frame, f'<line x1="{x0+w_mm}" y1="{y0+h_mm}" x2="{ix+iw}" y2="{iy+ih}" stroke="{col_stroke}" stroke-width="1" />'))
 
     # 4. Glass & Shapes
     g_fill = "#d6eaff" if s.get('vit_type_mode') != "Panneau" else "#eeeeee"
@@ -5607,9 +5628,12 @@ def generate_svg_vitrage():
                  # Dim Y (Left)
                  add_smart_dim("left", ty, ix, iy, ix, cy, "orange", "Y", None)
 
-             svg_list.append((z_pb, f'<circle cx="{cx}" cy="{cy}" r="{td/2}" fill="white" stroke="red" stroke-width="1" />'))
+             if keep(td, LOD_SCHEMATIC):
+                 svg_list.append((z_pb, f'<circle cx="{cx}" cy="{cy}" r="{td/2}" fill="white" stroke="red" stroke-width="1" />'))
              # V16 Polish: Label Outside & Bigger (Font 20)
+             if not keep(font_dim, LOD_FULL): continue
              svg_list.append((z_pb, f'<text x="{cx}" y="{cy - (td/2) - 15}" font-size="{font_dim}" font-weight="bold" fill="red" text-anchor="middle">Ø{td}</text>'))
+             bbox_extend(bbox, text_bbox(cx, cy - (td/2) - 15, f"Ø{td}", font_dim, "bold", baseline="alphabetic"))
         
         # Encoches
         nb_e = s.get('vit_nb_enc', 0)
@@ -5665,7 +5689,8 @@ def generate_svg_vitrage():
                  add_smart_dim("left", eh, ix, ny, ix, ny+eh, "purple", "H", None)
 
              # V16 Polish: White Fill (Removed Glass)
-             svg_list.append((z_pb, f'<rect x="{nx}" y="{ny}" width="{ew}" height="{eh}" fill="white" stroke="red" stroke-width="1" stroke-dasharray="4" />'))
+             if keep(min(ew, eh), LOD_SCHEMATIC):
+                 svg_list.append((z_pb, f'<rect x="{nx}" y="{ny}" width="{ew}" height="{eh}" fill="white" stroke="red" stroke-width="1" stroke-dasharray="4" />'))
 
         # Mickey 101 (With Side Logic)
         if s.get('vit_mickey_101'):
@@ -5694,7 +5719,9 @@ def generate_svg_vitrage():
                  d_path = f"M {p_start},{y_edge} L {p_start},{y_deep} L {p_end},{y_deep} L {p_end},{y_edge} Z"
 
                  # Cutout (White with Red Border)
+                 if not keep(mickey_h, LOD_SCHEMATIC): return
                  svg_list.append((z_pb, f'<path d="{d_path}" fill="white" stroke="red" stroke-width="2" />'))
+                 if not keep(10, LOD_FULL): return
                  
                  # Holes Layout (Symmetric 35mm from ends)
                  x_h1 = p_start + 35
@@ -5751,13 +5778,14 @@ def generate_svg_vitrage():
             step_h = ih / (nb_h + 1)
             for i in range(nb_h):
                 py = iy + step_h * (i + 1) - (thick/2)
-                svg_list.append((z_pb, f'<rect x="{ix}" y="{py}" width="{iw}" height="{thick}" fill="white" stroke="#ccc" />'))
-                if i == 0:
+                if keep(thick, LOD_SCHEMATIC):
+                    svg_list.append((z_pb, f'<rect x="{ix}" y="{py}" width="{iw}" height="{thick}" fill="white" stroke="#ccc" />'))
+                if i == 0 and draw_dims:
                      h_gap = step_h
                      # Anchor to Inner Right but push OUTSIDE Outer Frame
                      dx_ref = x0 + w_mm + th_outer
                      # Dynamic Offset and Font Size (V79: Increase offset to be clearly outside)
-                     draw_dimension_line(svg_list, dx_ref, iy, dx_ref, iy + h_gap, int(h_gap), "", font_dim * 4.0, "V", font_dim, z_dim)
+                     draw_dimension_line(svg_list, dx_ref, iy, dx_ref, iy + h_gap, int(h_gap), "", font_dim * 4.0, "V", font_dim, z_dim, bbox=bbox)
 
 
 
@@ -5765,11 +5793,12 @@ def generate_svg_vitrage():
             step_v = iw / (nb_v + 1)
             for i in range(nb_v):
                 px = ix + step_v * (i + 1) - (thick/2)
-                svg_list.append((z_pb, f'<rect x="{px}" y="{iy}" width="{thick}" height="{ih}" fill="white" stroke="#ccc" />'))
-                if i == 0:
+                if keep(thick, LOD_SCHEMATIC):
+                    svg_list.append((z_pb, f'<rect x="{px}" y="{iy}" width="{thick}" height="{ih}" fill="white" stroke="#ccc" />'))
+                if i == 0 and draw_dims:
                      w_gap = step_v
                      # Anchor to Inner Top but push OUTSIDE Outer Frame
-                     draw_dimension_line(svg_list, x0+th_inner, y0-th_outer, x0+th_inner+w_gap, y0-th_outer, int(w_gap), "", -(font_dim * 2.5), "H", font_dim, z_dim)
+                     draw_dimension_line(svg_list, x0+th_inner, y0-th_outer, x0+th_inner+w_gap, y0-th_outer, int(w_gap), "", -(font_dim * 2.5), "H", font_dim, z_dim, bbox=bbox)
 
 
     # 6. Global Dimensions (Black/Standard) - RESTORED
@@ -5785,52 +5814,52 @@ def generate_svg_vitrage():
         axis_top = y0 + (th_inner/2)
         axis_bottom = (y0 + h_mm) - (th_inner/2)
     
-    # Width (Global)
-    # Width (Global)
-    draw_dimension_line(svg_list, 
-        axis_left, axis_bottom, 
-        axis_right, axis_bottom, 
-        int(w_mm), 
-        "", font_dim * 3.5, "H", font_dim, z_dim, leader_fixed_start=axis_bottom)
-    
-    # Height (Global)
-    draw_dimension_line(svg_list, 
-        axis_left, axis_top, 
-        axis_left, axis_bottom, 
-        int(h_mm), 
-        "", font_dim * 3.5, "V", font_dim, z_dim, leader_fixed_start=axis_left)
-    
-    # NO Cleanup of these dims. User wants them.
-
     # 6.5 Render Smart Dims
     # Process Buckets
     
-    # Config: Base distance + Step
-    # Config: Base distance + Step
-    # Config: Base distance + Step
-    # DYNAMIC SPACING
+    # DYNAMIC SPACING : pistes par rang, profondeur = libellé mesuré le plus encombrant du rang
     base_dist = font_dim * 1.5
-    step_dist = font_dim * 1.5
+    mk_len = font_dim * 0.5
+    txt_gap = font_dim * 0.3
+    
+    def bucket_ranks(bucket_list):
+        # Rang = ordre croissant des valeurs (Force Float conversion for correct numerical sorting)
+        vals = []
+        for b in bucket_list:
+            try:
+                vals.append(float(b['val']))
+            except:
+                pass
+        unique_vals = sorted(list(set(vals)))
+        return {v: i for i, v in enumerate(unique_vals)}
+    
+    def bucket_layout(bucket_list, vertical):
+        """Offsets par rang d'un bucket (depuis le bord du vitrage)."""
+        val_rank = bucket_ranks(bucket_list)
+        n_ranks = len(val_rank) + 1 # +1 : rang de repli des valeurs non numériques
+        depths = [0.0] * n_ranks
+        for item in bucket_list:
+            try:
+                v = float(item['val'])
+            except:
+                v = item['val']
+            rank = val_rank.get(v, len(val_rank))
+            txt = dim_label(item['label'], v)
+            depths[rank] = max(depths[rank], label_depth(txt, 1 if vertical else 0, 0 if vertical else 1))
+        offsets = []
+        off = base_dist
+        for d in depths:
+            offsets.append(off)
+            if d > 0:
+                off += txt_gap + d + font_dim * 0.2 + mk_len
+        return val_rank, offsets
     
     # Helper to process a bucket
     def render_bucket(edge_name, bucket_list, sign_direction):
         if not bucket_list: return
         
-        # 1. Unique Values & Sort
-        # Force Float conversion for correct numerical sorting
-        try:
-            vals = []
-            for b in bucket_list:
-                try:
-                    vals.append(float(b['val']))
-                except:
-                    pass
-            unique_vals = sorted(list(set(vals)))
-        except:
-             unique_vals = sorted(list(set([b['val'] for b in bucket_list])))
-        
-        # 2. Assign Rank Map
-        val_rank = {v: i for i, v in enumerate(unique_vals)}
+        vertical = edge_name in ("left", "right")
+        val_rank, offsets = bucket_layout(bucket_list, vertical)
         
         # 3. Draw
         for item in bucket_list:
@@ -5841,7 +5870,7 @@ def generate_svg_vitrage():
             except:
                 v = v_orig
             
-            rank = val_rank.get(v, len(unique_vals)) # Default to end if missing
+            rank = val_rank.get(v, len(val_rank)) # Default to end if missing
             pts = item['pts']
             
             # NORMALIZE VECTORS for Consistent Normals
@@ -5860,8 +5889,7 @@ def generate_svg_vitrage():
                     x1, y1, x2, y2 = x2, y2, x1, y1
             
             # Calculate Offset
-            scalar_off = (base_dist + (rank * step_dist))
-            final_off = scalar_off * sign_direction
+            final_off = offsets[rank] * sign_direction
             
             svg_list.append((z_dim, draw_dim(x1, y1, x2, y2, v, final_off, item['color'], item['label'], item['avoid'])))
 
@@ -5871,16 +5899,43 @@ def generate_svg_vitrage():
     render_bucket("left", dim_buckets["left"], -1)      # Left (Out)
     render_bucket("right", dim_buckets["right"], 1)     # Right (Out)
 
+    if draw_dims:
+        # Global Dimensions : piste juste au-delà de l'emprise déjà dessinée (cadre, cotes de forme et d'usinage)
+        edge_bottom = bbox[3]
+        edge_left = bbox[0]
+    
+        # Width (Global)
+        draw_dimension_line(svg_list, 
+            axis_left, axis_bottom, 
+            axis_right, axis_bottom, 
+            int(w_mm), 
+            "", (edge_bottom - axis_bottom) + dimension_track(font_dim), "H", font_dim, z_dim, leader_fixed_start=axis_bottom, bbox=bbox)
+    
+        # Height (Global)
+        draw_dimension_line(svg_list, 
+            axis_left, axis_top, 
+            axis_left, axis_bottom, 
+            int(h_mm), 
+            "", (axis_left - edge_left) + dimension_track(font_dim), "V", font_dim, z_dim, leader_fixed_start=axis_left, bbox=bbox)
+    
+    # NO Cleanup of these dims. User wants them.
+
     # 7. Render
     svg_list.sort(key=lambda x: x[0])
     content = "".join([item[1] for item in svg_list])
     
+    # ViewBox ajustée sur l'emprise mesurée
+    pad = font_dim * 0.5
+    vb_x, vb_y = bbox[0] - pad, bbox[1] - pad
+    vb_w, vb_h = (bbox[2] - bbox[0]) + 2 * pad, (bbox[3] - bbox[1]) + 2 * pad
+    
     return f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{vb_x} {vb_y} {vb_w} {vb_h}" width="100%" height="100%" preserveAspectRatio="xMidYMid meet" style="background-color:white;">{content}</svg>'
 
 
 
-def render_html_vitrage(s, svg_string, logo_b64):
+def render_html_vitrage(s, svg_string, logo_src, stylesheet_href=None):
     """HTML Export for Vitrage"""
+    s = fiche_templates.StateView(s)  # une lecture du proxy st.session_state par clé
     obs_html = ""
     if s.get('vit_obs'):
         obs_html = f"""
@@ -5934,131 +5989,17 @@ def render_html_vitrage(s, svg_string, logo_b64):
 
     vit_resume = reconstruct_vit_string(s)
     
-    # V75 ROBUSTNESS: Use the same styles as Menuiserie
-    css = """
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
-        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
-        
-        .page-container { 
-            max-width: 210mm; 
-            margin: 0 auto; 
-            padding: 20px;
-        }
-
-        /* HEADER */
-        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
-        .header-left img { max-height: 70px; width: auto; }
-        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
-        
-        .header-right { text-align: right; padding-right: 5px; }
-        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
-        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
-        .header-right .date { font-size: 11px; color: #666; }
-
-        /* STACKED LAYOUT (Sections) */
-        .section-block { margin-bottom: 25px; break-inside: avoid; }
-        
-        /* HEADINGS */
-        h3 { 
-            font-size: 15px; color: #2c3e50; margin: 0 0 12px 0; 
-            border-left: 5px solid #3498db; padding-left: 10px; 
-            line-height: 1.2; text-transform: uppercase; letter-spacing: 0.5px;
-        }
-        
-        /* PANELS */
-        .panel { background: #fdfdfd; padding: 15px; border: 1px solid #eee; border-radius: 4px; font-size: 11px; }
-        .panel-row { display: flex; justify-content: space-between; padding: 6px 0; border-bottom: 1px dotted #ccc; }
-        .panel-row:last-child { border-bottom: none; }
-        .panel-row .lbl { font-weight: bold; color: #444; width: 40%; }
-        .panel-row .val { font-weight: normal; color: #000; text-align: right; width: 60%; }
-        
-        /* ZONES TABLE (Full Width) */
-        table { width: 100%; border-collapse: collapse; font-size: 12px; margin-top: 5px; }
-        th { background: #cfd8dc; color: #2c3e50; padding: 6px; text-align: left; text-transform: uppercase; font-size: 10px; }
-        td { border-bottom: 1px solid #eee; padding: 8px 12px; color: #333; line-height: 1.4; }
-        tr:nth-child(even) { background-color: #f9f9f9; }
-
-        /* BOTTOM SECTION (PLAN) */
-        .visual-box {
-            border: none; margin-top: 20px;
-            display: flex; flex-direction: column; align-items: center; justify-content: center;
-            position: relative;
-            width: 100%; height: 600px; /* Reduced height for Vitrage to fit page */
-            page-break-inside: avoid;
-        }
-        .visual-box svg { height: 100%; width: auto; max-width: 98%; }
-        
-        .footer { 
-            position: fixed; bottom: 10mm; left: 0; right: 0;
-            font-size: 9px; color: #999; text-align: center; 
-        }
-
-        @media print {
-            @page { size: A4; margin: 12mm; }
-            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
-            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; }
-            .no-print { display: none; }
-            h3 { break-after: avoid; }
-        }
-    </style>
-    """
     
-    logo_html = f'<img src="data:image/png;base64,{logo_b64}">' if logo_b64 else ""
+    logo_html = f'<img src="{logo_src}">' if logo_src else ""
 
     import datetime
 
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>{css}</head>
-    <body>
-        <div class="page-container">
-            <!-- HEADER -->
-            <div class="header">
-                <div class="header-left">
-                    {logo_html}
-                    <div class="subtitle">Fiche Vitrage</div>
-                </div>
-                <div class="header-right">
-                    <div class="label">RÉFÉRENCE</div>
-                    <div class="ref">{s.get('vit_ref', 'V-??')}</div>
-                    <div class="date">{datetime.datetime.now().strftime('%d/%m/%Y')}</div>
-                </div>
-            </div>
-            
-            <div class="section-block">
-                <h3>Caractéristiques</h3>
-                <div class="panel">
-                    <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{s.get('vit_qte', 1)}</span></div>
-                    <div class="panel-row"><span class="lbl">Matériau</span> <span class="val">{s.get('vit_mat')}</span></div>
-                    <div class="panel-row"><span class="lbl">Type Châssis</span> <span class="val">{s.get('vit_type_chassis')}</span></div>
-                    <div class="panel-row"><span class="lbl">Dimensions</span> <span class="val">{s.get('vit_width')} x {s.get('vit_height')} mm</span></div>
-                    <div class="panel-row"><span class="lbl">H. Bas</span> <span class="val">{s.get('vit_h_bas', 0)} mm</span></div>
-                    <div class="panel-row"><span class="lbl">Type Côtes</span> <span class="val">{s.get('vit_dim_type')}</span></div>
-                    <div class="panel-row"><span class="lbl">Verre</span> <span class="val">{vit_resume}</span></div>
-                    <div class="panel-row"><span class="lbl">H. Bas Verre</span> <span class="val">{s.get('vit_h_bas')} mm</span></div>
-                </div>
-            </div>
-            
-            <div class="section-block">
-                <h3>Plan Technique</h3>
-                <div class="visual-box">
-                    {svg_string}
-                </div>
-            </div>
-            
-            {obs_html}
-            
-            <div class="footer">
-                Document généré automatiquement - Miroiterie Yerroise
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-
-    return html
+    # Gabarit compilé (fiche_templates) : CSS et mise en page ne sont plus reconstruits à chaque appel
+    values = {
+        'logo': logo_html, 'date': datetime.datetime.now().strftime('%d/%m/%Y'), 'vit_resume': vit_resume,
+        'svg': svg_string, 'observations': obs_html,
+    }
+    return fiche_templates.render_fiche('vitrage', values, s, stylesheet_href)
 
 
 # V73: BASE DE DONNEES DES ANNEXES
@@ -6098,6 +6039,196 @@ ANNEXES_DB = {
     }
 }
 
+# --- MANIFESTE DES RESSOURCES ---
+# Un seul parcours de assets/ par processus (asset_manifest.py) : les rendus ne touchent
+# plus au disque pour savoir si une annexe ou un schéma existe.
+
+def annex_names():
+    """Noms des annexes de ANNEXES_DB (toutes matières, sans doublon)."""
+    names = []
+    def walk(node):
+        if isinstance(node, dict):
+            for child in node.values():
+                walk(child)
+        else:
+            names.extend(node)
+    walk(ANNEXES_DB)
+    return list(dict.fromkeys(names))
+
+def referenced_assets():
+    """Tous les fichiers de assets/ que le code référence : annexes, schémas d'habillage, logo."""
+    names = annex_names()
+    names += [prof['image_key'] for prof in PROFILES_DB.values() if prof.get('image_key')]
+    # Logo : le fichier retenu parmi les candidats (les autres ne manquent pas)
+    names += [os.path.basename(LOGO.path) if LOGO else brand_assets.BRAND_ASSETS['logo'][0]]
+    return list(dict.fromkeys(names))
+
+@st.cache_resource(show_spinner=False)
+def get_asset_manifest():
+    import asset_manifest
+    return asset_manifest.build_manifest(referenced_assets(), ARTIFACT_DIR)
+
+def render_asset_diagnostics():
+    """Diagnostic des ressources (menu Options) : manquantes signalées ici, pas à chaque rendu."""
+    manifest = get_asset_manifest()
+    missing = manifest.missing()
+    st.caption(f"{len(manifest.records)} ressources référencées, {len(missing)} manquante(s), "
+               f"{len(manifest.unreferenced)} fichier(s) non référencé(s) (manifeste construit en {manifest.seconds * 1000:.0f} ms)")
+    for name in missing:
+        st.caption(f"❌ {name}")
+    for error in annex_links_errors():
+        st.caption(f"⚠️ {error}")
+    if st.button("🔄 Relire le dossier assets", use_container_width=True):
+        get_asset_manifest.clear()
+        st.rerun()
+
+# --- ANNEXES PAGE PAR PAGE ---
+# Catalogues découpés une fois par empreinte (annex_pages.py) : grille de vignettes chargées
+# à la demande par le navigateur, chaque page s'ouvre seule sans le document entier.
+ANNEX_GRID_COLS = 6
+
+def get_annex_pages(record):
+    """Pages découpées du catalogue (construites à la première ouverture), None en repli."""
+    if not record.exists or not st.get_option("server.enableStaticServing"):
+        return None
+    return _annex_pages(record.path, record.sha)
+
+def loaded_annex_pages(record):
+    """Pages déjà découpées (lecture de index.json seulement, jamais de découpage), None sinon.
+
+    Pour les raccourcis (recherche, pages utiles, diagnostic) : afficher un lien ne doit
+    pas découper un catalogue ; le découpage se fait à l'ouverture ou par annex_pages.py.
+    Lu une fois par (chemin, empreinte), comme _annex_pages : pas d'accès disque par rerun.
+    """
+    if not record.exists or not st.get_option("server.enableStaticServing"):
+        return None
+    return _loaded_annex_pages(record.path, record.sha)
+
+@st.cache_resource(show_spinner=False)
+def _loaded_annex_pages(path, sha):
+    import annex_pages
+    return annex_pages.load_pages(path, sha=sha)
+
+@st.cache_resource(show_spinner=False)
+def _annex_pages(path, sha):
+    import annex_pages
+    try:
+        pages = annex_pages.build_pages(path, sha=sha)
+    except Exception:
+        return None  # PDF illisible, disque plein... : on garde le document complet
+    # Catalogue découpé : les raccourcis relisent son index.json au prochain rerun
+    _loaded_annex_pages.clear(path, sha)
+    return pages
+
+def annex_grid_html(pages):
+    """Grille de vignettes (loading=lazy) ; chaque vignette ouvre la page seule."""
+    cells = []
+    for no in range(1, pages.count + 1):
+        thumb = pages.thumb_url(no)
+        inner = (f'<img src="{thumb}" loading="lazy" alt="Page {no}" style="width:100%; border:1px solid #ddd;">'
+                 if thumb else f'<div style="padding:30px 0; border:1px solid #ddd; font-size:20px;">{no}</div>')
+        cells.append(f'<a href="{pages.page_url(no)}" target="_blank" style="text-decoration:none; color:inherit; text-align:center;">'
+                     f'{inner}<div style="font-size:12px;">p. {no}</div></a>')
+    return (f'<div style="display:grid; grid-template-columns:repeat({ANNEX_GRID_COLS}, 1fr); gap:8px; '
+            f'max-height:600px; overflow-y:auto;">{"".join(cells)}</div>')
+
+# --- RECHERCHE DANS LES ANNEXES ---
+# Index SQLite FTS5 local (annex_search.py), réindexé seulement si un fichier change.
+
+@st.cache_resource(show_spinner=False)
+def get_annex_index():
+    import annex_search
+    return annex_search.AnnexIndex()
+
+def annex_paths():
+    """Chemins des annexes présentes (d'après le manifeste)."""
+    manifest = get_asset_manifest()
+    return [manifest.path(name) for name in annex_names() if manifest.exists(name)]
+
+def render_annex_search():
+    """Champ de recherche : pages trouvées avec extrait, liées à la page seule si possible."""
+    from html import escape
+    query = st.text_input("🔎 Rechercher dans les annexes", key="annex_search",
+                          placeholder="Référence, profil, détail de pose...")
+    if not query.strip():
+        return
+    index = get_annex_index()
+    try:
+        with st.spinner("Indexation des annexes..."):
+            index.sync(annex_paths())
+        hits = index.search(query)
+    except Exception as e:
+        st.error(f"Recherche indisponible : {e}")
+        return
+    if not hits:
+        st.caption("Aucune page trouvée (les catalogues scannés n'ont pas de texte indexable).")
+        return
+    rows = []
+    for hit in hits:
+        record = get_asset_manifest().get(hit['name'])
+        pages = loaded_annex_pages(record)
+        if pages is not None and hit['page'] <= pages.count:
+            url = pages.page_url(hit['page'])
+        else:
+            # Catalogue pas encore découpé : document complet ouvert à la bonne page
+            url = get_static_file_url(record)
+            url = f"{url}#page={hit['page']}" if url else None
+        label = f"p. {hit['page']}"
+        link = f'<a href="{url}" target="_blank">{label}</a>' if url else label
+        title = escape(hit['name'].replace('.pdf', '').replace('FPEE - ', ''))
+        rows.append(f"<div style='margin-bottom: 6px;'><b>{title}</b> · {link}<br><small>{hit['snippet']}</small></div>")
+    st.markdown("".join(rows), unsafe_allow_html=True)
+
+# --- PAGES UTILES (LIENS PROFONDS) ---
+# Table attributs du repère -> plages de pages (annex_links.py) : ouvre seulement ces pages.
+
+def repere_annex_attrs(s):
+    """Attributs du repère courant utilisés par annex_links."""
+    return {
+        'mat_type': s.get('mat_type', 'PVC'),
+        'pose_type': s.get('pose_type'),
+        'ouvrants': {v for k, v in s.items() if isinstance(k, str) and k.endswith('_t') and v in TYPES_OUVRANTS},
+        'volet': bool(s.get('vr_enable')),
+    }
+
+def annex_links_errors():
+    """Plages de annex_links incohérentes avec les catalogues présents (diagnostic)."""
+    import annex_links
+    counts = {}
+    for name in annex_links.CATALOGUE_SECTIONS:
+        pages = loaded_annex_pages(get_asset_manifest().get(name))
+        if pages is not None:
+            counts[name] = pages.count
+    return annex_links.validate(counts)
+
+def render_relevant_pages():
+    """Raccourcis vers les pages de catalogue qui concernent le repère courant."""
+    import annex_links
+    from html import escape
+    manifest = get_asset_manifest()
+    present = [name for name, record in manifest.records.items() if record.exists]
+    sections = annex_links.relevant_sections(repere_annex_attrs(st.session_state), available=present)
+    rows = []
+    for name, title, (start, end) in sections:
+        record = manifest.get(name)
+        pages = loaded_annex_pages(record)
+        if pages is not None and end > pages.count:
+            continue  # catalogue remplacé (cf. Options > Ressources)
+        # Extrait déjà préparé (python annex_pages.py), sinon document complet à la première page
+        url = pages.range_url(start, end, build=False) if pages is not None else None
+        if url is None:
+            url = get_static_file_url(record)
+            if url is None:
+                continue  # pas de service statique
+            url = f"{url}#page={start}"
+        pages_label = f"p. {start}" if start == end else f"p. {start}-{end}"
+        short = escape(name.replace('.pdf', '').replace('FPEE - ', ''))
+        rows.append(f"<div><a href=\"{url}\" target=\"_blank\">{escape(title)}</a> "
+                    f"<small>({short}, {pages_label})</small></div>")
+    if rows:
+        st.markdown("**📌 Pages utiles pour ce repère**")
+        st.markdown("".join(rows), unsafe_allow_html=True)
+
 def render_annexes():
     """Affiche la section Annexes en bas de page (Menuiserie uniquement)."""
     # Only for Menuiserie
@@ -6108,6 +6239,8 @@ def render_annexes():
     with st.expander("📂 Annexes (Documentation)", expanded=False):
         # Determine Material (Default PVC)
         mat = st.session_state.get('mat_type', 'PVC') 
+        render_annex_search()
+        render_relevant_pages()
         
 
 
@@ -6115,27 +6248,18 @@ def render_annexes():
         
         def render_doc_item(file_name, key_suffix, label=None):
             """Helper to render a row for a document"""
-            p = os.path.join(current_dir, "assets", file_name)
-            
-            if not os.path.exists(p):
-                 # DEBUG: List assets content to diagnose if file is really missing or path issue
-                 try:
-                     assets_path = os.path.join(current_dir, "assets")
-                     if os.path.exists(assets_path):
-                        available = os.listdir(assets_path)
-                        # Truncate list if too long
-                        if len(available) > 10: available = available[:10] + ["..."]
-                        st.error(f"Fichier introuvable: {file_name} (Contenu du dossier assets: {available})")
-                     else:
-                        st.error(f"Dossier 'assets' introuvable au chemin : {assets_path}")
-                 except Exception as e:
-                     st.error(f"Erreur de lecture du dossier assets: {e}")
-                 return
+            record = get_asset_manifest().get(file_name)
+            if not record.exists:
+                # Signalé une fois dans Options > Ressources
+                st.caption(f"{label or file_name} : non disponible")
+                return
+            p = record.path
 
             # Layout: Button Download | Button View | Filename
             c_view, c_dl = st.columns([1, 1])
             
             clean_name = label if label else file_name.replace('.pdf','').replace('FPEE - ', '')
+            pdf_url = get_static_file_url(record)
             
             # View Button Toggle Logic
             view_key = f"view_{key_suffix}_{file_name}"
@@ -6152,8 +6276,14 @@ def render_annexes():
                 r1, r2, r3 = st.columns([0.06, 0.06, 0.88])
                 
                 with r1:
-                    with open(p, "rb") as pdf_file:
-                        st.download_button("📥", pdf_file, file_name=file_name, key=f"dl_{key_suffix}_{file_name}", help="Télécharger le PDF")
+                    if pdf_url:
+                        from html import escape
+                        # Lien direct : rien n'est lu ni envoyé à chaque rerun
+                        st.markdown(f"<div style='margin-top: 5px;'><a href=\"{pdf_url}\" download=\"{escape(file_name)}\" "
+                                    f"title=\"Télécharger le PDF\" style='text-decoration: none;'>📥</a></div>", unsafe_allow_html=True)
+                    else:
+                        st.download_button("📥", file_reader(p), file_name=file_name, mime="application/pdf",
+                                           key=f"dl_{key_suffix}_{file_name}", help="Télécharger le PDF")
                 
                 with r2:
                     # Toggle View
@@ -6167,7 +6297,22 @@ def render_annexes():
                      st.markdown(f"<div style='margin-top: 5px;'><b>{clean_name}</b></div>", unsafe_allow_html=True)
             
             # Viewer Container (If visible)
-            if st.session_state[view_key]:
+            if st.session_state[view_key] and pdf_url:
+                # Servi par Streamlit (static/assets/) : le navigateur charge les pages à la
+                # demande (requêtes Range) et garde le fichier en cache d'un rerun à l'autre
+                st.link_button("📱 OUVRIR LE PDF EN PLEIN ÉCRAN", pdf_url, type="primary", use_container_width=True)
+                # Première ouverture : découpage du catalogue et vignettes (quelques secondes)
+                with st.spinner(f"Préparation des pages de {clean_name}..."):
+                    pages = get_annex_pages(record)
+                if pages is None:
+                    st.markdown(f'<iframe src="{pdf_url}" width="100%" height="1200" type="application/pdf"></iframe>', unsafe_allow_html=True)
+                else:
+                    st.markdown(annex_grid_html(pages), unsafe_allow_html=True)
+                    page_no = st.number_input(f"Page ({pages.count})", min_value=1, max_value=pages.count, value=1,
+                                              key=f"page_{key_suffix}_{file_name}")
+                    st.markdown(f'<iframe src="{pages.page_url(page_no)}" width="100%" height="1200" type="application/pdf"></iframe>', unsafe_allow_html=True)
+            elif st.session_state[view_key]:
+                # Repli sans service statique : PDF embarqué en base64
                 with st.spinner(f"Chargement de {clean_name}..."):
                      try:
                          with open(p, "rb") as f:
@@ -6267,21 +6412,11 @@ current_mode = st.session_state.get('mode_module', 'Menuiserie')
 # --- COLUMN LEFT: CONFIGURATION + LOGO + NAV ---
 with c_config:
     # 1. Logo & Branding
-    if 'LOGO_B64' in globals():
-        try:
-             # Robust Logic for Main UI Logo
-             try:
-                 decoded = base64.b64decode(LOGO_B64, validate=True)
-             except:
-                 b64 = LOGO_B64
-                 b64 += "=" * ((4 - len(b64) % 4) % 4)
-                 decoded = base64.b64decode(b64)
-             
-             st.image(decoded, width=300)
-        except Exception as e:
-             pass
+    if LOGO is not None:
+        # Octets bruts du registre : aucun décodage base64 par rerun
+        st.image(LOGO.data, width=300)
     else:
-         st.warning("Logo variable not found.")
+         st.warning("Logo introuvable (assets/).")
 
     st.write("") # Spacer
 
@@ -6319,9 +6454,8 @@ with c_preview:
         try:
             svg_output = generate_svg_v73()
             # V76 FIX: Constrained Visualization Container
-            style_container = 'width:100%; height:70vh; max-height:800px; border:1px solid #ddd; background:white; display:flex; align-items:center; justify-content:center; overflow:hidden;'
             svg_display = svg_output.replace('<svg ', '<svg width="100%" height="100%" preserveAspectRatio="xMidYMid meet" ')
-            st.markdown(f'<div style="{style_container}">{svg_display}</div>', unsafe_allow_html=True)
+            render_svg_preview(svg_display, key="svg_preview_menuiserie")
         except Exception as e:
             st.error(f"Erreur SVG: {e}")
             import traceback
@@ -6338,7 +6472,7 @@ with c_preview:
         
         # Generator HTML once
         try:
-             html_print = render_html_menuiserie(st.session_state, svg_output, LOGO_B64 if 'LOGO_B64' in globals() else None)
+             html_print = render_html_menuiserie(st.session_state, svg_output, get_logo_src())
         except Exception as e:
              html_print = f"Erreur génération: {e}"
              st.error(f"Erreur interne: {e}")
@@ -6346,18 +6480,15 @@ with c_preview:
         with c_print:
             if st.button("🖨️ Impression", use_container_width=True):
                  try:
-                     import json
-                     # V73 FIX: Robust serialization to avoid JS syntax errors
-                     html_json = json.dumps(html_print)
-                     from streamlit.components.v1 import html
-                     html(f"<script>var w=window.open();w.document.write({html_json});w.document.close();setTimeout(function(){{w.print();}}, 1000);</script>", height=0)
+                     open_print_document(html_print)
                  except Exception as e:
                      st.error(f"Erreur impression: {e}")
         
         with c_dl_html:
             st.download_button(
                 "💾 Télécharger Fiche (.html)",
-                html_print,
+                # Fichier autonome : l'URL statique du logo redevient une URI data:
+                brand_assets.inline_static(html_print),
                 file_name=f"Fiche_{st.session_state.get('ref_id', 'Menuiserie')}.html",
                 mime="text/html",
                 use_container_width=True
@@ -6440,9 +6571,8 @@ with c_preview:
         try:
             svg_output = generate_svg_volet()
             # V76 FIX: Constrained Visualization Container
-            style_container = 'width:100%; height:70vh; max-height:800px; border:1px solid #ddd; background:white; display:flex; align-items:center; justify-content:center; overflow:hidden;'
             svg_display = svg_output.replace('<svg ', '<svg width="100%" height="100%" preserveAspectRatio="xMidYMid meet" ')
-            st.markdown(f'<div style="{style_container}">{svg_display}</div>', unsafe_allow_html=True)
+            render_svg_preview(svg_display, key="svg_preview_volet")
         except Exception as e:
             st.error(f"Erreur SVG Volet: {e}")
         
@@ -6483,18 +6613,16 @@ with c_preview:
 
         st.markdown("---")
         if st.button("🖨️ Impression Volet", use_container_width=True):
-            html_print = render_html_volet(st.session_state, svg_output, LOGO_B64 if 'LOGO_B64' in globals() else None)
-            from streamlit.components.v1 import html
-            html(f"<script>var w=window.open();w.document.write(`{html_print}`);w.document.close();w.print();</script>", height=0)
+            html_print = render_html_volet(st.session_state, svg_output, get_logo_src())
+            open_print_document(html_print)
             
     elif current_mode == 'Vitrage':
         # 1. VISUALISATION
         try:
             svg_output = generate_svg_vitrage()
             # V76 FIX: Constrained Visualization Container
-            style_container = 'width:100%; height:70vh; max-height:800px; border:1px solid #ddd; background:white; display:flex; align-items:center; justify-content:center; overflow:hidden;'
             svg_display = svg_output.replace('<svg ', '<svg width="100%" height="100%" preserveAspectRatio="xMidYMid meet" ')
-            st.markdown(f'<div style="{style_container}">{svg_display}</div>', unsafe_allow_html=True)
+            render_svg_preview(svg_display, key="svg_preview_vitrage")
         except Exception as e:
             st.error(f"Erreur SVG Vitrage: {e}")
         
@@ -6551,9 +6679,8 @@ with c_preview:
             
         st.markdown("---")
         if st.button("🖨️ Impression Vitrage", use_container_width=True):
-            html_print = render_html_vitrage(st.session_state, svg_output, LOGO_B64 if 'LOGO_B64' in globals() else None)
-            from streamlit.components.v1 import html
-            html(f"<script>var w=window.open();w.document.write(`{html_print}`);w.document.close();w.print();</script>", height=0)
+            html_print = render_html_vitrage(st.session_state, svg_output, get_logo_src())
+            open_print_document(html_print)
 
     else:
         # HABILLAGE PREVIEW
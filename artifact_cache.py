@@ -0,0 +1,189 @@
+"""Cache disque des artefacts générés (SVG, HTML, PDF...), adressé par contenu.
+
+La clé d'un artefact est l'empreinte de tout ce dont il dépend : données du repère,
+version du moteur de rendu (empreinte du code source), version des gabarits...
+Un repère inchangé n'est donc jamais rendu deux fois, même d'un jour à l'autre ou
+d'un processus serveur à l'autre : le relire coûte une lecture de fichier.
+
+    <racine>/<type>/<2 premiers car.>/<empreinte>.<ext>
+
+Écritures atomiques (fichier temporaire dans le même dossier puis os.replace) :
+plusieurs processus Streamlit ou workers du dossier PDF peuvent partager la racine.
+Éviction LRU par taille : chaque lecture rafraîchit la date du fichier, les plus
+anciens partent quand le total dépasse `max_bytes`.
+
+Module importable sans Streamlit.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.environ.get("CONFIGURATEUR_CACHE_DIR", os.path.join(ROOT_DIR, ".cache", "artifacts"))
+DEFAULT_MAX_BYTES = int(float(os.environ.get("CONFIGURATEUR_CACHE_MB", "500")) * 1024 * 1024)
+# Après éviction, le cache redescend à cette fraction de max_bytes (évite d'évincer à chaque écriture)
+LOW_WATER = 0.8
+# Rescan complet périodique : les écritures des autres processus ne sont pas comptées ici
+RESCAN_EVERY = 64
+TMP_PREFIX = ".tmp-"
+STALE_TMP_S = 3600
+
+
+def fingerprint(*parts):
+    """Empreinte stable (sha256 hex) d'objets JSON-isables (dicts triés, repli str)."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def source_version(*paths):
+    """Version d'un moteur de rendu : empreinte du contenu de ses fichiers source."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ArtifactCache:
+    """Cache d'artefacts sur disque, partagé entre processus."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.writes = self.evicted = 0
+        self._approx_bytes = None  # inconnu jusqu'au premier scan
+        self._puts_since_scan = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Passé aux workers du pool de processus : configuration seulement
+        return {'root': self.root, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['root'], state['max_bytes'])
+
+    def key(self, kind, *parts):
+        return fingerprint(kind, *parts)
+
+    def path(self, kind, key, ext):
+        return os.path.join(self.root, kind, key[:2], f"{key}.{ext}")
+
+    def get(self, kind, key, ext):
+        """Octets de l'artefact, ou None (absent, ou évincé entre-temps par un autre processus)."""
+        path = self.path(kind, key, ext)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # LRU
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, kind, key, data, ext):
+        path = self.path(kind, key, ext)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        self.writes += 1
+        with self._lock:
+            self._puts_since_scan += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += len(data)
+            need_scan = (self._approx_bytes is None or self._approx_bytes > self.max_bytes
+                         or self._puts_since_scan >= RESCAN_EVERY)
+        if need_scan:
+            self.evict()
+        return path
+
+    def get_or_build(self, kind, key, build, ext, text=False):
+        """Artefact en cache, sinon `build()` (str si text=True, sinon bytes) puis mise en cache."""
+        data = self.get(kind, key, ext)
+        if data is not None:
+            return data.decode("utf-8") if text else data
+        value = build()
+        try:
+            self.put(kind, key, value.encode("utf-8") if text else value, ext)
+        except OSError:
+            pass  # cache en lecture seule / disque plein : on sert quand même le rendu
+        return value
+
+    def _scan(self):
+        files, stale = [], []
+        now = time.time()
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                if name.startswith(TMP_PREFIX):
+                    if now - st.st_mtime > STALE_TMP_S:
+                        stale.append(full)  # écriture interrompue (processus tué)
+                    continue
+                files.append((st.st_mtime, st.st_size, full))
+        return files, stale
+
+    def evict(self, max_bytes=None):
+        """Supprime les artefacts les moins récemment utilisés au-delà de max_bytes ; renvoie leur nombre."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        files, stale = self._scan()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        if total > max_bytes:
+            target = max_bytes * LOW_WATER
+            for _, size, full in sorted(files):
+                if total <= target:
+                    break
+                try:
+                    os.remove(full)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+        for full in stale:
+            try:
+                os.remove(full)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._approx_bytes = total
+            self._puts_since_scan = 0
+            self.evicted += removed
+        return removed
+
+    def stats(self):
+        files, _ = self._scan()
+        return {'files': len(files), 'bytes': sum(size for _, size, _ in files), 'hits': self.hits,
+                'misses': self.misses, 'writes': self.writes, 'evicted': self.evicted}
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Cache partagé du processus (racine CONFIGURATEUR_CACHE_DIR, taille CONFIGURATEUR_CACHE_MB)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ArtifactCache()
+        return _default
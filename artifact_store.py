@@ -0,0 +1,75 @@
+"""Documents générés de courte durée (fiches à imprimer...) servis par URL.
+
+Les fichiers sont écrits sous static/<sous-dossier>/ et nommés par l'empreinte de
+leur contenu : le service statique de Streamlit les sert (app/static/...), le
+navigateur peut les mettre en cache, et une fiche identique réimprimée réutilise le
+même fichier. Ils expirent `ttl` secondes après leur dernière utilisation.
+
+Le suffixe fixe le type MIME servi : Streamlit >= 1.58 (serveur Starlette) envoie
+text/html pour .html ; les versions antérieures servaient text/plain avec nosniff
+et la fiche s'affichait en source (d'où le plancher de requirements.txt).
+
+Module importable sans Streamlit.
+"""
+import hashlib
+import os
+import threading
+import time
+
+from brand_assets import STATIC_DIR, STATIC_URL_PREFIX
+
+
+def rebase_static_urls(html, depth=1):
+    """URL app/static/... d'un document servi depuis un sous-dossier de static/ -> chemins relatifs."""
+    up = "../" * depth
+    for quote in ('"', "'"):
+        html = html.replace(f"{quote}{STATIC_URL_PREFIX}/", f"{quote}{up}")
+    return html
+
+
+class ArtifactStore:
+    """Fichiers adressés par contenu sous static/<subdir>/, purgés après `ttl` secondes."""
+
+    def __init__(self, subdir="print", ttl=3600, static_dir=STATIC_DIR):
+        self.subdir = subdir
+        self.ttl = ttl
+        self.dir = os.path.join(static_dir, subdir)
+        self._lock = threading.Lock()
+
+    def url(self, name):
+        return f"{STATIC_URL_PREFIX}/{self.subdir}/{name}"
+
+    def put(self, content, suffix=".html"):
+        """Enregistre le contenu (str ou bytes) ; renvoie son URL relative."""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        name = hashlib.sha256(data).hexdigest()[:20] + suffix
+        path = os.path.join(self.dir, name)
+        self.purge()
+        with self._lock:
+            if os.path.exists(path):
+                os.utime(path)  # réutilisé : repousse l'expiration
+            else:
+                os.makedirs(self.dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+        return self.url(name)
+
+    def purge(self, now=None):
+        """Supprime les fichiers inutilisés depuis plus de `ttl` secondes."""
+        now = now or time.time()
+        removed = 0
+        with self._lock:
+            try:
+                entries = list(os.scandir(self.dir))
+            except FileNotFoundError:
+                return 0
+            for entry in entries:
+                try:
+                    if entry.is_file() and now - entry.stat().st_mtime > self.ttl:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
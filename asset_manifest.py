@@ -0,0 +1,90 @@
+"""Manifeste des ressources référencées par l'application (annexes, schémas, logo).
+
+Construit une fois au démarrage : un seul parcours du dossier assets/, puis pour
+chaque nom référencé l'existence, la taille, la date, l'empreinte et le type MIME.
+Les rendus consultent le manifeste au lieu d'appeler os.path.exists / os.listdir
+à chaque rerun, et les ressources manquantes sont signalées une fois (diagnostic).
+
+Les noms sont comparés en forme Unicode NFC : un fichier enregistré en NFD (copié
+depuis macOS, "Fenêtres") est retrouvé sous le nom écrit dans le code.
+Module importable sans Streamlit.
+"""
+import mimetypes
+import os
+import time
+import unicodedata
+
+import brand_assets
+
+
+def nfc(name):
+    return unicodedata.normalize("NFC", name)
+
+
+class AssetRecord:
+    """Une ressource référencée : `path` est None si elle est absente du disque."""
+
+    def __init__(self, name, path=None, size=0, mtime=None, sha=None):
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.sha = sha
+        self.mime = mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+    @property
+    def exists(self):
+        return self.path is not None
+
+
+class AssetManifest:
+    """Ressources référencées, indexées par nom (forme NFC)."""
+
+    def __init__(self, records, unreferenced=(), asset_dir=brand_assets.ASSET_DIR, seconds=0.0):
+        self.records = {nfc(record.name): record for record in records}
+        self.unreferenced = list(unreferenced)
+        self.asset_dir = asset_dir
+        self.seconds = seconds
+
+    def get(self, name):
+        """Fiche de la ressource (absente : AssetRecord sans chemin, jamais None)."""
+        return self.records.get(nfc(name)) or AssetRecord(name)
+
+    def path(self, name):
+        return self.get(name).path
+
+    def exists(self, name):
+        return self.get(name).exists
+
+    def missing(self):
+        return sorted(name for name, record in self.records.items() if not record.exists)
+
+    def rows(self):
+        """[(nom, présent, taille, type MIME, empreinte)] pour le diagnostic."""
+        return [(name, record.exists, record.size, record.mime, record.sha)
+                for name, record in sorted(self.records.items())]
+
+
+def build_manifest(names, asset_dir=brand_assets.ASSET_DIR, checksums=True):
+    """Manifeste des `names` (noms de fichiers dans asset_dir)."""
+    t0 = time.perf_counter()
+    on_disk = {}
+    try:
+        with os.scandir(asset_dir) as it:
+            for entry in it:
+                if entry.is_file():
+                    on_disk[nfc(entry.name)] = entry
+    except FileNotFoundError:
+        pass
+    records = []
+    wanted = {nfc(name) for name in names}
+    for name in wanted:
+        entry = on_disk.get(name)
+        if entry is None:
+            records.append(AssetRecord(name))
+            continue
+        st = entry.stat()
+        sha = brand_assets.file_sha(entry.path) if checksums else None
+        records.append(AssetRecord(name, entry.path, st.st_size, st.st_mtime, sha))
+    unreferenced = sorted(set(on_disk) - wanted)
+    return AssetManifest(records, unreferenced, asset_dir, time.perf_counter() - t0)
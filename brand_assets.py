@@ -0,0 +1,207 @@
+"""Registre des ressources de marque (logo...) : chargées une fois par processus.
+
+Chaque ressource garde ses octets bruts et prépare à la demande, une seule fois :
+l'URI data: (fiches HTML autonomes), l'ImageReader ReportLab (JPEG passé tel quel
+en DCTDecode par drawImage, un seul XObject par document), une copie
+nommée par son empreinte sous static/ pour le service statique de Streamlit et
+des variantes réduites (schémas affichés à l'écran ou dans une fiche).
+
+Les gros documents (annexes PDF) ne passent pas par le registre : `publish_file()`
+les publie sous static/ sans les charger en mémoire (empreinte calculée par blocs).
+
+Module importable sans Streamlit : les workers du dossier PDF l'utilisent aussi.
+"""
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import shutil
+import threading
+import urllib.parse
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.path.join(ROOT_DIR, "assets")
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+# Copies empreintées générées au démarrage (ignorées par git)
+STATIC_ASSET_SUBDIR = "assets"
+STATIC_URL_PREFIX = "app/static"
+
+# nom logique -> fichiers candidats dans assets/ (le premier existant gagne)
+BRAND_ASSETS = {
+    'logo': ("logo_miroiterie_cropped.jpg", "logo_miroiterie.jpg"),
+}
+
+_lock = threading.Lock()
+_registry = {}
+
+
+class Asset:
+    """Une ressource binaire et ses formes préparées (calculées paresseusement)."""
+
+    def __init__(self, name, path, data):
+        self.name = name
+        self.path = path
+        self.data = data
+        self.mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.sha = hashlib.sha256(data).hexdigest()[:12]
+        self._prepared = {}
+        self._prep_lock = threading.RLock()  # data_uri -> b64 : préparations imbriquées
+
+    def _once(self, key, build):
+        value = self._prepared.get(key)
+        if value is None:
+            with self._prep_lock:
+                value = self._prepared.get(key)
+                if value is None:
+                    value = self._prepared[key] = build()
+        return value
+
+    @property
+    def b64(self):
+        return self._once('b64', lambda: base64.b64encode(self.data).decode())
+
+    @property
+    def data_uri(self):
+        return self._once('data_uri', lambda: f"data:{self.mime};base64,{self.b64}")
+
+    @property
+    def reader(self):
+        """ImageReader ReportLab (taille, formats non JPEG)."""
+        def build():
+            from reportlab.lib.utils import ImageReader
+            return ImageReader(io.BytesIO(self.data))
+        return self._once('reader', build)
+
+    @property
+    def size(self):
+        return self.reader.getSize()
+
+    def resized(self, max_width, max_height, quality=85):
+        """Variante JPEG tenant dans max_width x max_height (calculée une fois) ; self si déjà assez petite."""
+        def build():
+            from PIL import Image
+            with Image.open(io.BytesIO(self.data)) as im:
+                if im.width <= max_width and im.height <= max_height:
+                    return self
+                im = im.convert("RGB")
+                im.thumbnail((max_width, max_height), Image.LANCZOS)
+                buf = io.BytesIO()
+                im.save(buf, "JPEG", quality=quality, optimize=True)
+            # Chemin virtuel : ne sert qu'au nom publié et au type MIME
+            stem = os.path.splitext(self.path)[0]
+            return Asset(f"{self.name}@{max_width}x{max_height}", f"{stem}.{max_width}x{max_height}.jpg", buf.getvalue())
+        return self._once(('resized', max_width, max_height, quality), build)
+
+    @property
+    def static_name(self):
+        stem, ext = os.path.splitext(os.path.basename(self.path))
+        return f"{stem}.{self.sha}{ext}"
+
+    def publish(self, static_dir=STATIC_DIR):
+        """Copie empreintée sous static/assets/ (une fois) ; renvoie l'URL relative servie par Streamlit."""
+        def build():
+            target_dir = os.path.join(static_dir, STATIC_ASSET_SUBDIR)
+            target = os.path.join(target_dir, self.static_name)
+            if not os.path.exists(target):
+                os.makedirs(target_dir, exist_ok=True)
+                tmp = f"{target}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(self.data)
+                os.replace(tmp, target)
+            return f"{STATIC_URL_PREFIX}/{STATIC_ASSET_SUBDIR}/{self.static_name}"
+        return self._once(('static_url', static_dir), build)
+
+
+_published = {}
+_file_shas = {}
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha(path):
+    """Empreinte (12 car.) d'un fichier, lu par blocs ; recalculée seulement s'il change (mtime, taille)."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    sha = _file_shas.get(key)
+    if sha is None:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(block)
+        sha = _file_shas[key] = digest.hexdigest()[:12]
+    return sha
+
+
+def publish_file(path, static_dir=STATIC_DIR, sha=None):
+    """Publie un fichier sous static/assets/ avec son empreinte dans le nom ; renvoie son URL.
+
+    Le navigateur le télécharge alors directement (requêtes Range, ETag, cache) au
+    lieu de recevoir une copie base64 dans la page. `sha` déjà connue (manifeste) :
+    aucun accès disque une fois le fichier publié.
+    """
+    path = os.path.abspath(path)
+    sha = sha or file_sha(path)
+    url = _published.get((sha, path, static_dir))
+    if url is not None:
+        return url
+    stem, ext = os.path.splitext(os.path.basename(path))
+    static_name = f"{stem}.{sha}{ext}"
+    target_dir = os.path.join(static_dir, STATIC_ASSET_SUBDIR)
+    target = os.path.join(target_dir, static_name)
+    if not os.path.exists(target):
+        os.makedirs(target_dir, exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(path, tmp)  # copie par blocs (pas de lien : le nom empreinté doit rester exact)
+        os.replace(tmp, target)
+    url = _published[(sha, path, static_dir)] = f"{STATIC_URL_PREFIX}/{STATIC_ASSET_SUBDIR}/{urllib.parse.quote(static_name)}"
+    return url
+
+
+def load_asset(path, name=None):
+    """Ressource d'un fichier, mise en cache par chemin pour le processus."""
+    path = os.path.abspath(path)
+    with _lock:
+        asset = _registry.get(path)
+        if asset is None:
+            with open(path, "rb") as f:
+                asset = _registry[path] = Asset(name or os.path.basename(path), path, f.read())
+    return asset
+
+
+def get_asset(name):
+    """Ressource de marque par nom logique (None si aucun fichier candidat n'existe)."""
+    for filename in BRAND_ASSETS.get(name, ()):
+        path = os.path.join(ASSET_DIR, filename)
+        if os.path.exists(path):
+            return load_asset(path, name)
+    return None
+
+
+def draw_asset(c, asset, x, y_top, width):
+    """Dessine l'image sur un canvas ReportLab, haut-gauche en (x, y_top) ; renvoie la hauteur.
+
+    API publique seulement : drawImage(ImageReader) reprend le flux JPEG tel quel et
+    n'enregistre qu'un XObject par document pour une même image. L'ImageReader est
+    partagé (décodage RGB une fois par processus, pour l'empreinte de drawImage) ; son
+    flux est relu à chaque document, d'où le verrou entre threads.
+    """
+    w, h = asset.size
+    height = width * h / float(w)
+    with asset._prep_lock:
+        c.drawImage(asset.reader, x, y_top - height, width=width, height=height)
+    return height
+
+
+def inline_static(html, assets=None):
+    """Remplace les URL statiques des ressources par leur URI data: (fichier HTML autonome)."""
+    assets = list(assets or _registry.values())
+    # Variantes réduites publiées (schémas) : absentes du registre
+    assets += [v for asset in assets for k, v in list(asset._prepared.items())
+               if isinstance(k, tuple) and k[0] == 'resized' and v is not asset]
+    for asset in assets:
+        urls = [v for k, v in list(asset._prepared.items()) if isinstance(k, tuple) and k[0] == 'static_url']
+        for url in urls:
+            if url in html:
+                html = html.replace(url, asset.data_uri)
+    return html
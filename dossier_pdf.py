@@ -0,0 +1,526 @@
+"""Dossier PDF projet : rendu des pages en processus parallèles puis fusion ordonnée.
+
+Module importable (sans Streamlit) : les workers du pool "spawn" doivent pouvoir
+l'importer, ce qui n'est pas possible avec le script app_beta.py (il exécute l'UI).
+Le travail ReportLab/svglib est CPU-bound et tient le GIL : un pool de threads
+n'apporterait rien, d'où le ProcessPoolExecutor.
+
+Une page = un job (dict sérialisable). Les workers écrivent chaque page dans un
+fichier temporaire ; le processus principal garde au plus `max_pending` jobs en vol
+et fusionne les fichiers dans l'ordre avec pypdf, par lots de `batch_pages` pages
+écrits aussitôt dans le fichier de sortie (PageStream) : la mémoire ne dépend pas
+du nombre de repères.
+
+Reconstruction incrémentale (build_dossier(..., cache=...)) : chaque page est un
+fragment mis en cache disque (artifact_cache) sous l'empreinte de son contenu, sans
+la numérotation « page N/M », tamponnée à l'assemblage. Seules les pages dont le
+repère a changé sont rendues ; ajouter ou retirer un repère ne décale rien.
+"""
+import collections
+import concurrent.futures
+import gc
+import io
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+
+import artifact_cache
+
+PAGE_MARGIN = 40
+SUMMARY_ROWS_PER_PAGE = 32
+FOOTER_TEXT = "Document généré automatiquement - Miroiterie Yerroise"
+# Les workers passent derrière le processus Streamlit : les sessions interactives restent fluides
+WORKER_NICE = 10
+# Le style CSS de la balise racine (width: 100%; height: auto) est destiné au navigateur, svglib le refuse
+ROOT_STYLE_RE = re.compile(r'(<svg\b[^>]*?)\s+style="[^"]*"')
+# Fragments de pages en cache : le code de ce module fait partie de la clé
+FRAGMENT_KIND = "dossier_page"
+DOSSIER_VERSION = artifact_cache.source_version(os.path.abspath(__file__))
+NUMBERING_KEYS = ('page_no', 'page_total')
+# Pages fusionnées (et dédoublonnées) ensemble avant d'être écrites dans le fichier de sortie
+BATCH_PAGES = 32
+
+
+def summary_page_count(n_reperes):
+    """Nombre de pages du tableau récapitulatif."""
+    return max(1, -(-n_reperes // SUMMARY_ROWS_PER_PAGE))
+
+
+def _draw_logo(c, logo_path, x, y_top, width=150):
+    # Registre brand_assets : fichier lu et ImageReader préparé une fois par processus worker
+    import brand_assets
+    if not logo_path or not os.path.exists(logo_path):
+        return 0
+    return brand_assets.draw_asset(c, brand_assets.load_asset(logo_path), x, y_top, width)
+
+
+def _draw_page_number(c, job):
+    from reportlab.lib.pagesizes import A4
+    width, _ = A4
+    c.setFont("Helvetica-Oblique", 8)
+    c.setFillColor("gray")
+    c.drawRightString(width - PAGE_MARGIN, 30, f"{job['project_name']} - page {job['page_no']}/{job['page_total']}")
+    c.setFillColor("black")
+
+
+def _draw_footer(c, job, numbered=True):
+    from reportlab.lib.pagesizes import A4
+    width, _ = A4
+    c.setFont("Helvetica-Oblique", 8)
+    c.setFillColor("gray")
+    c.drawCentredString(width / 2, 30, FOOTER_TEXT)
+    c.setFillColor("black")
+    if numbered:
+        _draw_page_number(c, job)
+
+
+def _draw_svg(c, svg_string, x, y_top, max_w, max_h):
+    """Dessine un SVG centré dans la boîte ; renvoie la hauteur utilisée."""
+    from reportlab.graphics import renderPDF
+    from svglib.svglib import svg2rlg
+
+    svg_string = ROOT_STYLE_RE.sub(r'\1', svg_string, count=1)
+    drawing = svg2rlg(io.BytesIO(svg_string.encode('utf-8')))
+    if drawing is None or not drawing.width or not drawing.height:
+        raise ValueError("SVG illisible")
+    scale = min(max_w / drawing.width, max_h / drawing.height)
+    drawing.scale(scale, scale)
+    w, h = drawing.width * scale, drawing.height * scale
+    renderPDF.draw(drawing, c, x + (max_w - w) / 2, y_top - h)
+    return h
+
+
+def _page_cover(c, job):
+    from reportlab.lib.pagesizes import A4
+    width, height = A4
+    _draw_logo(c, job.get('logo_path'), PAGE_MARGIN, height - PAGE_MARGIN, width=200)
+
+    c.setFont("Helvetica-Bold", 26)
+    c.drawCentredString(width / 2, height / 2 + 80, "Dossier Technique")
+    c.setFont("Helvetica-Bold", 16)
+    c.drawCentredString(width / 2, height / 2 + 40, job['project_name'])
+    c.setFont("Helvetica", 11)
+    c.drawCentredString(width / 2, height / 2 + 10, f"Date : {job['date']}")
+    c.drawCentredString(width / 2, height / 2 - 10, f"{job['n_reperes']} repère(s)")
+
+    y = height / 2 - 50
+    for module, count in job.get('modules', []):
+        c.drawCentredString(width / 2, y, f"{module} : {count}")
+        y -= 16
+
+
+def _page_summary(c, job):
+    from reportlab.lib.pagesizes import A4
+    width, height = A4
+    y = height - PAGE_MARGIN - 10
+    c.setFont("Helvetica-Bold", 16)
+    title = "Récapitulatif" if job['part'] == 1 else f"Récapitulatif (suite {job['part']})"
+    c.drawString(PAGE_MARGIN, y, title)
+    y -= 30
+
+    cols = [("N°", PAGE_MARGIN), ("Repère", PAGE_MARGIN + 35), ("Module", PAGE_MARGIN + 190),
+            ("Dimensions", PAGE_MARGIN + 290), ("Qté", PAGE_MARGIN + 420), ("Page", PAGE_MARGIN + 470)]
+    c.setFont("Helvetica-Bold", 10)
+    for label, x in cols:
+        c.drawString(x, y, label)
+    y -= 6
+    c.line(PAGE_MARGIN, y, width - PAGE_MARGIN, y)
+    y -= 14
+
+    c.setFont("Helvetica", 9)
+    for row in job['rows']:
+        for (_, x), val in zip(cols, row):
+            c.drawString(x, y, str(val)[:30])
+        y -= 20
+        c.setStrokeColor("#dddddd")
+        c.line(PAGE_MARGIN, y + 14, width - PAGE_MARGIN, y + 14)
+        c.setStrokeColor("black")
+
+
+def _page_repere(c, job):
+    from reportlab.lib.pagesizes import A4
+    width, height = A4
+    _draw_logo(c, job.get('logo_path'), PAGE_MARGIN, height - PAGE_MARGIN + 10, width=110)
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(PAGE_MARGIN, height - 100, f"Fiche Technique : {job['ref']}")
+    c.setFont("Helvetica", 10)
+    c.drawString(PAGE_MARGIN, height - 120, f"Projet: {job['project_name']}  |  Module: {job['module']}  |  Qté: {job.get('qte', 1)}")
+    c.drawString(PAGE_MARGIN, height - 135, f"Date: {job['date']}")
+
+    y = height - 160
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(PAGE_MARGIN, y, "1. Caractéristiques Principales")
+    y -= 20
+    c.setFont("Helvetica", 10)
+    for line in job.get('infos', []):
+        c.drawString(PAGE_MARGIN + 10, y, f"• {line}")
+        y -= 15
+    y -= 20
+
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(PAGE_MARGIN, y, "2. Plan Technique")
+    y -= 20
+    obs = [l for l in (job.get('observations') or "").splitlines() if l.strip()][:6]
+    box_h = y - 60 - (len(obs) * 12 + 30 if obs else 0)
+    if job.get('svg'):
+        try:
+            y -= _draw_svg(c, job['svg'], PAGE_MARGIN, y, width - 2 * PAGE_MARGIN, box_h) + 20
+        except Exception as e:
+            c.setFillColor("red")
+            c.drawString(PAGE_MARGIN, y, f"[Erreur Schéma SVG: {e}]")
+            c.setFillColor("black")
+            y -= 40
+    else:
+        c.drawString(PAGE_MARGIN, y, "[Aucun schéma disponible]")
+        y -= 40
+
+    if obs:
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(PAGE_MARGIN, y, "Observations")
+        y -= 14
+        c.setFont("Helvetica", 9)
+        for line in obs:
+            c.drawString(PAGE_MARGIN + 10, y, line[:110])
+            y -= 12
+
+
+PAGE_RENDERERS = {'cover': _page_cover, 'summary': _page_summary, 'repere': _page_repere}
+
+
+def render_page(job, out_dir=None, numbered=True, cache=None, key=None):
+    """Rend une page (job) en PDF. Écrit dans out_dir si fourni (renvoie le chemin), sinon renvoie les octets.
+
+    numbered=False : fragment sans « page N/M » ; mis en cache sous `key` si un cache est fourni.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    c.setTitle(f"{job['project_name']} - {job.get('ref', job['kind'])}")
+    PAGE_RENDERERS[job['kind']](c, job)
+    _draw_footer(c, job, numbered)
+    c.showPage()
+    c.save()
+    data = buffer.getvalue()
+    if cache is not None and key is not None:
+        try:
+            cache.put(FRAGMENT_KIND, key, data, "pdf")
+        except OSError:
+            pass
+    if out_dir is None:
+        return data
+    path = os.path.join(out_dir, f"page_{job['page_no']:05d}.pdf")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def dossier_jobs(project_name, reperes, logo_path=None, date=None):
+    """Jobs ordonnés : couverture, récapitulatif, puis une page par repère.
+
+    `reperes` : liste de dicts {ref, module, qte, dims, infos, svg, observations}.
+    """
+    import datetime
+    date = date or datetime.datetime.now().strftime('%d/%m/%Y')
+    n_summary = summary_page_count(len(reperes))
+    first_repere_page = 2 + n_summary
+    total = 1 + n_summary + len(reperes)
+    common = {'project_name': project_name, 'date': date, 'logo_path': logo_path, 'page_total': total}
+
+    modules = collections.Counter(r['module'] for r in reperes)
+    jobs = [dict(common, kind='cover', page_no=1, n_reperes=len(reperes), modules=sorted(modules.items()))]
+
+    rows = [(i + 1, r['ref'], r['module'], r.get('dims', ''), r.get('qte', 1), first_repere_page + i)
+            for i, r in enumerate(reperes)]
+    for part in range(n_summary):
+        chunk = rows[part * SUMMARY_ROWS_PER_PAGE:(part + 1) * SUMMARY_ROWS_PER_PAGE]
+        jobs.append(dict(common, kind='summary', page_no=2 + part, part=part + 1, rows=chunk))
+
+    for i, r in enumerate(reperes):
+        jobs.append(dict(common, **r, kind='repere', page_no=first_repere_page + i))
+    return jobs
+
+
+def fragment_key(cache, job):
+    """Clé du fragment d'une page : contenu du job hors numérotation, code du module, logo."""
+    import brand_assets
+    content = {k: v for k, v in job.items() if k not in NUMBERING_KEYS}
+    logo_path = job.get('logo_path')
+    logo_sha = brand_assets.load_asset(logo_path).sha if logo_path and os.path.exists(logo_path) else None
+    return cache.key(FRAGMENT_KIND, content, DOSSIER_VERSION, logo_sha)
+
+
+def _numbering_overlay(jobs):
+    """Un PDF d'autant de pages que de jobs, ne portant que « projet - page N/M »."""
+    from pypdf import PdfReader
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    for job in jobs:
+        _draw_page_number(c, job)
+        c.showPage()
+    c.save()
+    return PdfReader(buffer)
+
+
+def _worker_init():
+    # Flux Flate binaires plutôt qu'ASCII85 : pypdf les décode en C à la fusion (dédoublonnage).
+    # Réglage global de ReportLab : seulement dans les workers, jamais dans le processus Streamlit.
+    from reportlab import rl_config
+    rl_config.useA85 = 0
+    try:
+        os.nice(WORKER_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+def default_workers():
+    return max(1, min(os.cpu_count() or 1, 8))
+
+
+class PageStream:
+    """PDF écrit au fil de l'eau : les objets de chaque lot de pages sont écrits puis oubliés.
+
+    Restent en mémoire les offsets des objets (table xref), la liste des pages et
+    l'empreinte des flux écrits (logo, polices : écrits une fois pour tout le document,
+    pas une fois par lot). Catalogue et arbre des pages sont écrits à la fermeture.
+    """
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self, f):
+        self.f = f
+        self.pos = 0
+        self.offsets = [0, 0]  # offset de l'objet n à l'indice n - 1
+        self.kids = []
+        self.streams = {}  # sha256 du flux sérialisé -> numéro d'objet
+        self._write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.f.write(data)
+        self.pos += len(data)
+
+    def _reserve(self):
+        self.offsets.append(0)
+        return len(self.offsets)
+
+    def _object(self, idnum, obj):
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer)
+        self._write_serialized(idnum, buffer.getvalue())
+
+    def _write_serialized(self, idnum, data):
+        self.offsets[idnum - 1] = self.pos
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (idnum, data))
+
+    def add_pages(self, reader):
+        """Copie les pages d'un PdfReader (et les objets qu'elles référencent), renumérotées.
+
+        Parcours en profondeur : un objet est écrit après ceux qu'il référence, ce qui
+        permet de remplacer un flux déjà écrit par un lot précédent par son numéro.
+        """
+        import hashlib
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+        pages = {page.indirect_reference.idnum: page for page in reader.pages}
+        ids = {}  # numéro dans le lot -> numéro dans la sortie (None : en cours de copie)
+        cycles = {}  # numéro dans le lot -> numéro réservé pour une référence circulaire
+
+        def ref(source):
+            idnum = ids.get(source.idnum, 0)
+            if idnum is None:
+                idnum = cycles.get(source.idnum) or cycles.setdefault(source.idnum, self._reserve())
+            elif not idnum:
+                idnum = copy(source)
+            return IndirectObject(idnum, 0, None)
+
+        def remap(obj):
+            # Références réécrites sur place (le lecteur est jeté après le lot) ; celles déjà
+            # réécrites (objet direct partagé, ex. /Resources hérité) ne sont plus au lecteur
+            if isinstance(obj, IndirectObject):
+                return ref(obj) if obj.pdf is reader else obj
+            if isinstance(obj, DictionaryObject):
+                for key, value in list(obj.items()):
+                    obj[key] = remap(value)
+            elif isinstance(obj, ArrayObject):
+                for i, value in enumerate(obj):
+                    obj[i] = remap(value)
+            return obj
+
+        def copy(source):
+            ids[source.idnum] = None
+            obj = pages.get(source.idnum)
+            if obj is None:
+                obj = remap(reader.get_object(source))
+            else:
+                # Parent : l'arbre des pages du fichier de sortie, pas celui du lot
+                del obj[NameObject("/Parent")]
+                remap(obj)[NameObject("/Parent")] = IndirectObject(self.PAGES, 0, None)
+            buffer = io.BytesIO()
+            obj.write_to_stream(buffer)
+            data = buffer.getvalue()
+            idnum = cycles.get(source.idnum)
+            if idnum is None and isinstance(obj, StreamObject):
+                digest = hashlib.sha256(data).digest()
+                idnum = self.streams.get(digest)
+                if idnum is not None:
+                    ids[source.idnum] = idnum
+                    return idnum
+                idnum = self.streams[digest] = self._reserve()
+            elif idnum is None:
+                idnum = self._reserve()
+            ids[source.idnum] = idnum
+            self._write_serialized(idnum, data)
+            return idnum
+
+        self.kids.extend(ref(page.indirect_reference).idnum for page in reader.pages)
+
+    def close(self):
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject
+
+        self._object(self.PAGES, DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(k, 0, None) for k in self.kids),
+            NameObject("/Count"): NumberObject(len(self.kids)),
+        }))
+        self._object(self.CATALOG, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(self.PAGES, 0, None),
+        }))
+        xref = self.pos
+        size = len(self.offsets) + 1
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        self._write(b"".join(b"%010d 00000 n \n" % offset for offset in self.offsets))
+        trailer = io.BytesIO()
+        DictionaryObject({
+            NameObject("/Size"): NumberObject(size),
+            NameObject("/Root"): IndirectObject(self.CATALOG, 0, None),
+        }).write_to_stream(trailer)
+        self._write(b"trailer\n%s\nstartxref\n%d\n%%%%EOF\n" % (trailer.getvalue(), xref))
+
+
+def build_dossier(jobs, out, workers=None, max_pending=None, on_progress=None, cache=None,
+                  batch_pages=BATCH_PAGES):
+    """Rend les jobs (pool de processus si workers > 1) et fusionne les pages dans l'ordre.
+
+    `out` : chemin ou flux binaire. Au plus `max_pending` pages sont rendues en avance
+    (fichiers temporaires) et au plus `batch_pages` pages fusionnées sont gardées en
+    mémoire : chaque lot est dédoublonné puis écrit dans `out` (PageStream). Avec `cache`
+    (artifact_cache), les pages inchangées sont relues au lieu d'être rendues et la
+    numérotation est tamponnée lot par lot. Renvoie des stats (pages, rendues,
+    réutilisées, secondes, pages/s).
+    """
+    if isinstance(out, (str, os.PathLike)):
+        with open(out, "wb") as f:
+            return build_dossier(jobs, f, workers, max_pending, on_progress, cache, batch_pages)
+
+    from pypdf import PdfReader, PdfWriter
+
+    workers = default_workers() if workers is None else workers
+    max_pending = max_pending or max(2, workers * 4)
+    t0 = time.perf_counter()
+    stream = PageStream(out)
+    batch = {'writer': PdfWriter(), 'start': 0}
+    numbered = cache is None
+    keys = [fragment_key(cache, job) for job in jobs] if cache is not None else [None] * len(jobs)
+    counts = {'rendered': 0, 'reused': 0}
+
+    def cached(k):
+        # Fragment relu depuis le cache (None : absent, ou évincé entre-temps par un autre processus)
+        if keys[k] is None or not os.path.exists(cache.path(FRAGMENT_KIND, keys[k], "pdf")):
+            return None
+        return cache.get(FRAGMENT_KIND, keys[k], "pdf")
+
+    def flush():
+        writer, start = batch['writer'], batch['start']
+        n = len(writer.pages)
+        if not n:
+            return
+        if not numbered:
+            for page, number in zip(writer.pages, _numbering_overlay(jobs[start:start + n]).pages):
+                page.merge_page(number)
+        # Chaque page embarque son propre logo / ses polices : dédoublonnage dans le lot,
+        # puis PageStream réutilise les flux déjà écrits par les lots précédents
+        try:
+            writer.compress_identical_objects()
+        except AttributeError:
+            pass
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        writer.close()
+        stream.add_pages(PdfReader(buffer))
+        batch['writer'], batch['start'] = PdfWriter(), start + n
+        # Objets pypdf liés en cycles (objet <-> référence <-> lecteur) : libérés lot par lot,
+        # sans attendre le ramasse-miettes
+        gc.collect()
+
+    def append(page):
+        batch['writer'].append(page)
+        if len(batch['writer'].pages) >= batch_pages:
+            flush()
+
+    with tempfile.TemporaryDirectory(prefix="dossier_") as tmp_dir:
+        if workers <= 1:
+            for k, job in enumerate(jobs):
+                data = cached(k)
+                if data is not None:
+                    counts['reused'] += 1
+                    append(io.BytesIO(data))
+                else:
+                    counts['rendered'] += 1
+                    path = render_page(job, tmp_dir, numbered, cache, keys[k])
+                    append(path)
+                    os.remove(path)
+                if on_progress: on_progress(k + 1, len(jobs))
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_worker_init) as pool:
+                # Fenêtre ordonnée : octets déjà en cache ou futures de rendu
+                pending = collections.deque()
+                it = iter(range(len(jobs)))
+                done = 0
+
+                def fill():
+                    while len(pending) < max_pending:
+                        k = next(it, None)
+                        if k is None:
+                            return
+                        data = cached(k)
+                        if data is not None:
+                            counts['reused'] += 1
+                            pending.append(data)
+                        else:
+                            counts['rendered'] += 1
+                            pending.append(pool.submit(render_page, jobs[k], tmp_dir, numbered, cache, keys[k]))
+
+                try:
+                    fill()
+                    while pending:
+                        # Fusion dans l'ordre des jobs, quel que soit l'ordre de fin des workers
+                        item = pending.popleft()
+                        if isinstance(item, bytes):
+                            append(io.BytesIO(item))
+                        else:
+                            path = item.result()
+                            append(path)
+                            os.remove(path)
+                        done += 1
+                        if on_progress: on_progress(done, len(jobs))
+                        fill()
+                except BaseException:
+                    # Annulation (levée par on_progress) ou erreur : on n'attend pas les pages restantes
+                    for item in pending:
+                        if not isinstance(item, bytes):
+                            item.cancel()
+                    raise
+
+        flush()
+        stream.close()
+
+    elapsed = time.perf_counter() - t0
+    return {'pages': len(jobs), **counts, 'seconds': elapsed, 'pages_per_s': len(jobs) / elapsed if elapsed else 0.0}
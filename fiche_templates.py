@@ -0,0 +1,701 @@
+"""Gabarits HTML des fiches techniques, compilés une fois à l'import.
+
+Chaque fiche = une feuille de style (FICHE_CSS) + une mise en page (FICHE_LAYOUTS)
+avec des champs :
+    {{nom}}              valeur calculée par l'appelant (render_html_*)
+    {{s.cle}}            str(state.get('cle'))
+    {{s.cle|défaut}}     str(state.get('cle', 'défaut'))
+La compilation découpe le texte en morceaux littéraux + champs et relève les clés
+d'état utilisées ; au rendu, les morceaux sont simplement joints. Le proxy
+st.session_state coûte ~10 µs par accès : les render_html_* lisent l'état via
+StateView, qui mémorise chaque clé (une seule lecture réelle par fiche).
+
+Fiche seule (impression, .html autonome) : CSS en ligne. Export multi-fiches :
+`stylesheet_href` remplace le <style> par un <link> vers une feuille partagée
+(`stylesheet_name()` / `FICHE_CSS`), écrite une fois pour tout l'export.
+"""
+import hashlib
+import re
+
+FIELD_RE = re.compile(r"\{\{(s\.)?(\w+)(?:\|([^}]*))?\}\}")
+_MISSING = object()
+_UNREAD = object()
+
+FICHE_CSS = {}
+FICHE_LAYOUTS = {}
+
+
+class StateView:
+    """Lecture seule mémorisée d'un état (st.session_state ou dict) : une lecture réelle par clé."""
+
+    __slots__ = ('_state', '_cache')
+
+    def __init__(self, state):
+        self._state = state._state if isinstance(state, StateView) else state
+        self._cache = {}
+
+    def get(self, key, default=None):
+        value = self._cache.get(key, _UNREAD)
+        if value is _UNREAD:  # les clés absentes sont mémorisées aussi
+            value = self._cache[key] = self._state.get(key, _MISSING)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class FicheTemplate:
+    """Mise en page compilée : morceaux littéraux et champs alternés."""
+
+    def __init__(self, kind, css, layout):
+        self.kind = kind
+        self.css = css
+        self.inline_head = f"<style>{css}</style>"
+        self.literals = []
+        self.fields = []  # (depuis_state, nom, défaut ou _MISSING)
+        pos = 0
+        for m in FIELD_RE.finditer(layout):
+            self.literals.append(layout[pos:m.start()])
+            default = m.group(3) if m.group(3) is not None else _MISSING
+            self.fields.append((bool(m.group(1)), m.group(2), default))
+            pos = m.end()
+        self.literals.append(layout[pos:])
+        self.state_keys = sorted({name for from_state, name, _ in self.fields if from_state})
+        self.value_names = sorted({name for from_state, name, _ in self.fields if not from_state} - {'head'})
+
+    def render(self, values, state, stylesheet_href=None):
+        snapshot = {k: state.get(k, _MISSING) for k in self.state_keys}
+        head = self.inline_head if stylesheet_href is None else f'<link rel="stylesheet" href="{stylesheet_href}">'
+        out = [self.literals[0]]
+        for (from_state, name, default), literal in zip(self.fields, self.literals[1:]):
+            if from_state:
+                value = snapshot[name]
+                if value is _MISSING:
+                    value = None if default is _MISSING else default
+            elif name == 'head':
+                value = head
+            else:
+                value = values[name]
+            out.append(str(value))
+            out.append(literal)
+        return "".join(out)
+
+
+# Impression automatique à l'ouverture (fiche habillage imprimée depuis l'app)
+AUTO_PRINT_SCRIPT = """
+        <script>
+            setTimeout(() => { window.print(); }, 800);
+        </script>"""
+
+
+def with_auto_print(html):
+    """Document qui lance l'impression à son ouverture (fiche ouverte par URL)."""
+    if "window.print" in html:
+        return html
+    end = html.rfind("</body>")
+    if end < 0:
+        return html + AUTO_PRINT_SCRIPT
+    return f"{html[:end].rstrip()}{AUTO_PRINT_SCRIPT}\n    {html[end:]}"
+
+
+def stylesheet_name(kind):
+    """Nom de fichier empreinté de la feuille de style partagée d'un type de fiche."""
+    digest = hashlib.sha256(FICHE_CSS[kind].encode('utf-8')).hexdigest()[:10]
+    return f"fiche_{kind}.{digest}.css"
+
+
+def render_fiche(kind, values, state, stylesheet_href=None):
+    return TEMPLATES[kind].render(values, state, stylesheet_href)
+
+
+FICHE_CSS['menuiserie'] = """
+        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
+        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
+        
+        .page-container { 
+            max-width: 210mm; 
+            margin: 0 auto; 
+            padding: 20px;
+        }
+
+        /* HEADER */
+        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
+        .header-left img { max-height: 70px; width: auto; }
+        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
+        
+        .header-right { text-align: right; padding-right: 5px; }
+        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
+        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
+        .header-right .date { font-size: 11px; color: #666; }
+
+        /* STACKED LAYOUT (Sections) */
+        .section-block { margin-bottom: 25px; break-inside: avoid; }
+        
+        /* HEADINGS */
+        h3 { 
+            font-size: 15px; color: #2c3e50; margin: 0 0 12px 0; 
+            border-left: 5px solid #3498db; padding-left: 10px; 
+            line-height: 1.2; text-transform: uppercase; letter-spacing: 0.5px;
+        }
+        
+        /* PANELS */
+        .panel { background: #fdfdfd; padding: 15px; border: 1px solid #eee; border-radius: 4px; font-size: 11px; }
+        .panel-row { display: flex; justify-content: space-between; padding: 6px 0; border-bottom: 1px dotted #ccc; }
+        .panel-row:last-child { border-bottom: none; }
+        .panel-row .lbl { font-weight: bold; color: #444; width: 40%; }
+        .panel-row .val { font-weight: normal; color: #000; text-align: right; width: 60%; }
+        
+        /* ZONES TABLE (Full Width) */
+        table { width: 100%; border-collapse: collapse; font-size: 12px; margin-top: 5px; }
+        th { background: #cfd8dc; color: #2c3e50; padding: 6px; text-align: left; text-transform: uppercase; font-size: 10px; }
+        td { border-bottom: 1px solid #eee; padding: 8px 12px; color: #333; line-height: 1.4; }
+        tr:nth-child(even) { background-color: #f9f9f9; }
+
+        /* BOTTOM SECTION (PLAN) */
+        .visual-box {
+            border: none; margin-top: 20px;
+            display: flex; flex-direction: column; align-items: center; justify-content: center;
+            position: relative;
+            width: 100%; height: 800px; /* Reduced to fit on Page 2 with Title */
+            page-break-inside: avoid;
+        }
+        /* Allow SVG to take more space */
+        .visual-box svg { height: 100%; width: auto; max-width: 98%; }
+        
+        .footer { 
+            position: fixed; bottom: 10mm; left: 0; right: 0;
+            font-size: 9px; color: #999; text-align: center; 
+        }
+
+        @media print {
+            @page { size: A4; margin: 12mm; }
+            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
+            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; }
+            .no-print { display: none; }
+            h3 { break-after: avoid; }
+            /* Explicit Page Breaks with Safety Margin */
+            .page-break { page-break-before: always; padding-top: 30px; }
+        }
+    """
+
+FICHE_LAYOUTS['menuiserie'] = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+    {{head}}
+    </head>
+    <body>
+        <div class="page-container">
+            <!-- HEADER -->
+            <div class="header">
+                <div class="header-left">
+                    {{logo}}
+                    <div class="subtitle">Menuiserie {{s.mat_type|PVC}}</div>
+                </div>
+                <div class="header-right">
+                    <div class="label">RÉFÉRENCE CHANTIER</div>
+                    <div class="ref">{{ref}}</div>
+                    <div class="date">{{date}}</div>
+                </div>
+            </div>
+            
+            <!-- STACKED SECTIONS -->
+            
+            <!-- 1. INFORMATIONS GENERALES -->
+            <div class="section-block">
+                <h3>Informations Générales</h3>
+                <div class="panel">
+                    <div class="panel-row"><span class="lbl">Repère</span> <span class="val">{{ref}}</span></div>
+                    <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{{s.qte_val|1}}</span></div>
+                    <div class="panel-row"><span class="lbl">Projet</span> <span class="val">{{s.proj_type|Rénovation}}</span></div>
+                    <div class="panel-row"><span class="lbl">Pose</span> <span class="val">{{s.pose_type}}</span></div>
+                    <div class="panel-row"><span class="lbl">Dormant</span> <span class="val">{{s.frame_thig}} mm</span></div>
+                    <div class="panel-row"><span class="lbl">Ailettes</span> <span class="val">{{ailettes}}</span></div>
+                    <div class="panel-row"><span class="lbl">Appui</span> <span class="val">{{appui}}</span></div>
+                    <div class="panel-row"><span class="lbl">Couleur</span> <span class="val">{{s.col_in}} (Int) / {{s.col_ex}} (Ext)</span></div>
+                    <div class="panel-row"><span class="lbl">Type Côtes</span> <span class="val">{{s.dim_type|Tableau}}</span></div>
+                    <div class="panel-row"><span class="lbl">Dos Dormant</span> <span class="val">{{w_d}} x {{h_d}} mm</span></div>
+                    <div class="panel-row"><span class="lbl">Recouvrement</span> <span class="val">{{w_rec}} x {{h_rec}} mm</span></div>
+                    <div class="panel-row"><span class="lbl">Allège</span> <span class="val">{{s.h_allege|0}} mm</span></div>
+                    <div class="panel-row"><span class="lbl">Volet R.</span> <span class="val">{{volet}}</span></div>
+                    {{common_specs}}
+                </div>
+            </div>
+            
+            <!-- 2. DETAILS DES ZONES -->
+            <div class="section-block">
+                <h3>Détails des Zones</h3>
+                <div class="panel">
+                    <table>
+                        <tbody>{{zone_rows}}</tbody>
+                    </table>
+                </div>
+            </div>
+            
+            <!-- 3. PLAN TECHNIQUE (New Page) -->
+            <div class="page-break">
+                <h3>Plan Technique</h3>
+                <div class="visual-box">
+                    {{svg}}
+                    <div style="position:absolute; bottom:10px; font-size:10px; color:#aaa;">Vue extérieure - Cotes tableau en mm</div>
+                </div>
+            </div>
+            
+            <!-- OBSERVATIONS -->
+            {{observations}}
+            
+            <div class="footer">
+                Document généré automatiquement - Miroiterie Yerroise<br>
+                Merci de vérifier les cotes avant validation définitive.
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+FICHE_CSS['volet'] = """
+        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
+        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
+        .page-container { max-width: 210mm; margin: 0 auto; padding: 20px; }
+        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
+        .header-left img { max-height: 70px; width: auto; }
+        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
+        .header-right { text-align: right; padding-right: 5px; }
+        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
+        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
+        .header-right .date { font-size: 11px; color: #666; }
+        
+        .section-block { margin-bottom: 25px; break-inside: avoid; }
+        h3 { font-size: 15px; color: #2c3e50; margin: 0 0 12px 0; border-left: 5px solid #3498db; padding-left: 10px; line-height: 1.2; text-transform: uppercase; letter-spacing: 0.5px; }
+        
+        .panel { background: #fdfdfd; padding: 15px; border: 1px solid #eee; border-radius: 4px; font-size: 11px; }
+        .panel-row { display: flex; justify-content: space-between; align-items: center; padding: 5px 0; border-bottom: 1px dotted #ccc; height: 26px; }
+        .panel-row:last-child { border-bottom: none; }
+        .panel-row .lbl { font-weight: bold; color: #444; width: 40%; display: flex; align-items: center; }
+        .panel-row .val { font-weight: normal; color: #000; text-align: right; width: 60%; display: flex; align-items: center; justify-content: flex-end; }
+        
+        .visual-box { border: 1px solid #eee; margin-top: 20px; display: flex; flex-direction: column; align-items: center; justify-content: center; position: relative; width: 100%; height: auto; min-height: 500px; padding: 20px 0 40px 0; }
+        .visual-box svg { height: auto; width: auto; max-width: 95%; max-height: 450px; }
+        
+        .footer { position: fixed; bottom: 5mm; left: 0; right: 0; font-size: 9px; color: #999; text-align: center; }
+
+        @media print {
+            @page { size: A4; margin: 12mm; }
+            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
+            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; }
+            h3 { break-after: avoid; }
+            .page-break { page-break-before: always; padding-top: 30px; }
+        }
+    """
+
+FICHE_LAYOUTS['volet'] = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+    {{head}}
+    </head>
+    <body>
+        <div class="page-container">
+            <!-- HEADER -->
+            <div class="header">
+                <div class="header-left">
+                    {{logo}}
+                    <div class="subtitle">Volet Roulant {{s.vr_mat|Aluminium}}</div>
+                </div>
+                <div class="header-right">
+                    <div class="label">RÉFÉRENCE CHANTIER</div>
+                    <div class="ref">{{ref}}</div>
+                    <div class="date">{{date}}</div>
+                </div>
+            </div>
+            
+            <!-- INFORMATIONS -->
+            <div class="section-block">
+                <h3>Informations Générales</h3>
+                <div class="panel">
+                    <div class="panel-row"><span class="lbl">Repère</span> <span class="val">{{ref}}</span></div>
+                    <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{{s.vr_qte|1}}</span></div>
+                    <div class="panel-row"><span class="lbl">Type de Coffre</span> <span class="val">{{s.vr_type_coffre|-}}</span></div>
+                    <div class="panel-row"><span class="lbl">Type de côtes</span> <span class="val">{{s.vr_dim_type|Côtes Tableau}}</span></div>
+                    <div class="panel-row"><span class="lbl">Dimensions</span> <span class="val">L {{s.vr_width|0}} x H {{s.vr_height|0}} mm{{winding}}</span></div>
+                </div>
+            </div>
+
+            <!-- DETAILS TECHNIQUES -->
+            <div class="section-block">
+                <h3>Détails Techniques</h3>
+                <div class="panel">
+                    <div class="panel-row"><span class="lbl">Couleur Coffre</span> <span class="val">{{s.vr_col_coffre|-}}</span></div>
+                    <div class="panel-row"><span class="lbl">Couleur Coulisses</span> <span class="val">{{s.vr_col_coulisses|-}}</span></div>
+                    <div class="panel-row"><span class="lbl">Couleur Tablier</span> <span class="val">{{s.vr_col_tablier|-}}</span></div>
+                    <div class="panel-row"><span class="lbl">Couleur Lame Finale</span> <span class="val">{{s.vr_col_lame_fin|-}}</span></div>
+                    
+                    <div class="panel-row" style="border-top: 2px solid #eee; margin-top: 5px; padding-top: 5px;"><span class="lbl">Type de Manoeuvre</span> <span class="val">{{s.vr_type|Manuel}}</span></div>
+                    
+                    {{motor_details}}
+                </div>
+            </div>
+            
+            <!-- PLAN -->
+            <div class="section-block">
+                <h3>Schéma Technique</h3>
+                <div class="visual-box">
+                    {{svg}}
+                    <div style="position:absolute; bottom:10px; font-size:10px; color:#aaa;">Vue Extérieure - {{s.vr_dim_type}}</div>
+                </div>
+            </div>
+
+            <!-- OBSERVATIONS -->
+            <!-- OBSERVATIONS -->
+            {{observations}}
+            
+            <div class="footer">
+                Document généré automatiquement - Miroiterie Yerroise
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+FICHE_CSS['vitrage'] = """
+        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
+        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
+        
+        .page-container { 
+            max-width: 210mm; 
+            margin: 0 auto; 
+            padding: 20px;
+        }
+
+        /* HEADER */
+        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
+        .header-left img { max-height: 70px; width: auto; }
+        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
+        
+        .header-right { text-align: right; padding-right: 5px; }
+        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
+        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
+        .header-right .date { font-size: 11px; color: #666; }
+
+        /* STACKED LAYOUT (Sections) */
+        .section-block { margin-bottom: 25px; break-inside: avoid; }
+        
+        /* HEADINGS */
+        h3 { 
+            font-size: 15px; color: #2c3e50; margin: 0 0 12px 0; 
+            border-left: 5px solid #3498db; padding-left: 10px; 
+            line-height: 1.2; text-transform: uppercase; letter-spacing: 0.5px;
+        }
+        
+        /* PANELS */
+        .panel { background: #fdfdfd; padding: 15px; border: 1px solid #eee; border-radius: 4px; font-size: 11px; }
+        .panel-row { display: flex; justify-content: space-between; padding: 6px 0; border-bottom: 1px dotted #ccc; }
+        .panel-row:last-child { border-bottom: none; }
+        .panel-row .lbl { font-weight: bold; color: #444; width: 40%; }
+        .panel-row .val { font-weight: normal; color: #000; text-align: right; width: 60%; }
+        
+        /* ZONES TABLE (Full Width) */
+        table { width: 100%; border-collapse: collapse; font-size: 12px; margin-top: 5px; }
+        th { background: #cfd8dc; color: #2c3e50; padding: 6px; text-align: left; text-transform: uppercase; font-size: 10px; }
+        td { border-bottom: 1px solid #eee; padding: 8px 12px; color: #333; line-height: 1.4; }
+        tr:nth-child(even) { background-color: #f9f9f9; }
+
+        /* BOTTOM SECTION (PLAN) */
+        .visual-box {
+            border: none; margin-top: 20px;
+            display: flex; flex-direction: column; align-items: center; justify-content: center;
+            position: relative;
+            width: 100%; height: 600px; /* Reduced height for Vitrage to fit page */
+            page-break-inside: avoid;
+        }
+        .visual-box svg { height: 100%; width: auto; max-width: 98%; }
+        
+        .footer { 
+            position: fixed; bottom: 10mm; left: 0; right: 0;
+            font-size: 9px; color: #999; text-align: center; 
+        }
+
+        @media print {
+            @page { size: A4; margin: 12mm; }
+            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
+            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; }
+            .no-print { display: none; }
+            h3 { break-after: avoid; }
+        }
+    """
+
+FICHE_LAYOUTS['vitrage'] = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+    {{head}}
+    </head>
+    <body>
+        <div class="page-container">
+            <!-- HEADER -->
+            <div class="header">
+                <div class="header-left">
+                    {{logo}}
+                    <div class="subtitle">Fiche Vitrage</div>
+                </div>
+                <div class="header-right">
+                    <div class="label">RÉFÉRENCE</div>
+                    <div class="ref">{{s.vit_ref|V-??}}</div>
+                    <div class="date">{{date}}</div>
+                </div>
+            </div>
+            
+            <div class="section-block">
+                <h3>Caractéristiques</h3>
+                <div class="panel">
+                    <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{{s.vit_qte|1}}</span></div>
+                    <div class="panel-row"><span class="lbl">Matériau</span> <span class="val">{{s.vit_mat}}</span></div>
+                    <div class="panel-row"><span class="lbl">Type Châssis</span> <span class="val">{{s.vit_type_chassis}}</span></div>
+                    <div class="panel-row"><span class="lbl">Dimensions</span> <span class="val">{{s.vit_width}} x {{s.vit_height}} mm</span></div>
+                    <div class="panel-row"><span class="lbl">H. Bas</span> <span class="val">{{s.vit_h_bas|0}} mm</span></div>
+                    <div class="panel-row"><span class="lbl">Type Côtes</span> <span class="val">{{s.vit_dim_type}}</span></div>
+                    <div class="panel-row"><span class="lbl">Verre</span> <span class="val">{{vit_resume}}</span></div>
+                    <div class="panel-row"><span class="lbl">H. Bas Verre</span> <span class="val">{{s.vit_h_bas}} mm</span></div>
+                </div>
+            </div>
+            
+            <div class="section-block">
+                <h3>Plan Technique</h3>
+                <div class="visual-box">
+                    {{svg}}
+                </div>
+            </div>
+            
+            {{observations}}
+            
+            <div class="footer">
+                Document généré automatiquement - Miroiterie Yerroise
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+
+FICHE_CSS['habillage'] = """
+        @import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap');
+        body { font-family: 'Roboto', sans-serif; -webkit-print-color-adjust: exact; padding: 0; margin: 0; background-color: #fff; color: #333; }
+        
+        .page-container { 
+            max-width: 210mm; 
+            margin: 0 auto; 
+            padding: 20px;
+        }
+
+        /* HEADER */
+        .header { display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 20px; border-bottom: 3px solid #2c3e50; padding-bottom: 15px; }
+        .header-left img { max-height: 70px; width: auto; }
+        .header-left .subtitle { color: #3498db; font-size: 14px; margin-top: 5px; font-weight: 400; }
+        
+        .header-right { text-align: right; padding-right: 5px; }
+        .header-right .label { font-size: 10px; color: #888; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 2px; }
+        .header-right .ref { font-size: 24px; font-weight: bold; color: #000; margin-bottom: 2px; line-height: 1; }
+        .header-right .date { font-size: 11px; color: #666; }
+
+        /* GRID LAYOUT */
+        .grid-container { display: grid; grid-template-columns: 35% 60%; gap: 5%; margin-bottom: 20px; }
+        
+        /* HEADINGS */
+        h3 { 
+            font-size: 14px; color: #2c3e50; margin: 0 0 10px 0; 
+            border-left: 4px solid #3498db; padding-left: 8px; 
+            line-height: 1.2;
+        }
+        
+        /* PANELS */
+        .panel { background: #f9f9f9; padding: 10px; border-radius: 4px; font-size: 12px; }
+        .panel-row { display: flex; justify-content: space-between; padding: 4px 0; border-bottom: 1px solid #eee; }
+        .panel-row:last-child { border-bottom: none; }
+        .panel-row .lbl { font-weight: bold; color: #555; }
+        .panel-row .val { font-weight: normal; color: #000; text-align: right; }
+        
+        .schema-box { 
+            border: 1px solid #eee; border-radius: 4px; padding: 5px; 
+            text-align: center; height: 160px; display: flex; align-items: center; justify-content: center;
+            margin-bottom: 15px;
+        }
+        .schema-box img { max-width: 100%; max-height: 100%; object-fit: contain; }
+        
+        .visual-box {
+            border: 1px solid #eee; border-radius: 4px; height: 280px;
+            display: flex; flex-direction: column; align-items: center; justify-content: center;
+            position: relative;
+        }
+        .visual-box svg { max-height: 250px; width: auto; max-width: 95%; }
+        
+        /* TABLE DETAILS */
+        table { width: 100%; border-collapse: collapse; font-size: 11px; margin-top: 10px; }
+        th { background: #2c3e50; color: white; padding: 6px; text-align: left; text-transform: uppercase; font-size: 10px; }
+        td { border-bottom: 1px solid #eee; padding: 6px; color: #444; }
+        tr:nth-child(even) { background-color: #f8f9fa; }
+        
+        .footer { 
+            margin-top: 25px; border-top: 1px solid #eee; padding-top: 10px; 
+            font-size: 9px; color: #999; text-align: center; 
+        }
+
+        @media print {
+            @page { size: A4; margin: 5mm; }
+            body { padding: 0; background: white; -webkit-print-color-adjust: exact; }
+            .page-container { margin: 0; padding: 0; box-shadow: none; max-width: none; width: 100%; transform: scale(0.95); transform-origin: top center; }
+            .no-print { display: none; }
+        }
+    """
+
+FICHE_LAYOUTS['habillage'] = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+    {{head}}
+    </head>
+    <body>
+        <div class="page-container">
+            <!-- HEADER -->
+            <div class="header">
+                <div class="header-left">
+                    {{logo}}
+                    <div class="subtitle">{{profile}}</div>
+                </div>
+                <div class="header-right">
+                    <div class="label">RÉFÉRENCE CHANTIER</div>
+                    <div class="ref">{{ref}}</div>
+                    <div class="date">{{date}}</div>
+                </div>
+            </div>
+            
+            <!-- MAIN GRID -->
+            <div class="grid-container">
+                <!-- LEFT COLUMN -->
+                <div>
+                    <h3>Schéma de Principe</h3>
+                    <div class="schema-box">
+                        {{schema}}
+                    </div>
+                    
+                    <h3>Caractéristiques</h3>
+                    <div class="panel">
+                        <div class="panel-row"><span class="lbl">Quantité</span> <span class="val">{{qte}}</span></div>
+                        <div class="panel-row"><span class="lbl">Longueur</span> <span class="val">{{length}} mm</span></div>
+                        <div class="panel-row"><span class="lbl">Développé</span> <span class="val">{{dev}} mm</span></div>
+                        <div class="panel-row"><span class="lbl">Matière</span> <span class="val">{{finition}}</span></div>
+                        <div class="panel-row"><span class="lbl">Couleur</span> <span class="val">{{couleur}}</span></div>
+                        <div class="panel-row"><span class="lbl">Épaisseur</span> <span class="val">{{epaisseur}}</span></div>
+                        
+                        <div style="margin-top:10px; padding-top:10px; border-top:1px solid #ddd;">
+                            <span class="lbl">Dimensions :</span> <br>
+                            <span style="font-family:monospace; color:#333;">{{dims}}</span>
+                        </div>
+                    </div>
+                </div>
+                
+                <!-- RIGHT COLUMN -->
+                <div>
+                    <h3>Visualisation 3D</h3>
+                    <div class="visual-box">
+                        {{svg}}
+                        <div style="position:absolute; bottom:10px; font-size:10px; color:#aaa;">Vue filaire indicative</div>
+                    </div>
+                </div>
+            </div>
+            
+            <!-- OBSERVATIONS -->
+            <!-- OBSERVATIONS -->
+            {{observations}}
+            
+            <!-- FOOTER TABLE -->
+            <h3>Détails de Commande</h3>
+            <table>
+                <thead>
+                    <tr><th>Libellé</th><th style="text-align:right;">Valeur</th></tr>
+                </thead>
+                <tbody>
+                    <tr><td>Référence</td><td style="text-align:right;">{{ref}}</td></tr>
+                    <tr><td>Modèle</td><td style="text-align:right;">{{profile}}</td></tr>
+                    <tr><td>Quantité</td><td style="text-align:right;">{{qte}}</td></tr>
+                    <tr><td>Dimensions</td><td style="text-align:right;">{{dims}}</td></tr>
+                    <tr><td>Longueur</td><td style="text-align:right;">{{length}} mm</td></tr>
+                    <tr><td>Développé</td><td style="text-align:right;">{{dev}} mm</td></tr>
+                    <tr><td>Surface Totale</td><td style="text-align:right;">{{surface}} m²</td></tr>
+                </tbody>
+            </table>
+            
+            <div class="footer">
+                Document généré automatiquement - Miroiterie Yerroise<br>
+                Merci de vérifier les cotes avant validation définitive.
+            </div>
+        </div>{{print_script}}
+    </body>
+    </html>
+    """
+
+FICHE_CSS['rapport'] = """
+            body { font-family: sans-serif; margin: 40px; color: #333; }
+            h1 { color: #2c3e50; text-align: center; }
+            h2 { color: #3498db; border-bottom: 2px solid #3498db; padding-bottom: 5px; margin-top: 30px; }
+            .container { max-width: 800px; margin: 0 auto; }
+            .drawing { text-align: center; margin: 20px 0; border: 1px solid #eee; padding: 20px; }
+            table { width: 100%; border-collapse: collapse; margin-top: 10px; }
+            .footer { margin-top: 50px; font-size: 12px; color: #777; text-align: center; border-top: 1px solid #eee; padding-top: 10px; }
+            
+            @media print {
+                body { margin: 0; }
+                .no-print { display: none; }
+                .container { max-width: 100%; }
+                .page-break { page-break-before: always; }
+            }
+        """
+
+# Rapport projet (html_report.py, mises en page écrites en flux) : CSS du rapport + sauts de page
+FICHE_CSS['rapport_projet'] = FICHE_CSS['rapport'] + """
+            .repere { page-break-inside: avoid; }
+            .repere + .repere { page-break-before: always; }
+        """
+
+FICHE_LAYOUTS['rapport'] = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>Fiche Technique - {{config_ref}}</title>
+        {{head}}
+    </head>
+    <body>
+        <div class="container">
+            <h1>Fiche Technique Menuiserie</h1>
+            <p style="text-align:center;"><strong>Projet :</strong> {{project_name}} | <strong>Réf :</strong> {{config_ref}}</p>
+            
+            <div class="drawing">
+                {{svg}}
+            </div>
+            
+            <h2>Caractéristiques Techniques</h2>
+            <table>
+                {{table_rows}}
+            </table>
+            
+            <div class="footer">
+                Généré par FenêtrePro V73 - {{project_name}}
+            </div>
+        </div>
+        <script>
+            // Auto print if desired, or let user click
+            // window.print();
+        </script>
+    </body>
+    </html>
+    """
+
+TEMPLATES = {kind: FicheTemplate(kind, FICHE_CSS[kind], layout) for kind, layout in FICHE_LAYOUTS.items()}
+# Version des gabarits (clé des fiches mises en cache, cf. artifact_cache) : change avec le CSS ou la mise en page
+TEMPLATE_VERSION = hashlib.sha256(
+    "".join(FICHE_CSS[k] + FICHE_LAYOUTS.get(k, "") for k in sorted(FICHE_CSS)).encode("utf-8")).hexdigest()[:16]
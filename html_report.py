@@ -0,0 +1,85 @@
+"""Rapport HTML du projet écrit en flux : un morceau par repère.
+
+`iter_report()` est un générateur : l'en-tête sort avant que le premier repère ne
+soit calculé, puis chaque repère (SVG + tableau) est produit, écrit et oublié. La
+mémoire ne dépend pas du nombre de repères et le début du document est disponible
+tout de suite (fichier, réponse HTTP, st.write_stream...).
+
+Même présentation que generate_html_report (gabarit 'rapport' de fiche_templates).
+Module importable sans Streamlit.
+"""
+import html
+
+import fiche_templates
+
+ROW_TEMPLATE = ("<tr><td style='font-weight:bold; width:40%; padding:5px; border-bottom:1px solid #ddd;'>{}</td>"
+                "<td style='padding:5px; border-bottom:1px solid #ddd;'>{}</td></tr>")
+
+REPORT_CSS = fiche_templates.FICHE_CSS['rapport_projet']
+
+HEAD = fiche_templates.FicheTemplate('rapport_projet', REPORT_CSS, """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Rapport - {{project_name}}</title>
+    {{head}}
+</head>
+<body>
+    <div class="container">
+        <h1>Rapport Technique</h1>
+        <p style="text-align:center;"><strong>Projet :</strong> {{project_name}}</p>
+""")
+
+SECTION = fiche_templates.FicheTemplate('rapport_projet', REPORT_CSS, """
+        <div class="repere" id="repere-{{no}}">
+            <h2>{{no}}. {{ref}} <small>({{module}})</small></h2>
+            <div class="drawing">
+                {{svg}}
+            </div>
+            <table>
+                {{table_rows}}
+            </table>
+        </div>
+""")
+
+FOOT = fiche_templates.FicheTemplate('rapport_projet', REPORT_CSS, """
+        <div class="footer">
+            {{count}} repère(s) - Généré par FenêtrePro V73 - {{project_name}}
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+
+def table_rows(data_dict):
+    """Lignes <tr> du tableau de caractéristiques (une par clé)."""
+    for key, value in data_dict.items():
+        yield ROW_TEMPLATE.format(key, value)
+
+
+def iter_report(project_name, reperes, stylesheet_href=None):
+    """Morceaux HTML du rapport ; `reperes` peut être un générateur de dicts
+    {'ref', 'module', 'svg', 'data'} (calculés à la demande)."""
+    name = html.escape(str(project_name))
+    yield HEAD.render({'project_name': name}, {}, stylesheet_href)
+    count = 0
+    for count, rep in enumerate(reperes, start=1):
+        yield SECTION.render({
+            'no': count, 'ref': html.escape(str(rep.get('ref', '-'))), 'module': html.escape(str(rep.get('module', ''))),
+            'svg': rep.get('svg', ''), 'table_rows': "".join(table_rows(rep.get('data', {}))),
+        }, {})
+    yield FOOT.render({'count': count, 'project_name': name}, {})
+
+
+def write_report(chunks, out, encoding="utf-8"):
+    """Écrit les morceaux dans `out` (chemin ou fichier binaire) ; renvoie le nombre d'octets."""
+    if isinstance(out, (str, bytes)) or hasattr(out, "__fspath__"):
+        with open(out, "wb") as f:
+            return write_report(chunks, f, encoding)
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode(encoding)
+        out.write(data)
+        size += len(data)
+    return size
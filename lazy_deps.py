@@ -0,0 +1,123 @@
+"""Chargement différé des dépendances lourdes (pandas, ReportLab, svglib, pypdf).
+
+`lazy("pandas")` renvoie un proxy : le vrai import n'a lieu qu'au premier accès
+d'attribut. `require()` importe un groupe à la demande (avant un export PDF) et
+`warm_up()` le fait dans un thread d'arrière-plan après le démarrage du serveur,
+pour que le premier clic sur un export ne paie pas l'import ni l'init des polices.
+Chaque import est chronométré : `import_report()`.
+"""
+import importlib
+import sys
+import threading
+import time
+
+# groupe -> modules importés ensemble (ceux réellement utilisés par l'app)
+HEAVY_DEPS = {
+    'pandas': ("pandas",),
+    'reportlab': ("reportlab.lib.pagesizes", "reportlab.lib.utils", "reportlab.pdfgen.canvas",
+                  "reportlab.graphics.renderPDF"),
+    'svglib': ("svglib.svglib",),
+    'pypdf': ("pypdf",),
+    # Vignettes des annexes (cf. annex_pages.py) : jamais préchargé
+    'pymupdf': ("pymupdf",),
+}
+WARM_UP_ORDER = ("reportlab", "svglib", "pypdf", "pandas")
+
+_locks = {group: threading.Lock() for group in HEAVY_DEPS}
+_report = {}  # groupe -> {'seconds', 'status', 'by', 'error'}
+LOADED = ("chargé", "déjà chargé")
+
+
+def _init_reportlab():
+    # Première police standard + premier canvas : chargement des AFM et des tables d'encodage
+    import io
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(io.BytesIO())
+    for font in ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique"):
+        c.setFont(font, 10)
+        c.stringWidth("Miroiterie 0123456789", font, 10)
+
+
+POST_IMPORT = {'reportlab': _init_reportlab}
+
+
+def require(*groups, by="demande"):
+    """Importe (une fois) les groupes demandés ; renvoie le module principal du dernier groupe."""
+    module = None
+    for group in groups:
+        modules = HEAVY_DEPS[group]
+        entry = _report.get(group)
+        if entry is not None and entry['status'] in LOADED:
+            module = sys.modules[modules[0]]
+            continue
+        # Un verrou par groupe : un préchargement de ReportLab ne bloque pas pandas
+        with _locks[group]:
+            entry = _report.get(group)
+            if entry is None or entry['status'] == "erreur":
+                t0 = time.perf_counter()
+                already = all(m in sys.modules for m in modules)
+                try:
+                    for name in modules:
+                        importlib.import_module(name)
+                    if group in POST_IMPORT:
+                        POST_IMPORT[group]()
+                    entry = {'status': "déjà chargé" if already else "chargé", 'error': None}
+                except ImportError as e:
+                    entry = {'status': "erreur", 'error': str(e)}
+                entry.update(seconds=time.perf_counter() - t0, by=by)
+                _report[group] = entry
+            if entry['status'] == "erreur":
+                raise ImportError(f"{group} : {entry['error']}")
+        module = sys.modules[modules[0]]
+    return module
+
+
+class LazyModule:
+    """Proxy de module : l'import réel (chronométré) se fait au premier accès."""
+
+    def __init__(self, group):
+        self._group = group
+
+    def __getattr__(self, attr):
+        return getattr(require(self._group, by="premier accès"), attr)
+
+    def __repr__(self):
+        state = _report.get(self._group, {}).get('status', "non chargé")
+        return f"<lazy module {self._group} ({state})>"
+
+
+def lazy(group):
+    return LazyModule(group)
+
+
+def is_loaded(group):
+    return _report.get(group, {}).get('status') in LOADED
+
+
+def warm_up(groups=WARM_UP_ORDER, background=True):
+    """Précharge les groupes (thread démon si background) ; les absents sont notés, pas levés."""
+    def run():
+        for group in groups:
+            try:
+                require(group, by="préchargement")
+            except ImportError:
+                pass
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="deps-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_report():
+    """[(groupe, secondes ou None, statut, origine)] dans l'ordre de HEAVY_DEPS."""
+    rows = []
+    for group in HEAVY_DEPS:
+        entry = _report.get(group)
+        if entry is None:
+            rows.append((group, None, "non chargé", None))
+        else:
+            rows.append((group, entry['seconds'], entry['status'], entry['by']))
+    return rows
@@ -0,0 +1,144 @@
+"""Export du projet en une seule archive ZIP (fiches HTML, index, ressources, JSON).
+
+    index.html              liste des repères, liens vers les fiches
+    project.json            le projet tel qu'enregistré (même contenu que l'export JSON)
+    fiches/NNN_<ref>.html   une fiche par repère
+    css/fiche_<type>.<empreinte>.css
+    assets/<nom>.<empreinte>.<ext>
+
+Les fiches ne contiennent plus ni CSS ni images en base64 : chaque feuille de style
+et chaque ressource (logo, schémas) n'est écrite qu'une fois, quel que soit le nombre
+de repères. L'archive est écrite au fil de l'eau (zipfile, une fiche à la fois) :
+la mémoire ne dépend pas de la taille du projet.
+
+Module importable sans Streamlit : le rendu des fiches est fourni par l'appelant.
+"""
+import html
+import json
+import re
+import zipfile
+
+import fiche_templates
+
+FICHE_DIR = "fiches"
+CSS_DIR = "css"
+ASSET_DIR = "assets"
+# Les fiches sont un niveau sous la racine de l'archive
+FICHE_PREFIX = "../"
+
+SAFE_NAME_RE = re.compile(r"[^\w-]+")
+
+
+def safe_name(text, fallback="repere"):
+    return SAFE_NAME_RE.sub("_", str(text)).strip("_") or fallback
+
+
+class Bundle:
+    """Archive en cours d'écriture ; chaque ressource partagée n'y entre qu'une fois."""
+
+    def __init__(self, zf):
+        self.zf = zf
+        self._written = set()
+
+    def _write_once(self, arcname, data, compress_type=None):
+        if arcname not in self._written:
+            self.zf.writestr(arcname, data, compress_type=compress_type)
+            self._written.add(arcname)
+        return arcname
+
+    def add_asset(self, asset):
+        """Ressource brand_assets (logo, schéma...) ; renvoie son chemin dans l'archive."""
+        # Images déjà compressées : stockées telles quelles
+        return self._write_once(f"{ASSET_DIR}/{asset.static_name}", asset.data, zipfile.ZIP_STORED)
+
+    def add_stylesheet(self, kind):
+        """Feuille de style partagée d'un type de fiche ; renvoie son chemin dans l'archive."""
+        return self._write_once(f"{CSS_DIR}/{fiche_templates.stylesheet_name(kind)}", fiche_templates.FICHE_CSS[kind])
+
+    def asset_href(self, asset):
+        """URL relative à une fiche (fiches/...)."""
+        return FICHE_PREFIX + self.add_asset(asset)
+
+    def stylesheet_href(self, kind):
+        return FICHE_PREFIX + self.add_stylesheet(kind)
+
+    @property
+    def names(self):
+        return sorted(self._written)
+
+
+INDEX_CSS = """
+        body { font-family: sans-serif; margin: 30px; color: #333; }
+        header { display: flex; align-items: center; justify-content: space-between; border-bottom: 3px solid #2c3e50; padding-bottom: 10px; }
+        header img { max-height: 70px; }
+        h1 { color: #2c3e50; margin: 0; }
+        table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+        th { background: #2c3e50; color: #fff; text-align: left; padding: 6px 8px; }
+        td { padding: 6px 8px; border-bottom: 1px solid #ddd; }
+        tr.error td { color: #c0392b; }
+"""
+
+
+def render_index(project_name, rows, logo_href=None):
+    """Page d'accueil de l'archive : un lien par fiche."""
+    esc = html.escape
+    logo = f'<img src="{esc(logo_href)}" alt="Logo">' if logo_href else ""
+    lines = []
+    for row in rows:
+        if row.get('href'):
+            ref = f'<a href="{esc(row["href"])}">{esc(str(row["ref"]))}</a>'
+        else:
+            ref = esc(str(row['ref']))
+        css = ' class="error"' if row.get('error') else ""
+        lines.append(f"<tr{css}><td>{row['no']}</td><td>{ref}</td><td>{esc(str(row['module']))}</td>"
+                     f"<td>{esc(str(row.get('dims', '-')))}</td><td>{esc(str(row.get('qte', '-')))}</td>"
+                     f"<td>{esc(row.get('error') or '')}</td></tr>")
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{esc(project_name)} - Fiches techniques</title>
+    <style>{INDEX_CSS}</style>
+</head>
+<body>
+    <header><h1>{esc(project_name)}</h1>{logo}</header>
+    <p>{len(rows)} repère(s) - <a href="project.json">project.json</a></p>
+    <table>
+        <tr><th>N°</th><th>Repère</th><th>Module</th><th>Dimensions</th><th>Qté</th><th></th></tr>
+        {"".join(lines)}
+    </table>
+</body>
+</html>
+"""
+
+
+def write_bundle(out, project, render_fiche, logo=None, on_progress=None):
+    """Écrit l'archive du projet dans `out` (chemin ou fichier binaire).
+
+    `render_fiche(cfg, bundle)` renvoie (infos du repère, html) ; les URL de ressources
+    s'obtiennent par bundle.asset_href()/stylesheet_href(). Une fiche en erreur figure
+    dans l'index sans lien, l'export continue. Renvoie les statistiques de l'export.
+    """
+    configs = project.get('configs', [])
+    total = len(configs)
+    rows = []
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        bundle = Bundle(zf)
+        zf.writestr("project.json", json.dumps(project, indent=2, ensure_ascii=False, default=str))
+        for no, cfg in enumerate(configs, start=1):
+            row = {'no': no, 'ref': cfg.get('ref', '-'), 'module': cfg.get('data', {}).get('mode_module', 'Menuiserie')}
+            try:
+                info, fiche_html = render_fiche(cfg, bundle)
+                row.update(info)
+                arcname = f"{FICHE_DIR}/{no:03d}_{safe_name(row['ref'])}.html"
+                zf.writestr(arcname, fiche_html)
+                row['href'] = arcname
+            except Exception as e:
+                row['error'] = f"Erreur : {e}"
+            rows.append(row)
+            if on_progress:
+                on_progress(no, total)
+        logo_href = bundle.add_asset(logo) if logo is not None else None
+        zf.writestr("index.html", render_index(project.get('name', 'Projet'), rows, logo_href))
+    return {'fiches': sum(1 for r in rows if r.get('href')), 'errors': sum(1 for r in rows if r.get('error')),
+            'files': bundle.names}
@@ -0,0 +1,229 @@
+"""File d'attente locale des exports longs (dossier PDF projet, etc.).
+
+Module importable (sans Streamlit) : une seule instance est partagée par toutes
+les sessions via st.cache_resource. Chaque job a un identifiant, une progression,
+une annulation coopérative et un fichier résultat qui expire après `ttl` secondes.
+
+Équité : un nombre fixe de threads, au plus `per_session` job(s) actif(s) par
+session, et le job suivant revient à la session en attente servie le moins
+récemment — une session qui empile les exports ne bloque pas les autres.
+"""
+import collections
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+QUEUED, RUNNING, DONE, ERROR, CANCELLED = "queued", "running", "done", "error", "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Levée dans le job quand l'utilisateur a demandé l'annulation."""
+
+
+class JobExpired(Exception):
+    """Résultat purgé (ttl dépassé) : l'export est à relancer."""
+
+
+class ReportJob:
+    """Un export : état, progression et chemin du fichier résultat."""
+
+    def __init__(self, session, kind, fn, filename, mime, label=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.session = session
+        self.kind = kind
+        self.fn = fn
+        self.filename = filename
+        self.mime = mime
+        self.label = label or kind
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "En attente..."
+        self.error = None
+        self.note = None  # résumé affiché avec le téléchargement (renseigné par fn)
+        self.path = None
+        self.created = time.time()
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ACTIVE_STATES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+
+    def report(self, done, total, text=None):
+        """Callback de progression (compatible on_progress) ; point d'annulation."""
+        self.raise_if_cancelled()
+        self.progress = min(1.0, done / total) if total else 0.0
+        self.message = text or f"{done}/{total}"
+
+    @property
+    def size(self):
+        """Taille du résultat en octets (None s'il n'est pas/plus disponible) : un stat, pas de lecture."""
+        if self.status != DONE or not self.path:
+            return None
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return None
+
+    def read(self):
+        if self.status != DONE or not self.path or not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def read_or_raise(self):
+        """Pour st.download_button(data=callable) : lu au clic seulement, JobExpired si purgé entre-temps.
+
+        Lever plutôt que renvoyer b"" : Streamlit signale l'échec au lieu de servir un fichier vide.
+        """
+        data = self.read()
+        if data is None:
+            raise JobExpired(self.id)
+        return data
+
+
+class ReportQueue:
+    """Pool de threads + ordonnancement équitable entre sessions."""
+
+    def __init__(self, workers=2, per_session=1, ttl=1800, result_dir=None):
+        self.workers = workers
+        self.per_session = per_session
+        self.ttl = ttl
+        self.result_dir = result_dir or tempfile.mkdtemp(prefix="reports_")
+        self._jobs = {}
+        self._waiting = {}  # session -> deque de jobs en attente
+        self._running = collections.Counter()
+        self._last_served = {}  # session -> instant du dernier démarrage, pour le tour de rôle
+        self._cond = threading.Condition()
+        self._threads = [threading.Thread(target=self._worker, name=f"report-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    # --- API ---
+    def submit(self, session, kind, fn, filename, mime="application/octet-stream", label=None):
+        """Met en file `fn(job) -> bytes`. Un job actif du même type pour la session est renvoyé tel quel (double clic).
+
+        `fn` peut aussi écrire lui-même son résultat dans `job.path` (gros exports en flux) et renvoyer None.
+        """
+        self.purge()
+        with self._cond:
+            for job in self._jobs.values():
+                if job.session == session and job.kind == kind and job.active:
+                    return job
+            job = ReportJob(session, kind, fn, filename, mime, label)
+            self._jobs[job.id] = job
+            self._waiting.setdefault(session, collections.deque()).append(job)
+            self._cond.notify()
+        return job
+
+    def get(self, job_id):
+        self.purge()
+        return self._jobs.get(job_id)
+
+    def jobs_for(self, session, kind=None):
+        """Jobs de la session (les plus récents d'abord)."""
+        self.purge()
+        with self._cond:
+            jobs = [j for j in self._jobs.values() if j.session == session and (kind is None or j.kind == kind)]
+        return sorted(jobs, key=lambda j: j.created, reverse=True)
+
+    def cancel(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job._cancel.set()
+            if job.status == QUEUED:
+                waiting = self._waiting.get(job.session)
+                if waiting is not None:
+                    waiting.remove(job)
+                    if not waiting:
+                        del self._waiting[job.session]
+                self._finish(job, CANCELLED, "Annulé")
+        return True
+
+    def purge(self, now=None):
+        """Supprime les jobs terminés depuis plus de `ttl` secondes et leurs fichiers."""
+        now = now or time.time()
+        with self._cond:
+            expired = [j for j in self._jobs.values() if j.finished and now - j.finished > self.ttl]
+            for job in expired:
+                del self._jobs[job.id]
+                if job.path and os.path.exists(job.path):
+                    os.remove(job.path)
+        return len(expired)
+
+    def stats(self):
+        with self._cond:
+            return collections.Counter(j.status for j in self._jobs.values())
+
+    def close(self):
+        shutil.rmtree(self.result_dir, ignore_errors=True)
+
+    # --- Ordonnancement ---
+    def _next_job(self):
+        # Tour de rôle : parmi les sessions éligibles, celle servie le moins récemment
+        eligible = [sess for sess, waiting in self._waiting.items()
+                    if waiting and self._running[sess] < self.per_session]
+        if not eligible:
+            return None
+        session = min(eligible, key=lambda sess: self._last_served.get(sess, 0.0))
+        waiting = self._waiting[session]
+        job = waiting.popleft()
+        if not waiting:
+            del self._waiting[session]
+        self._last_served[session] = time.monotonic()
+        return job
+
+    def _finish(self, job, status, message):
+        job.status = status
+        job.message = message
+        job.finished = time.time()
+        job.fn = None  # libère les données capturées (projet, SVG...)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                job.status = RUNNING
+                job.message = "Démarrage..."
+                self._running[job.session] += 1
+
+            status, message = DONE, "Terminé"
+            job.path = os.path.join(self.result_dir, f"{job.id}_{job.filename}")
+            try:
+                job.raise_if_cancelled()
+                data = job.fn(job)
+                job.raise_if_cancelled()
+                if data is not None:
+                    with open(job.path, "wb") as f:
+                        f.write(data)
+                job.progress = 1.0
+            except JobCancelled:
+                status, message = CANCELLED, "Annulé"
+            except Exception as e:
+                job.error = str(e)
+                status, message = ERROR, f"Erreur : {e}"
+            if status != DONE and os.path.exists(job.path):
+                os.remove(job.path)  # fichier partiel d'un job écrit en flux
+
+            with self._cond:
+                self._running[job.session] -= 1
+                self._finish(job, status, message)
+                self._cond.notify_all()
@@ -0,0 +1,325 @@
+"""Maillage de la vue 3D (mur, appui, dormant, ouvrants, vitrages) calculé en NumPy.
+
+Le visualiseur recevait la liste des zones et reconstruisait toute la géométrie en
+JavaScript (THREE.Shape / ExtrudeGeometry) à chaque affichage. Les tampons sont
+maintenant calculés ici une fois par configuration, regroupés par matériau :
+
+    {'materials': {'frame': {'position', 'normal', 'index', 'vertices', 'triangles'}, ...}}
+
+`position` / `normal` : Float32Array (x, y, z), `index` : Uint32Array, en base64
+petit-boutiste ; le navigateur n'a plus qu'à les envoyer au GPU. Les couleurs restent
+côté JavaScript : changer un coloris ne recalcule pas le maillage.
+
+Repère et dimensions (mm) identiques à l'ancien code three.js : Y vers le haut,
+Z vers l'intérieur, face intérieure du mur en z = 0.
+Module importable sans Streamlit.
+"""
+import base64
+import json
+import math
+import os
+
+import numpy as np
+
+import artifact_cache
+
+MESH_VERSION = artifact_cache.source_version(os.path.abspath(__file__))
+MATERIALS = ("wall", "sill", "floor", "frame", "glass", "handle", "habillage", "bavette")
+
+FRAME_W = 50        # largeur des montants et traverses du dormant
+SASH_PROFILE = 55   # largeur du profil d'ouvrant
+ZONE_TOL = 1
+ROOM_HEIGHT = 3000
+
+
+# --- GÉOMÉTRIES ÉLÉMENTAIRES (repère local) ---
+
+def _signed_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _ear_clip(points):
+    """Triangles (indices) d'un polygone simple parcouru dans le sens direct."""
+    remaining = list(range(len(points)))
+    triangles = []
+    while len(remaining) > 3:
+        n = len(remaining)
+        for k in range(n):
+            a, b, c = remaining[k - 1], remaining[k], remaining[(k + 1) % n]
+            pa, pb, pc = points[a], points[b], points[c]
+            if (pb[0] - pa[0]) * (pc[1] - pa[1]) - (pb[1] - pa[1]) * (pc[0] - pa[0]) <= 0:
+                continue  # sommet rentrant (ou aligné)
+            others = [points[i] for i in remaining if i not in (a, b, c)]
+            if any(_in_triangle(p, pa, pb, pc) for p in others):
+                continue
+            triangles.append((a, b, c))
+            del remaining[k]
+            break
+        else:
+            break  # polygone dégénéré : on garde ce qui est triangulé
+    if len(remaining) == 3:
+        triangles.append(tuple(remaining))
+    return triangles
+
+
+def _in_triangle(p, a, b, c):
+    def side(u, v, w):
+        return (v[0] - u[0]) * (w[1] - u[1]) - (v[1] - u[1]) * (w[0] - u[0])
+    return side(a, b, p) >= 0 and side(b, c, p) >= 0 and side(c, a, p) >= 0
+
+
+def extrude(outer, depth, hole=None):
+    """Prisme d'un contour (x, y) de z = 0 à z = depth, faces planes (cf. THREE.ExtrudeGeometry).
+
+    `hole` : contour intérieur de même nombre de sommets, homologues du contour
+    extérieur (cadre d'un mur ou d'un ouvrant) ; les faces sont alors des trapèzes.
+    """
+    outer = np.asarray(outer, dtype=np.float64)
+    if _signed_area(outer) < 0:
+        outer = outer[::-1]
+    contours = [outer]
+    if hole is None:
+        cap = np.array(_ear_clip(outer), dtype=np.int64).reshape(-1, 3)
+        cap_points = outer
+    else:
+        hole = np.asarray(hole, dtype=np.float64)
+        if _signed_area(hole) < 0:
+            hole = hole[::-1]
+        n = len(outer)
+        k = np.arange(n)
+        k1 = (k + 1) % n
+        # sommets 0..n-1 : extérieur, n..2n-1 : intérieur
+        cap = np.concatenate([np.stack([k, k1, n + k1], axis=1), np.stack([k, n + k1, n + k], axis=1)])
+        cap_points = np.concatenate([outer, hole])
+        contours.append(hole[::-1])  # sens indirect : normales des tranches vers le vide
+
+    positions, normals, indices = [], [], []
+
+    def add(points, normal, tris):
+        base = sum(len(p) for p in positions)
+        positions.append(points)
+        normals.append(np.broadcast_to(normal, points.shape))
+        indices.append(tris + base)
+
+    m = len(cap_points)
+    add(np.column_stack([cap_points, np.full(m, depth)]), (0.0, 0.0, 1.0), cap)
+    add(np.column_stack([cap_points, np.zeros(m)]), (0.0, 0.0, -1.0), cap[:, ::-1])
+
+    for contour in contours:
+        nxt = np.roll(contour, -1, axis=0)
+        edge = nxt - contour
+        length = np.hypot(edge[:, 0], edge[:, 1])
+        keep = length > 0
+        contour, nxt, edge, length = contour[keep], nxt[keep], edge[keep], length[keep]
+        e = len(contour)
+        z0, z1 = np.zeros(e), np.full(e, depth)
+        quads = np.stack([np.column_stack([contour, z0]), np.column_stack([nxt, z0]),
+                          np.column_stack([nxt, z1]), np.column_stack([contour, z1])], axis=1)
+        side = np.column_stack([edge[:, 1] / length, -edge[:, 0] / length, np.zeros(e)])
+        base = sum(len(p) for p in positions)
+        positions.append(quads.reshape(-1, 3))
+        normals.append(np.repeat(side, 4, axis=0))
+        q = base + 4 * np.arange(e)[:, None]
+        indices.append(np.concatenate([q + (0, 1, 2), q + (0, 2, 3)]))
+
+    return np.concatenate(positions), np.concatenate(normals), np.concatenate(indices)
+
+
+def rect(w, h, cx=0.0, cy=0.0):
+    return [(cx - w / 2, cy - h / 2), (cx + w / 2, cy - h / 2), (cx + w / 2, cy + h / 2), (cx - w / 2, cy + h / 2)]
+
+
+def box(w, h, d):
+    """Pavé centré (cf. THREE.BoxGeometry)."""
+    positions, normals, indices = extrude(rect(w, h), d)
+    positions[:, 2] -= d / 2
+    return positions, normals, indices
+
+
+def plane(w, h):
+    """Rectangle dans le plan XY, normale +Z (cf. THREE.PlaneGeometry)."""
+    positions = np.array([(x, y, 0.0) for x, y in rect(w, h)])
+    normals = np.tile((0.0, 0.0, 1.0), (4, 1))
+    return positions, normals, np.array([(0, 1, 2), (0, 2, 3)])
+
+
+def transform(position=(0, 0, 0), rotation=(0, 0, 0), parent=None):
+    """Matrice 4x4 (rotation d'Euler XYZ puis translation, comme Object3D), composée au parent."""
+    rx, ry, rz = rotation
+    cx, sx, cy, sy, cz, sz = math.cos(rx), math.sin(rx), math.cos(ry), math.sin(ry), math.cos(rz), math.sin(rz)
+    matrix = np.eye(4)
+    matrix[:3, :3] = (np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+                      @ np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+                      @ np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]]))
+    matrix[:3, 3] = position
+    return matrix if parent is None else parent @ matrix
+
+
+class SceneMesh:
+    """Géométries accumulées par matériau, fusionnées en un tampon par matériau."""
+
+    def __init__(self):
+        self.parts = {name: [] for name in MATERIALS}
+
+    def add(self, material, geometry, matrix):
+        positions, normals, indices = geometry
+        rot = matrix[:3, :3]
+        self.parts[material].append((positions @ rot.T + matrix[:3, 3], normals @ rot.T, indices))
+
+    def buffers(self):
+        """{matériau: (positions float32 Nx3, normales float32 Nx3, indices uint32 Mx3)}."""
+        merged = {}
+        for material, parts in self.parts.items():
+            if not parts:
+                continue
+            offsets = np.cumsum([0] + [len(p) for p, _, _ in parts[:-1]])
+            merged[material] = (
+                np.concatenate([p for p, _, _ in parts]).astype("<f4"),
+                np.concatenate([n for _, n, _ in parts]).astype("<f4"),
+                np.concatenate([i + off for (_, _, i), off in zip(parts, offsets)]).astype("<u4"),
+            )
+        return merged
+
+
+# --- SCÈNE ---
+
+def scene_params(width, height, depth, zones, wall_depth, reveal_w, reveal_h, allege):
+    """Paramètres géométriques de la scène (clé du cache : ni couleurs, ni libellés)."""
+    return {
+        'width': width, 'height': height, 'depth': depth, 'wall_depth': wall_depth,
+        'reveal_w': reveal_w, 'reveal_h': reveal_h, 'allege': allege or 0,
+        'zones': [{'x': z['x'], 'y': z['y'], 'w': z['w'], 'h': z['h'], 'type': z.get('type') or ""} for z in zones or ()],
+    }
+
+
+def _sash(mesh, parent, w, h, depth, handle=None):
+    """Ouvrant : cadre extrudé, vitrage, poignée éventuelle ('left', 'right', 'top')."""
+    sp = SASH_PROFILE
+    mesh.add('frame', extrude(rect(w, h), depth, hole=rect(w - 2 * sp, h - 2 * sp)), transform((0, 0, -depth / 2), parent=parent))
+    mesh.add('glass', box(w - 2 * sp, h - 2 * sp, 6), parent)
+    if handle:
+        hx = {'left': -w / 2 + sp / 2, 'right': w / 2 - sp / 2}.get(handle, 0)
+        hy = h / 2 - sp / 2 if handle == 'top' else 0
+        rot = (0, 0, math.pi / 2) if handle == 'top' else (0, 0, 0)
+        mesh.add('handle', box(20, 100, 20), transform((hx, hy, depth / 2 + 10), rot, parent))
+
+
+def build_scene(params):
+    """SceneMesh de la menuiserie posée dans son mur (mêmes cotes que l'ancien rendu three.js)."""
+    mesh = SceneMesh()
+    fw, fh, fd = params['width'], params['height'], params['depth']
+    wd, hole_w, hole_h, allege = params['wall_depth'], params['reveal_w'], params['reveal_h'], params['allege']
+
+    win_top, win_bot = hole_h / 2, -hole_h / 2
+    floor_y = win_bot - allege
+    wall_w = max(4000, hole_w * 4)
+
+    # Mur percé (face intérieure en z = 0)
+    wall_cy = floor_y + ROOM_HEIGHT / 2
+    mesh.add('wall', extrude(rect(wall_w, ROOM_HEIGHT, cy=wall_cy), wd, hole=rect(hole_w, hole_h)), transform((0, 0, -wd)))
+
+    # Appui en 3 parties (profil extrudé le long de X)
+    up_h, sill_offset, extension, nose_h = 15, -5, 20, 50
+    reach = -(wd + extension)
+    mid = [(0, up_h), (-fd, up_h), (-fd, 0), (reach, -10), (reach, -nose_h), (0, -nose_h)]
+    side = [(0, 0), (-fd, 0), (reach, -10), (reach, -nose_h), (0, -nose_h)]
+    turn = (0, -math.pi / 2, 0)
+    mesh.add('sill', extrude(mid, fw), transform((fw / 2, win_bot, sill_offset), turn))
+    side_w = ((hole_w + 60) - fw) / 2
+    if side_w > 0:
+        side_geo = extrude(side, side_w)
+        mesh.add('sill', side_geo, transform((-fw / 2, win_bot, sill_offset), turn))
+        mesh.add('sill', side_geo, transform(((hole_w + 60) / 2, win_bot, sill_offset), turn))
+    mesh.add('wall', box(hole_w + 2, 65, 5), transform((0, win_bot - 17.5, -2.5)))  # doublage
+
+    mesh.add('floor', plane(wall_w, wall_w), transform((0, floor_y, 0), (-math.pi / 2, 0, 0)))
+    mesh.add('wall', plane(wall_w, wall_w), transform((0, floor_y + ROOM_HEIGHT, 0), (math.pi / 2, 0, 0)))
+
+    # Dormant, ailes et recouvrements
+    win = transform((0, win_bot + 15 + fh / 2, -fd / 2))
+    for geo, pos in ((box(FRAME_W, fh, fd), (-fw / 2 + FRAME_W / 2, 0, 0)), (box(FRAME_W, fh, fd), (fw / 2 - FRAME_W / 2, 0, 0)),
+                     (box(fw, FRAME_W, fd), (0, fh / 2 - FRAME_W / 2, 0)), (box(fw, FRAME_W, fd), (0, -fh / 2 + FRAME_W / 2, 0))):
+        mesh.add('frame', geo, transform(pos, parent=win))
+    wing_s, wing_th = 27, 2
+    for geo, pos in ((box(fw + 2 * wing_s, wing_s, wing_th), (0, fh / 2 + wing_s / 2)),
+                     (box(wing_s, fh + 2 * wing_s, wing_th), (-fw / 2 - wing_s / 2, 0)),
+                     (box(wing_s, fh + 2 * wing_s, wing_th), (fw / 2 + wing_s / 2, 0)),
+                     (box(fw + 2 * wing_s, wing_s, wing_th), (0, -fh / 2 - wing_s / 2))):
+        mesh.add('frame', geo, transform((*pos, fd / 2 + wing_th / 2), parent=win))
+    lip_w = 20
+    for geo, pos in ((box(fw, lip_w, wing_th), (0, fh / 2 - lip_w / 2)), (box(fw, lip_w, wing_th), (0, -fh / 2 + lip_w / 2)),
+                     (box(lip_w, fh, wing_th), (-fw / 2 + lip_w / 2, 0)), (box(lip_w, fh, wing_th), (fw / 2 - lip_w / 2, 0))):
+        mesh.add('frame', geo, transform((*pos, fd / 2 + wing_th / 2), parent=win))
+
+    # Zones : meneaux / traverses puis ouvrants
+    for zone in params['zones']:
+        sx, sy, sw, sh = zone['x'], zone['y'], zone['w'], zone['h']
+        if sx < ZONE_TOL:
+            sx += FRAME_W
+            sw -= FRAME_W
+        if zone['x'] + zone['w'] > fw - ZONE_TOL:
+            sw -= FRAME_W
+        if sy < ZONE_TOL:
+            sy += FRAME_W
+            sh -= FRAME_W
+        if zone['y'] + zone['h'] > fh - ZONE_TOL:
+            sh -= FRAME_W
+        if zone['x'] > ZONE_TOL:
+            mesh.add('frame', box(FRAME_W, zone['h'], fd), transform((-fw / 2 + zone['x'], fh / 2 - (zone['y'] + zone['h'] / 2), 0), parent=win))
+            sx += FRAME_W / 2
+            sw -= FRAME_W / 2
+        if zone['y'] > ZONE_TOL:
+            mesh.add('frame', box(zone['w'], FRAME_W, fd), transform((-fw / 2 + zone['x'] + zone['w'] / 2, fh / 2 - zone['y'], 0), parent=win))
+            sy += FRAME_W / 2
+            sh -= FRAME_W / 2
+        if sw <= 0 or sh <= 0:
+            continue
+
+        group = transform((-fw / 2 + sx + sw / 2, fh / 2 - sy - sh / 2, 0), parent=win)
+        kind = zone['type'].lower()
+        sd = fd - 10
+        if 'fixe' in kind:
+            _sash(mesh, group, sw, sh, sd)
+        elif 'coulissant' in kind:
+            _sash(mesh, transform((-sw / 4, 0, -10), parent=group), sw / 2 + 20, sh, sd, 'right')
+            _sash(mesh, transform((sw / 4, 0, 10), parent=group), sw / 2 + 20, sh, sd, 'left')
+        elif 'soufflet' in kind:
+            _sash(mesh, group, sw, sh, sd, 'top')
+        elif '2 vantaux' in kind or 'double' in kind:
+            _sash(mesh, transform((-sw / 4, 0, 0), parent=group), sw / 2 - 2, sh, sd)
+            _sash(mesh, transform((sw / 4, 0, 0), parent=group), sw / 2 - 2, sh, sd, 'left')
+            mesh.add('frame', box(40, sh, sd + 5), transform((0, 0, 5), parent=group))  # battement
+        else:
+            _sash(mesh, group, sw, sh, sd, 'left')
+
+    # Habillage intérieur et bavette
+    hab_th, hab_depth = 4, 40
+    hab_z = -fd - hab_th / 2
+    top_h = max(hab_depth, max(0, hole_h - 40 - fh))
+    cornier_w = max(hab_depth, max(0, (hole_w - fw) / 2))
+    mesh.add('habillage', box(hole_w + 80, top_h, hab_th), transform((0, win_top - top_h / 2, hab_z)))
+    for x in (-fw / 2 - cornier_w / 2, fw / 2 + cornier_w / 2):
+        mesh.add('habillage', box(cornier_w, hole_h + top_h, hab_th), transform((x, top_h / 2 - hab_depth / 2, hab_z)))
+    mesh.add('bavette', plane(fw + 40, 60), transform((0, win_bot + 15 + 2, -fd - 20), (0.5, 0, 0)))
+    return mesh
+
+
+def _b64(array):
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def scene_payload(params):
+    """Tampons de la scène, sérialisables en JSON (base64 Float32 / Uint32)."""
+    materials = {}
+    for material, (positions, normals, indices) in build_scene(params).buffers().items():
+        materials[material] = {'position': _b64(positions), 'normal': _b64(normals), 'index': _b64(indices),
+                               'vertices': len(positions), 'triangles': len(indices)}
+    return {'version': MESH_VERSION, 'materials': materials}
+
+
+def cached_payload(params, cache=None):
+    """JSON des tampons, lu dans le cache d'artefacts (clé : géométrie + version du module)."""
+    cache = cache or artifact_cache.default_cache()
+    key = cache.key('mesh3d', params, MESH_VERSION)
+    return cache.get_or_build('mesh3d', key, lambda: json.dumps(scene_payload(params), separators=(",", ":")), 'json', text=True)
@@ -0,0 +1,70 @@
+"""Chargement headless de l'application pour les tests de rendu SVG.
+
+Les golden files et les baselines sont générés à partir d'``app_beta`` : c'est le
+seul module cible (``app.py`` n'a ni les mêmes dessins ni les options de LOD).
+"""
+import importlib
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(TESTS_DIR, "golden")
+BENCHMARK_DIR = os.path.join(TESTS_DIR, "benchmarks")
+
+# Cache disque des artefacts (artifact_cache) : un dossier jetable par session de test
+os.environ.setdefault("CONFIGURATEUR_CACHE_DIR", tempfile.mkdtemp(prefix="artifacts_test_"))
+# Index de recherche des annexes (annex_search) : idem
+os.environ.setdefault("CONFIGURATEUR_SEARCH_DB", os.path.join(tempfile.mkdtemp(prefix="search_test_"), "annexes.sqlite3"))
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+if TESTS_DIR not in sys.path:
+    sys.path.insert(0, TESTS_DIR)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: budget de temps dépendant de la machine (RUN_BENCHMARK=1)")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Les budgets de temps varient avec la charge de la machine : hors lancement par défaut
+    if os.environ.get("RUN_BENCHMARK") or os.environ.get("UPDATE_BENCHMARK"):
+        return
+    skip = pytest.mark.skip(reason="benchmark : lancer avec RUN_BENCHMARK=1")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Importe le script Streamlit en mode 'bare' (sans serveur)."""
+    # Le script exécute toute l'UI à l'import : on coupe les avertissements
+    # "missing ScriptRunContext" de Streamlit.
+    logging.disable(logging.WARNING)
+    # Pas de préchargement en tâche de fond pendant les mesures du benchmark
+    os.environ.setdefault("CONFIGURATEUR_WARM_UP", "0")
+    try:
+        module = importlib.import_module("app_beta")
+    finally:
+        logging.disable(logging.NOTSET)
+    return module
+
+
+@pytest.fixture
+def render(app):
+    """Rend un cas du corpus avec un session_state vierge."""
+    import streamlit as st
+    from svg_corpus import render_case
+
+    def _render(case):
+        st.session_state.clear()
+        return render_case(app, case)
+
+    yield _render
+    st.session_state.clear()
@@ -0,0 +1,172 @@
+"""Corpus figé de configurations pour les tests de non-régression SVG.
+
+Chaque cas = identifiant stable (nom du fichier golden), moteur de rendu
+et session_state minimal. Couvre chaque module, chaque type d'ouvrant,
+chaque forme de vitrage et chaque modèle d'habillage, plus quelques rendus
+à niveau de détail réduit (LOD).
+"""
+
+DEFAULT_ZONE_PARAMS = {
+    'traverses': 0,
+    'remplissage_global': "Vitrage",
+    'vitrage_ext': "4mm",
+    'vitrage_int': "4mm",
+    'pos_grille': "Aucune",
+}
+
+
+def leaf(type_ouv="Fixe", label=None, **params):
+    """Spécification d'une zone feuille (type d'ouvrant + paramètres)."""
+    p = dict(DEFAULT_ZONE_PARAMS)
+    p.update(params)
+    return {'leaf': type_ouv, 'params': p, 'label': label}
+
+
+def split(direction, value, first, second, traverse=0):
+    """Spécification d'une division ('Verticale (|)' ou 'Horizontale (-)')."""
+    return {'split': direction, 'value': value, 'children': [first, second], 'traverse': traverse}
+
+
+def build_tree(app, spec, node_id="root"):
+    """Construit un zone_tree avec init_node() du module testé."""
+    if 'leaf' in spec:
+        node = app.init_node(node_id, zone_params={'type': spec['leaf'], 'params': dict(spec['params'])})
+        if spec.get('label'):
+            node['label'] = spec['label']
+        return node
+    children = [build_tree(app, c, f"{node_id}_{i}") for i, c in enumerate(spec['children'])]
+    node = app.init_node(node_id, "split", spec['split'], spec['value'], children)
+    node['traverse_thickness'] = spec['traverse']
+    return node
+
+
+MENUISERIE_CASES = [
+    ("men_fixe", {'width_dorm': 1200, 'height_dorm': 1400}, leaf("Fixe", "F")),
+    ("men_1vantail_tg", {'width_dorm': 800, 'height_dorm': 1200}, leaf("1 Vantail", "OF", sens="TG", h_poignee=1000)),
+    ("men_1vantail_td_ob", {'width_dorm': 800, 'height_dorm': 1200}, leaf("1 Vantail", "OB", sens="TD", ob=True)),
+    ("men_2vantaux", {'width_dorm': 1400, 'height_dorm': 1500}, leaf("2 Vantaux", "OF2", principal="D", pos_grille="Vtl Gauche")),
+    ("men_coulissant", {'width_dorm': 2400, 'height_dorm': 2150}, leaf("Coulissant", "CO", principal="G")),
+    ("men_soufflet", {'width_dorm': 600, 'height_dorm': 400}, leaf("Soufflet", "S")),
+    ("men_fixe_traverses", {'width_dorm': 1000, 'height_dorm': 2000},
+     leaf("Fixe", "F", traverses=1, traverses_v=1, epaisseur_traverse=40, remp_haut="Vitrage", remp_bas="Panneau")),
+    ("men_split_vertical", {'width_dorm': 1800, 'height_dorm': 1400},
+     split("Verticale (|)", 900, leaf("1 Vantail", "A", sens="TD"), leaf("Fixe", "B"), traverse=70)),
+    ("men_split_horizontal", {'width_dorm': 1200, 'height_dorm': 2200},
+     split("Horizontale (-)", 500, leaf("Soufflet", "A"), leaf("2 Vantaux", "B"))),
+    ("men_vr_grille", {'width_dorm': 1200, 'height_dorm': 1600, 'vr_enable': True, 'vr_h': 185, 'vr_g': True,
+                       'same_bot': False, 'fin_bot': 20, 'col_in': 'Gris 7016'}, leaf("1 Vantail", "OF")),
+    ("men_large", {'width_dorm': 3600, 'height_dorm': 2400, 'fin_val': 40, 'same_bot': True}, leaf("Coulissant", "CO")),
+]
+
+VOLET_CASES = [
+    ("vr_renovation_manuel", {'vr_width': 1000, 'vr_height': 1200, 'vr_type_coffre': "Coffre rénovation",
+                              'vr_type': "Manuel", 'vr_crank_side': "Droite", 'vr_crank_len': 1200}),
+    ("vr_bois_motorise", {'vr_width': 1400, 'vr_height': 1500, 'vr_type_coffre': "Coffre traditionnel en bois",
+                          'vr_type': "Motorisé", 'vr_proto': "IO", 'vr_cable_side': "Gauche"}),
+    ("vr_bloc_baie", {'vr_width': 2400, 'vr_height': 2200, 'vr_type_coffre': "Coffre Bloc baie",
+                      'vr_type': "Motorisé", 'vr_proto': "RTS", 'vr_cable_side': "Droite",
+                      'vr_col_coffre': "Gris 7016", 'vr_col_tablier': "Gris 7016"}),
+    ("vr_titan", {'vr_width': 800, 'vr_height': 900, 'vr_type_coffre': "Coffre titan extérieur",
+                  'vr_type': "Manuel", 'vr_crank_side': "Gauche"}),
+]
+
+VITRAGE_SHAPES = [
+    ("vit_rect", "Rectangulaire", {}),
+    ("vit_a1_trapeze", "Forme A1 (Trapèze)", {'vit_sh_h1': 1000, 'vit_sh_h2': 700}),
+    ("vit_a2_pan_coupe", "Forme A2 (Pan Coupé)", {'vit_sh_lc': 250, 'vit_sh_hc': 300}),
+    ("vit_b_trapeze_double", "Forme B (Trapèze Double)",
+     {'vit_sh_h1': 800, 'vit_sh_h2': 800, 'vit_sh_h3': 1100, 'vit_sh_l1': 500}),
+    ("vit_c_cintre", "Forme C (Cintre)", {'vit_sh_fleche': 250}),
+    ("vit_d_rond", "Forme D (Rond/Ovale)", {}),
+    ("vit_e_decoupe", "Forme E (Découpe)", {'vit_sh_lc': 200, 'vit_sh_hc': 200}),
+]
+
+VITRAGE_CASES = [
+    (case_id, dict({'vit_width': 1000, 'vit_height': 1100, 'vit_shape': shape,
+                    'vit_mat': "Châssis aluminium", 'vit_type_mode': "Double Vitrage"}, **extra))
+    for case_id, shape, extra in VITRAGE_SHAPES
+] + [
+    ("vit_usinage", {'vit_width': 900, 'vit_height': 2100, 'vit_shape': "Rectangulaire", 'vit_mat': "Porte Sécurit",
+                     'vit_type_mode': "Simple Vitrage", 'vit_usi_enable': True,
+                     'vit_nb_trous': 2, 'v_t_x_0': 60, 'v_t_y_0': 1000, 'v_t_d_0': 20, 'v_t_ref_0': "1",
+                     'v_t_x_1': 60, 'v_t_y_1': 200, 'v_t_d_1': 12, 'v_t_ref_1': "2",
+                     'vit_nb_enc': 1, 'v_e_x_0': 0, 'v_e_y_0': 300, 'v_e_w_0': 40, 'v_e_h_0': 100, 'v_e_ref_0': "1",
+                     'vit_mickey_101': True, 'vit_mickey_side': "Droite"}),
+    ("vit_petits_bois", {'vit_width': 1200, 'vit_height': 1200, 'vit_shape': "Rectangulaire", 'vit_mat': "Châssis PVC",
+                         'vit_type_mode': "Double Vitrage", 'vit_pb_enable': True, 'vit_pb_hor': 2, 'vit_pb_vert': 1,
+                         'vit_pb_thick': 26}),
+    ("vit_panneau", {'vit_width': 600, 'vit_height': 800, 'vit_shape': "Rectangulaire", 'vit_mat': "Mur",
+                     'vit_type_mode': "Panneau"}),
+]
+
+HABILLAGE_CASES = [
+    (f"hab_{key}", key, {}, None) for key in ["m1", "m2", "m3", "m4", "m5", "m6", "m7", "m8", "m9", "m10"]
+] + [
+    ("hab_m11_custom", "m11", {}, [
+        {'type': 'start', 'val_L': 120},
+        {'type': 'fold', 'angle_type': '90', 'val_L': 60},
+        {'type': 'fold', 'angle_type': '45', 'val_L': 30},
+        {'type': 'fold', 'angle_type': 'Custom', 'val_L': 40, 'val_H': 20},
+        {'type': 'fold', 'angle_type': '135', 'val_L': 15},
+    ]),
+]
+
+CASES = (
+    [{'id': cid, 'renderer': "generate_svg_v73", 'state': state, 'tree': tree} for cid, state, tree in MENUISERIE_CASES]
+    + [{'id': cid, 'renderer': "generate_svg_volet", 'state': state} for cid, state in VOLET_CASES]
+    + [{'id': cid, 'renderer': "generate_svg_vitrage", 'state': state} for cid, state in VITRAGE_CASES]
+    + [{'id': cid, 'renderer': "generate_profile_svg", 'profile': key, 'inputs': inputs,
+        'state': {'custom_segments': segs} if segs else {}} for cid, key, inputs, segs in HABILLAGE_CASES]
+)
+
+# Niveaux de détail réduits (vignettes, vues de façade) : (id, cas source, lod, largeur cible px)
+LOD_CASES = [
+    ("men_split_vertical_outline", "men_split_vertical", "outline", None),
+    ("men_2vantaux_schematic", "men_2vantaux", "schematic", None),
+    ("men_2vantaux_thumb", "men_2vantaux", "full", 60),
+    ("vr_bloc_baie_schematic", "vr_bloc_baie", "schematic", None),
+    ("vit_usinage_schematic", "vit_usinage", "schematic", None),
+    ("vit_petits_bois_outline", "vit_petits_bois", "outline", None),
+    ("hab_m6_outline", "hab_m6", "outline", None),
+]
+
+_BY_ID = {c['id']: c for c in CASES}
+CASES = CASES + [
+    dict(_BY_ID[src], id=cid, lod=lod, target_px=target_px) for cid, src, lod, target_px in LOD_CASES
+]
+
+
+def render_case(app, case):
+    """Applique le session_state du cas puis appelle le moteur de rendu."""
+    import streamlit as st
+
+    for k, v in case['state'].items():
+        st.session_state[k] = v
+    if case.get('tree'):
+        st.session_state['zone_tree'] = build_tree(app, case['tree'])
+
+    lod_kwargs = {k: case[k] for k in ('lod', 'target_px') if k in case}
+    if case['renderer'] == "generate_profile_svg":
+        key = case['profile']
+        inputs = dict(app.PROFILES_DB[key]['defaults'], **case['inputs'])
+        return app.generate_profile_svg(key, inputs, 3000, "Blanc 9016", **lod_kwargs)
+    return getattr(app, case['renderer'])(**lod_kwargs)
+
+
+PROJECT_MODULES = {'generate_svg_v73': "Menuiserie", 'generate_svg_volet': "Volet Roulant",
+                   'generate_svg_vitrage': "Vitrage", 'generate_profile_svg': "Habillage"}
+
+
+def corpus_project(app, name="Chantier Test"):
+    """Projet avec un repère enregistré par cas du corpus (hors variantes LOD)."""
+    configs = []
+    for case in CASES:
+        if case.get('lod'):
+            continue
+        data = dict(case['state'], mode_module=PROJECT_MODULES[case['renderer']])
+        if case.get('tree'):
+            data['zone_tree'] = build_tree(app, case['tree'])
+        if case['renderer'] == "generate_profile_svg":
+            data['hab_model_selector'] = case['profile']
+        configs.append({'id': case['id'], 'ref': case['id'], 'data': data})
+    return {'name': name, 'configs': configs}
@@ -0,0 +1,34 @@
+"""Pages utiles d'un repère : table des catalogues cohérente, sélection par attributs."""
+import os
+
+import pytest
+
+import annex_links
+import brand_assets
+
+
+def test_sections_fit_shipped_catalogues():
+    pypdf = pytest.importorskip("pypdf")
+    counts = {}
+    for name in os.listdir(brand_assets.ASSET_DIR):
+        if name.lower().endswith(".pdf"):
+            counts[name] = len(pypdf.PdfReader(os.path.join(brand_assets.ASSET_DIR, name)).pages)
+    assert len(counts) >= 3  # noms NFD sur disque, NFC dans la table
+    assert annex_links.validate(counts) == []
+    assert annex_links.validate({"FPEE - PVC NOVELIA RFP Fenêtres et Portes Fenêtres.pdf": 5}) != []
+
+
+def test_relevant_sections_follow_repere_attributes():
+    tertiaire = "FPEE - ALU _ PVC Portes Tertiaires_.pdf"
+    alu = annex_links.relevant_sections({'mat_type': "ALU", 'pose_type': annex_links.POSE_F, 'ouvrants': {"Fixe"}})
+    assert [(name, pages) for name, _, pages in alu] == [(tertiaire, (16, 16)), (tertiaire, (18, 18)), (tertiaire, (24, 24))]
+
+    attrs = {'mat_type': "PVC", 'pose_type': annex_links.POSE_R, 'ouvrants': {"2 Vantaux"}, 'volet': True}
+    titles = [title for _, title, _ in annex_links.relevant_sections(attrs)]
+    assert "Types d'ouvertures" in titles and "Volets roulants" in titles
+    attrs.update(ouvrants={"Fixe"}, volet=False)
+    titles = [title for _, title, _ in annex_links.relevant_sections(attrs)]
+    assert "Types d'ouvertures" not in titles and "Volets roulants" not in titles
+
+    only = annex_links.relevant_sections(attrs, available=[tertiaire])
+    assert {name for name, _, _ in only} == {tertiaire}
@@ -0,0 +1,73 @@
+"""Catalogues annexes découpés page par page : pages autonomes, vignettes, cache par empreinte."""
+import importlib.util
+import os
+
+import pytest
+
+import annex_pages
+
+
+def _catalogue(path, n, label="Catalogue"):
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(str(path))
+    for no in range(1, n + 1):
+        c.drawString(100, 700, f"{label} page {no}")
+        c.showPage()
+    c.save()
+
+
+def test_split_once_per_checksum(tmp_path):
+    pypdf = pytest.importorskip("pypdf")
+    src = tmp_path / "FPEE - Catalogue.pdf"
+    _catalogue(src, 3)
+    static_dir = str(tmp_path / "static")
+    assert annex_pages.load_pages(str(src), static_dir) is None
+
+    pages = annex_pages.build_pages(str(src), static_dir)
+    assert pages.count == 3 and pages.page_url(2) == f"app/static/annexes/{pages.sha}/p002.pdf"
+    page = pypdf.PdfReader(os.path.join(pages.directory, "p002.pdf"))
+    assert len(page.pages) == 1 and "page 2" in page.pages[0].extract_text()
+    assert pages.has_thumbs == (importlib.util.find_spec("pymupdf") is not None)
+    if pages.has_thumbs:
+        assert pages.thumb_url(1).endswith("/p001.jpg")
+        with open(os.path.join(pages.directory, "p001.jpg"), "rb") as f:
+            assert f.read(2) == b"\xff\xd8"  # JPEG
+
+    # Plage de pages : un PDF assemblé une fois, pages seules servies telles quelles
+    assert pages.range_url(2, 2) == pages.page_url(2)
+    assert pages.range_url(2, 3, build=False) is None  # raccourcis : jamais assemblé pendant un rerun
+    assert pages.range_url(2, 3).endswith(f"{pages.sha}/p002-003.pdf")
+    assert len(pypdf.PdfReader(os.path.join(pages.directory, "p002-003.pdf")).pages) == 2
+    assert pages.range_url(2, 3, build=False) == pages.range_url(2, 3)
+    assert annex_pages.load_pages(str(src), static_dir).range_url(2, 3, build=False) == pages.range_url(2, 3)
+
+    index = os.path.join(pages.directory, annex_pages.INDEX_NAME)
+    mtime = os.stat(index).st_mtime_ns
+    assert annex_pages.build_pages(str(src), static_dir).sha == pages.sha
+    assert os.stat(index).st_mtime_ns == mtime  # relu, pas redécoupé
+
+    # Catalogue modifié : nouveau dossier, l'ancien part au nettoyage
+    _catalogue(src, 2, label="Edition 2")
+    os.utime(src, ns=(0, 0))
+    updated = annex_pages.build_pages(str(src), static_dir)
+    assert updated.sha != pages.sha and updated.count == 2
+    assert annex_pages.prune({updated.sha}, static_dir) == 1
+    assert not os.path.exists(pages.directory) and os.path.exists(updated.directory)
+    assert not [n for n in os.listdir(tmp_path / "static" / "annexes") if n.startswith(annex_pages.TMP_PREFIX)]
+
+
+def test_thumbs_added_to_existing_split(tmp_path):
+    pytest.importorskip("pypdf")
+    pytest.importorskip("pymupdf")
+    src = tmp_path / "FPEE - Catalogue.pdf"
+    _catalogue(src, 2)
+    static_dir = str(tmp_path / "static")
+    pages = annex_pages.build_pages(str(src), static_dir, thumbs=False)
+    assert not pages.has_thumbs and pages.thumb_url(1) is None
+
+    # Découpé avant l'installation de PyMuPDF : vignettes ajoutées sans redécouper
+    mtime = os.stat(os.path.join(pages.directory, "p001.pdf")).st_mtime_ns
+    pages = annex_pages.build_pages(str(src), static_dir)
+    assert pages.has_thumbs and annex_pages.load_pages(str(src), static_dir).has_thumbs
+    assert os.path.exists(os.path.join(pages.directory, "p002.jpg"))
+    assert os.stat(os.path.join(pages.directory, "p001.pdf")).st_mtime_ns == mtime
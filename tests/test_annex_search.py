@@ -0,0 +1,42 @@
+"""Recherche plein texte dans les annexes : accents ignorés, réindexation sur changement d'empreinte."""
+import os
+
+import pytest
+
+import annex_search
+
+
+def _catalogue(path, pages):
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(str(path))
+    for text in pages:
+        if text:
+            c.drawString(100, 700, text)
+        c.showPage()
+    c.save()
+
+
+def test_search_pages_with_snippets(tmp_path):
+    pytest.importorskip("pypdf")
+    cat = tmp_path / "FPEE - Catalogue.pdf"
+    pose = tmp_path / "Mise en oeuvre.pdf"
+    _catalogue(cat, ["Fenêtre oscillo-battante PVC 70", "", "Profil dormant réf. BB-A03 <rénovation>"])
+    _catalogue(pose, ["Pose en applique intérieure"])
+    index = annex_search.AnnexIndex(str(tmp_path / "index.sqlite3"))
+    assert sorted(index.sync([str(cat), str(pose), str(tmp_path / "absent.pdf")])) == [cat.name, pose.name]
+    assert index.stats()[cat.name] == (3, 1)  # la page blanche est comptée, pas indexée
+
+    hits = index.search("fenetre osc")  # sans accent, préfixe
+    assert [(h['name'], h['page']) for h in hits] == [(cat.name, 1)]
+    assert "<mark>Fenêtre</mark>" in hits[0]['snippet']
+    hit = index.search('bb-a03 "')[0]
+    assert hit['page'] == 3 and "&lt;rénovation&gt;" in hit['snippet']
+    assert index.search("*") == [] and index.search("introuvable") == []
+
+    # Inchangé : rien n'est relu ; modifié : réindexé ; retiré de la liste : supprimé
+    assert index.sync([str(cat), str(pose)]) == []
+    _catalogue(pose, ["Pose en tunnel"])
+    os.utime(pose, ns=(0, 0))
+    assert index.sync([str(pose)]) == [pose.name]
+    assert index.search("tunnel")[0]['name'] == pose.name and index.search("applique") == []
+    assert index.search("oscillo") == [] and list(index.stats()) == [pose.name]
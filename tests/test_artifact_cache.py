@@ -0,0 +1,66 @@
+"""Cache disque des artefacts : clés, éviction LRU, écritures concurrentes entre processus."""
+import concurrent.futures
+import multiprocessing
+import os
+import time
+
+import artifact_cache
+from svg_corpus import corpus_project
+
+
+def test_get_or_build_and_lru_eviction(tmp_path):
+    cache = artifact_cache.ArtifactCache(root=str(tmp_path), max_bytes=10_000)
+    built = []
+
+    def build(i):
+        def run():
+            built.append(i)
+            return f"<svg>{i}</svg>" + " " * 2_000
+        return run
+
+    keys = [cache.key('svg', {'width': 1000 + i}, "v1") for i in range(4)]
+    assert len(set(keys)) == 4 and cache.key('svg', {'width': 1000}, "v2") != keys[0]
+    for i, key in enumerate(keys):
+        assert cache.get_or_build('svg', key, build(i), 'svg', text=True).startswith(f"<svg>{i}")
+    assert cache.get_or_build('svg', keys[0], build(99), 'svg', text=True).startswith("<svg>0")
+    assert built == [0, 1, 2, 3] and cache.hits == 1
+
+    # keys[0] vient d'être relu : le moins récemment utilisé est keys[1]
+    past = time.time() - 100
+    for i, key in enumerate(keys[1:], start=1):
+        os.utime(cache.path('svg', key, 'svg'), (past + i, past + i))
+    assert cache.evict(max_bytes=5_000) == 3
+    assert cache.get('svg', keys[0], 'svg') is not None
+    assert all(cache.get('svg', key, 'svg') is None for key in keys[1:])
+
+
+def _hammer(root, worker):
+    cache = artifact_cache.ArtifactCache(root=root, max_bytes=200_000)
+    for i in range(60):
+        key = cache.key('pdf', i % 20)
+        data = cache.get('pdf', key, 'pdf')
+        if data is not None:
+            assert data == bytes([i % 20]) * 5_000, "artefact tronqué"
+        else:
+            cache.put('pdf', key, bytes([i % 20]) * 5_000, 'pdf')
+    return worker
+
+
+def test_concurrent_processes_never_see_partial_files(tmp_path):
+    ctx = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=4, mp_context=ctx) as pool:
+        assert sorted(pool.map(_hammer, [str(tmp_path)] * 4, range(4))) == [0, 1, 2, 3]
+    leftovers = [name for _, _, names in os.walk(tmp_path) for name in names if name.startswith(artifact_cache.TMP_PREFIX)]
+    assert leftovers == []
+
+
+def test_unchanged_repere_fiche_is_read_from_cache(app, tmp_path):
+    import project_bundle
+
+    project = corpus_project(app)
+    cache = artifact_cache.default_cache()
+    project_bundle.write_bundle(str(tmp_path / "a.zip"), project, app.project_fiche_html)
+    hits = cache.hits
+    project_bundle.write_bundle(str(tmp_path / "b.zip"), project, app.project_fiche_html)
+    # Deux lectures par repère (SVG et fiche), aucun nouveau rendu
+    assert cache.hits - hits == 2 * len(project['configs'])
@@ -0,0 +1,35 @@
+"""Documents imprimables servis par URL : adressage par contenu, expiration, chemins relatifs."""
+import mimetypes
+import os
+import time
+
+import artifact_store
+import fiche_templates
+
+
+def test_put_is_content_addressed_and_expires(tmp_path):
+    store = artifact_store.ArtifactStore(subdir="print", ttl=60, static_dir=str(tmp_path))
+    url = store.put("<html>fiche `A` ${obs}</html>")
+    assert url.startswith("app/static/print/") and url.endswith(".html")
+    # Type servi par le service statique (guess_type) : la fiche s'ouvre rendue, pas en source
+    assert mimetypes.guess_type(url)[0] == "text/html"
+    assert store.put("<html>fiche `A` ${obs}</html>") == url
+    assert store.put("<html>fiche B</html>") != url
+
+    name = url.rsplit("/", 1)[1]
+    path = tmp_path / "print" / name
+    assert path.read_text(encoding="utf-8") == "<html>fiche `A` ${obs}</html>"
+
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert store.purge() == 1 and not path.exists()
+    assert store.purge() == 0
+
+
+def test_print_document_links_and_auto_print():
+    html = '<html><body><img src="app/static/assets/logo.abc.jpg"><p>app/static/x</p>\n    </body></html>'
+    doc = artifact_store.rebase_static_urls(fiche_templates.with_auto_print(html))
+    assert '<img src="../assets/logo.abc.jpg">' in doc and "<p>app/static/x</p>" in doc
+    assert doc.count("window.print") == 1
+    assert doc.index("window.print") < doc.index("</body>")
+    assert fiche_templates.with_auto_print(doc) == doc
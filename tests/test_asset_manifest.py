@@ -0,0 +1,23 @@
+"""Manifeste des ressources : un seul parcours de assets/, noms NFC/NFD, manquantes listées."""
+import hashlib
+import unicodedata
+
+import asset_manifest
+
+
+def test_manifest_records_and_missing(tmp_path):
+    nfd = unicodedata.normalize("NFD", "FPEE - Fenêtres.pdf")
+    (tmp_path / nfd).write_bytes(b"%PDF-1.4 catalogue")
+    (tmp_path / "schema.jpg").write_bytes(b"\xff\xd8jpeg")
+    (tmp_path / "orphelin.png").write_bytes(b"png")
+
+    manifest = asset_manifest.build_manifest(["FPEE - Fenêtres.pdf", "schema.jpg", "absent.pdf"], str(tmp_path))
+    record = manifest.get("FPEE - Fenêtres.pdf")  # écrit en NFC dans le code
+    assert record.exists and record.path == str(tmp_path / nfd)
+    assert record.size == 18 and record.mime == "application/pdf"
+    assert record.sha == hashlib.sha256(b"%PDF-1.4 catalogue").hexdigest()[:12]
+    assert manifest.get("schema.jpg").mime == "image/jpeg"
+
+    assert manifest.missing() == ["absent.pdf"] and manifest.unreferenced == ["orphelin.png"]
+    assert manifest.path("absent.pdf") is None and not manifest.exists("inconnu.pdf")
+    assert [row[:2] for row in manifest.rows()] == [("FPEE - Fenêtres.pdf", True), ("absent.pdf", False), ("schema.jpg", True)]
@@ -0,0 +1,31 @@
+"""Moteur de pliage : retraits de pli et développés calculés à la main."""
+import pytest
+
+EP_15 = "15/10ème (1,5 mm)"
+
+
+def test_bend_deduction_values(app):
+    # 90° à 1,5 mm, K=0,33, r=t : 2*(3*tan 45°) - π/2*(1,5 + 0,495) = 6 - 3,1337
+    assert app.BEND_K_FACTOR == 0.33
+    assert app._bend_deduction(90, 1.5) == pytest.approx(2.866, abs=1e-3)
+    assert round(app._bend_deduction(90, 1.5), 2) == 2.87
+    assert app._bend_deduction(0, 1.5) == 0
+    # Au-delà de 170° le retrait est plafonné (ourlet écrasé : tan(θ/2) diverge sinon)
+    assert app._bend_deduction(179, 1.5) == app._bend_deduction(app.BEND_MAX_ANGLE, 1.5)
+    assert app._bend_deduction(180, 1.5) < 100
+
+
+def test_calc_developpe_profiles(app):
+    assert app.parse_epaisseur_mm(EP_15) == 1.5
+    # Modèle 2 (cornière 50 x 50) : un pli à 90°
+    defaults = app.PROFILES_DB['m2']['defaults']
+    assert app.calc_developpe('m2', defaults) == 100.0
+    assert app.calc_developpe('m2', defaults, EP_15) == 97.1
+    # Plat : aucun pli, aucun retrait
+    assert app.calc_developpe('m1', {'A': 120}, EP_15) == 120.0
+
+    # Repère enregistré (m11) : segments lus dans `state`, pas dans la session
+    state = {'custom_segments': [{'angle_type': '90', 'val_L': 80, 'val_H': 0},
+                                 {'angle_type': '90', 'val_L': 40, 'val_H': 0}]}
+    assert app.calc_developpe('m11', {}, state=state) == 120.0
+    assert app.calc_developpe('m11', {}, EP_15, state=state) == 117.1
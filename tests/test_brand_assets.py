@@ -0,0 +1,78 @@
+"""Registre des ressources de marque : chargement unique, un XObject JPEG par document, URL statique."""
+import io
+import os
+
+import pytest
+
+import brand_assets
+
+
+def test_logo_loaded_once_with_hashed_static_url(tmp_path):
+    logo = brand_assets.get_asset('logo')
+    assert logo is brand_assets.get_asset('logo')
+    assert logo.data_uri.startswith("data:image/jpeg;base64,")
+
+    url = logo.publish(static_dir=str(tmp_path))
+    assert url == f"app/static/assets/logo_miroiterie.{logo.sha}.jpg"
+    assert (tmp_path / "assets" / logo.static_name).read_bytes() == logo.data
+    html = f'<img src="{url}">'
+    assert brand_assets.inline_static(html) == f'<img src="{logo.data_uri}">'
+
+
+def test_logo_drawn_once_per_document_as_jpeg():
+    pytest.importorskip("reportlab")
+    pypdf = pytest.importorskip("pypdf")
+    from reportlab.pdfgen import canvas
+
+    logo = brand_assets.get_asset('logo')
+    sizes = []
+    for _ in range(2):
+        buf = io.BytesIO()
+        c = canvas.Canvas(buf)
+        # Deux dessins dans le même document : un seul XObject
+        h = brand_assets.draw_asset(c, logo, 40, 800, 150)
+        brand_assets.draw_asset(c, logo, 40, 500, 75)
+        c.showPage()
+        c.save()
+        page = pypdf.PdfReader(io.BytesIO(buf.getvalue())).pages[0]
+        xobjects = page["/Resources"]["/XObject"]
+        assert len(xobjects) == 1
+        sizes.append(len(buf.getvalue()))
+    assert h == pytest.approx(150 * logo.size[1] / logo.size[0])
+    # Flux JPEG passé tel quel : le document pèse environ la taille du fichier
+    assert sizes[0] == sizes[1] and sizes[0] < len(logo.data) * 1.4
+
+
+def test_annex_pdf_published_without_loading_it(tmp_path):
+    src = tmp_path / "FPEE - Catalogue Fenêtres.pdf"
+    src.write_bytes(b"%PDF-1.4\n" + b"x" * 3_000_000)
+    static_dir = str(tmp_path / "static")
+    url = brand_assets.publish_file(str(src), static_dir=static_dir)
+    sha = brand_assets.file_sha(str(src))
+    assert url == f"app/static/assets/FPEE%20-%20Catalogue%20Fen%C3%AAtres.{sha}.pdf"
+    published = tmp_path / "static" / "assets" / f"FPEE - Catalogue Fenêtres.{sha}.pdf"
+    assert published.read_bytes() == src.read_bytes()
+    assert brand_assets.publish_file(str(src), static_dir=static_dir) == url
+    assert not any(asset.path == str(src) for asset in brand_assets._registry.values())
+
+    # Fichier modifié : nouvelle empreinte, nouvelle URL (le cache navigateur ne sert pas l'ancien)
+    src.write_bytes(b"%PDF-1.4\n" + b"y" * 10)
+    os.utime(src, ns=(0, 0))
+    assert brand_assets.publish_file(str(src), static_dir=static_dir) != url
+
+
+def test_resized_variants_prepared_once(tmp_path):
+    from PIL import Image
+    src = tmp_path / "schema.jpg"
+    Image.new("RGB", (2400, 1600), "white").save(src, quality=95)
+    schema = brand_assets.load_asset(str(src))
+
+    fiche = schema.resized(480, 320)
+    assert fiche is schema.resized(480, 320) and fiche.mime == "image/jpeg"
+    assert fiche.size == (480, 320) and len(fiche.data) < len(schema.data)
+    assert fiche.static_name.startswith("schema.480x320.")
+    # Déjà assez petite : aucune recompression
+    assert fiche.resized(800, 600) is fiche
+
+    url = fiche.publish(static_dir=str(tmp_path / "static"))
+    assert brand_assets.inline_static(f'<img src="{url}">', [schema]) == f'<img src="{fiche.data_uri}">'
@@ -0,0 +1,44 @@
+"""Gabarits de fiches : champs compilés, lecture d'état mémorisée, feuille de style partagée."""
+import fiche_templates
+
+
+class CountingState(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reads = 0
+
+    def get(self, key, default=None):
+        self.reads += 1
+        return super().get(key, default)
+
+
+def test_template_fields_and_defaults():
+    tpl = fiche_templates.FicheTemplate('t', "b{}", "<head>{{head}}</head>{{titre}}/{{s.ref}}/{{s.obs|-}}/{{s.x}}")
+    assert tpl.state_keys == ['obs', 'ref', 'x']
+    assert tpl.value_names == ['titre']
+    html = tpl.render({'titre': "Fiche"}, {'ref': "R1"})
+    assert html == "<head><style>b{}</style></head>Fiche/R1/-/None"
+
+    linked = tpl.render({'titre': "Fiche"}, {'ref': "R1"}, stylesheet_href="css/fiche_t.css")
+    assert linked.startswith('<head><link rel="stylesheet" href="css/fiche_t.css"></head>')
+
+
+def test_state_view_reads_each_key_once():
+    state = CountingState(ref="R1", qte=2)
+    view = fiche_templates.StateView(state)
+    for _ in range(3):
+        assert view.get('ref') == "R1" and view['qte'] == 2
+        assert 'absent' not in view and view.get('absent', 0) == 0
+    assert state.reads == 3
+    # Une vue d'une vue partage l'état sous-jacent, pas le cache
+    assert fiche_templates.StateView(view)._state is state
+
+
+def test_shared_stylesheet_for_every_kind():
+    for kind, tpl in fiche_templates.TEMPLATES.items():
+        name = fiche_templates.stylesheet_name(kind)
+        assert name == fiche_templates.stylesheet_name(kind)
+        assert name.startswith(f"fiche_{kind}.") and name.endswith(".css")
+        assert tpl.inline_head in tpl.render({k: "" for k in tpl.value_names}, {})
+        html = tpl.render({k: "" for k in tpl.value_names}, {}, stylesheet_href=name)
+        assert "<style>" not in html.split("</head>")[0] and name in html
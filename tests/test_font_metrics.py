@@ -0,0 +1,35 @@
+"""Table de chasses Arial/Helvetica et boîtes englobantes de texte."""
+import pytest
+
+
+def test_measure_text_matches_afm_widths(app):
+    # "1000" = 4 chiffres à 556/1000 em
+    assert app.measure_text("1000", 20) == pytest.approx(4 * 556 * 20 / 1000)
+    assert app.measure_text("W", 10, "bold") == pytest.approx(9.44)
+    # Accent : chasse de la lettre de base
+    assert app.measure_text("é", 10) == app.measure_text("e", 10)
+
+
+def test_text_bbox_anchor_and_rotation(app):
+    w = app.measure_text("1200", 30, "bold")
+    x0, y0, x1, y1 = app.text_bbox(100, 50, "1200", 30, "bold", anchor="middle")
+    assert (x0, x1) == (pytest.approx(100 - w / 2), pytest.approx(100 + w / 2))
+    # Rotation -90 : la largeur du libellé passe sur l'axe Y
+    rx0, ry0, rx1, ry1 = app.text_bbox(100, 50, "1200", 30, "bold", rotation=-90)
+    assert ry1 - ry0 == pytest.approx(w)
+    assert rx1 - rx0 == pytest.approx(y1 - y0)
+
+
+def test_viewbox_fits_dimension_tracks(app, render):
+    from svg_corpus import CASES
+
+    case = next(c for c in CASES if c['id'] == "men_split_vertical")
+    svg = render(case)
+    vb_x, vb_y, vb_w, vb_h = [float(v) for v in svg.split('viewBox="')[1].split('"')[0].split()]
+    font_dim = max(16, int(max(1800 + 2 * 60, 1400 + 2 * 60) * 0.02))
+    track = app.dimension_track(font_dim)
+    # Objet (ailettes de 60 incluses) + 3 pistes de cotes à gauche et en bas, sans marge forfaitaire
+    assert vb_x <= -60 - 3 * track
+    assert vb_x + vb_w >= 1800 + 60
+    assert vb_y + vb_h >= 1400 + 3 * track
+    assert vb_x > -60 - 4 * track
@@ -0,0 +1,58 @@
+"""Rapport HTML en flux : premier morceau immédiat, un morceau par repère, mémoire constante."""
+import tracemalloc
+
+import html_report
+from svg_corpus import corpus_project
+
+
+def _reperes(n, computed, svg_size=20_000):
+    for i in range(n):
+        computed.append(i)
+        yield {'ref': f"F{i}", 'module': "Menuiserie", 'svg': "<svg>" + "x" * svg_size + "</svg>",
+               'data': {'Dimensions': "1000 x 1200", 'Quantité': 1}}
+
+
+def test_head_comes_before_any_repere():
+    computed = []
+    chunks = html_report.iter_report("Chantier <A>", _reperes(3, computed))
+    head = next(chunks)
+    assert computed == [] and "<title>Rapport - Chantier &lt;A&gt;</title>" in head
+    assert "<style>" in head
+    rest = list(chunks)
+    assert computed == [0, 1, 2] and len(rest) == 4
+    assert rest[-1].rstrip().endswith("</html>") and "3 repère(s)" in rest[-1]
+
+    linked = next(html_report.iter_report("P", [], stylesheet_href="fiche_rapport_projet.css"))
+    assert '<link rel="stylesheet" href="fiche_rapport_projet.css">' in linked
+
+
+def test_memory_does_not_grow_with_project_size():
+    peaks = []
+    for n in (50, 1000):
+        tracemalloc.start()
+        size = html_report.write_report(html_report.iter_report("P", _reperes(n, [])), _Sink())
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert size > n * 20_000
+    assert peaks[1] < peaks[0] * 1.5
+
+
+class _Sink:
+    """Sortie qui ne garde rien (comme un fichier ou une réponse HTTP)."""
+
+    def write(self, data):
+        return len(data)
+
+
+def test_project_report_from_saved_reperes(app, tmp_path):
+    project = corpus_project(app)
+    path = tmp_path / "rapport.html"
+    progress = []
+    reperes = app.project_report_reperes(project, on_progress=lambda done, total: progress.append(done))
+    html_report.write_report(html_report.iter_report(project['name'], reperes), str(path))
+
+    text = path.read_text(encoding="utf-8")
+    n = len(project['configs'])
+    assert progress == list(range(1, n + 1))
+    assert text.count('<div class="repere"') == n and text.count("<svg") >= n
+    assert "Dimensions" in text and text.rstrip().endswith("</html>")
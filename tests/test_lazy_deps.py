@@ -0,0 +1,27 @@
+"""Chargement différé des dépendances lourdes et rapport des temps d'import."""
+import subprocess
+import sys
+
+from conftest import ROOT_DIR
+
+SCRIPT = """
+import sys
+import lazy_deps
+pd = lazy_deps.lazy('pandas')
+assert 'pandas' not in sys.modules
+assert pd.DataFrame({'a': [1]}).shape == (1, 1)
+thread = lazy_deps.warm_up(('reportlab', 'pandas'))
+thread.join(60)
+report = {g: (s, status, by) for g, s, status, by in lazy_deps.import_report()}
+assert report['pandas'][1:] == ("chargé", "premier accès"), report
+assert report['reportlab'][1:] == ("chargé", "préchargement"), report
+assert report['reportlab'][0] > 0 and report['svglib'][1] == "non chargé", report
+print("ok")
+"""
+
+
+def test_lazy_import_and_warm_up_report():
+    # Processus neuf : pandas/ReportLab ne doivent pas être déjà importés par la session de test
+    out = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT_DIR, capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "ok"
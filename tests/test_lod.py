@@ -0,0 +1,29 @@
+"""Niveaux de détail (LOD) : tri des primitives selon le niveau et la taille à l'écran."""
+
+
+def test_lod_keep_levels_and_pixel_threshold(app):
+    assert app.lod_keep(75, app.LOD_FULL)
+    assert not app.lod_keep(75, app.LOD_FULL, app.LOD_SCHEMATIC)
+    assert app.lod_keep(75, app.LOD_SCHEMATIC, app.LOD_SCHEMATIC)
+    assert not app.lod_keep(75, app.LOD_SCHEMATIC, app.LOD_OUTLINE)
+    # 20 unités à 0.05 px/unité = 1 px : sous le seuil
+    assert not app.lod_keep(20, app.LOD_FULL, app.LOD_FULL, px_per_unit=0.05)
+    assert app.lod_keep(20, app.LOD_FULL, app.LOD_FULL, px_per_unit=0.5)
+
+
+def test_reduced_lod_drops_details(render):
+    from svg_corpus import CASES
+
+    by_id = {c['id']: c for c in CASES}
+    full = render(by_id["men_2vantaux"])
+    schematic = render(by_id["men_2vantaux_schematic"])
+    outline = render(by_id["men_split_vertical_outline"])
+    thumb = render(by_id["men_2vantaux_thumb"])
+
+    # Poignées et cotes absentes hors "full", symboles d'ouverture gardés en "schematic"
+    assert "<polygon" in full and "<polygon" in schematic
+    assert ">1520<" in full and ">1520<" not in schematic
+    assert full.count("<text") > schematic.count("<text") > 0
+    assert "<polygon" not in outline and "<text" not in outline
+    # Vignette 60 px : cotes illisibles écartées même en "full"
+    assert len(thumb) < len(full) / 2
@@ -0,0 +1,142 @@
+"""Dossier PDF projet : ordre des pages (pool de processus) et débit en pages/s.
+
+Le débit est comparé à tests/benchmarks/dossier_baseline.json (dépend de la machine),
+seulement avec RUN_BENCHMARK=1 (marqueur `benchmark`) ; régénération :
+    UPDATE_BENCHMARK=1 python -m pytest tests/test_pdf_dossier.py
+"""
+import io
+import json
+import os
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("reportlab")
+pytest.importorskip("svglib")
+pypdf = pytest.importorskip("pypdf")
+
+from conftest import BENCHMARK_DIR, ROOT_DIR
+from svg_corpus import corpus_project
+
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "dossier_baseline.json")
+RATE_FACTOR = float(os.environ.get("PDF_BENCH_RATE_FACTOR", "0.6"))
+
+
+@pytest.fixture(scope="module")
+def project(app):
+    return corpus_project(app)
+
+
+@pytest.fixture(scope="module")
+def jobs(app, project):
+    import dossier_pdf
+
+    reperes = [app.project_repere_entry(cfg) for cfg in project['configs']]
+    return dossier_pdf.dossier_jobs(project['name'], reperes, date="01/01/2026",
+                                    logo_path=os.path.join(ROOT_DIR, "assets", "logo_miroiterie.jpg"))
+
+
+def _page_texts(data):
+    return [page.extract_text() for page in pypdf.PdfReader(io.BytesIO(data)).pages]
+
+
+def test_pool_keeps_page_order(project, jobs):
+    import dossier_pdf
+
+    out = io.BytesIO()
+    # Fenêtre et lots volontairement plus petits que le nombre de pages
+    stats = dossier_pdf.build_dossier(jobs, out, workers=2, max_pending=3, batch_pages=4)
+    texts = _page_texts(out.getvalue())
+
+    n = len(project['configs'])
+    assert stats['pages'] == len(texts) == 1 + dossier_pdf.summary_page_count(n) + n
+    assert "Dossier Technique" in texts[0] and "Récapitulatif" in texts[1]
+    for no, text in enumerate(texts, start=1):
+        assert f"page {no}/{len(texts)}" in text
+    first = len(texts) - n
+    for cfg, text in zip(project['configs'], texts[first:]):
+        assert f"Fiche Technique : {cfg['ref']}" in text
+        assert "Erreur Schéma" not in text
+
+
+def test_dossier_written_to_path(app, project, tmp_path):
+    # Export en file : le dossier est écrit directement dans le fichier résultat du job
+    from reportlab import rl_config
+
+    use_a85 = rl_config.useA85
+    out = str(tmp_path / "dossier.pdf")
+    result, stats, err = app.generate_project_pdf(project, workers=1, out=out)
+    assert err is None and result == out
+    # Rendu dans le processus : la config globale de ReportLab n'est pas modifiée
+    assert rl_config.useA85 == use_a85
+    assert len(pypdf.PdfReader(out).pages) == stats['pages']
+
+
+def test_memory_does_not_grow_with_dossier_size(app, project, tmp_path):
+    import artifact_cache
+    import dossier_pdf
+
+    # Même repère répété : un seul fragment rendu, les autres relus du cache
+    cache = artifact_cache.ArtifactCache(root=str(tmp_path / "cache"))
+    entry = app.project_repere_entry(project['configs'][0])
+    peaks = []
+    # Premier passage : imports et rendu du fragment, hors comparaison
+    for n in (8, 40, 200):
+        jobs = dossier_pdf.dossier_jobs(project['name'], [entry] * n, date="01/01/2026")
+        out = str(tmp_path / f"dossier_{n}.pdf")
+        tracemalloc.start()
+        stats = dossier_pdf.build_dossier(jobs, out, workers=1, cache=cache, batch_pages=8)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        reader = pypdf.PdfReader(out, strict=True)
+        assert len(reader.pages) == stats['pages']
+        assert f"page {stats['pages']}/{stats['pages']}" in reader.pages[-1].extract_text()
+    assert peaks[2] < peaks[1] * 1.5
+
+
+@pytest.mark.benchmark
+def test_dossier_throughput(jobs):
+    import dossier_pdf
+
+    stats = dossier_pdf.build_dossier(jobs, io.BytesIO(), workers=1)
+    rate = round(stats['pages_per_s'], 2)
+    if os.environ.get("UPDATE_BENCHMARK"):
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"pages": stats['pages'], "pages_per_s": rate}, f, indent=2)
+        return
+    if not os.path.exists(BASELINE_PATH):
+        pytest.skip("Pas de baseline dossier (lancer avec UPDATE_BENCHMARK=1)")
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        ref = json.load(f)
+    assert rate >= ref['pages_per_s'] * RATE_FACTOR, f"{rate} pages/s < {ref['pages_per_s']} * {RATE_FACTOR}"
+
+
+def test_incremental_rebuild_renders_only_changed_pages(app, project, tmp_path):
+    import artifact_cache
+    import dossier_pdf
+
+    cache = artifact_cache.ArtifactCache(root=str(tmp_path / "cache"))
+    logo = os.path.join(ROOT_DIR, "assets", "logo_miroiterie.jpg")
+
+    def build(reperes, workers):
+        jobs = dossier_pdf.dossier_jobs(project['name'], reperes, date="01/01/2026", logo_path=logo)
+        out = io.BytesIO()
+        return dossier_pdf.build_dossier(jobs, out, workers=workers, cache=cache), _page_texts(out.getvalue())
+
+    reperes = [app.project_repere_entry(cfg) for cfg in project['configs']]
+    n = len(reperes)
+    stats, _ = build(reperes, workers=1)
+    assert stats['rendered'] == stats['pages'] and stats['reused'] == 0
+
+    # Un repère modifié, un repère ajouté en tête : les pages des autres sont relues
+    changed = [dict(r) for r in reperes]
+    changed[3]['infos'] = changed[3]['infos'] + ["Option: modifiée"]
+    changed.insert(0, dict(reperes[0], ref="NOUVEAU"))
+    stats, texts = build(changed, workers=2)
+    n_fixed = 1 + dossier_pdf.summary_page_count(n + 1)
+    assert stats['reused'] == n - 1
+    assert stats['rendered'] == n_fixed + 2
+    for no, text in enumerate(texts, start=1):
+        # Numérotation tamponnée une seule fois par page
+        assert text.count(f"{project['name']} - page ") == 1 and f"page {no}/{len(texts)}" in text
+    assert "Fiche Technique : NOUVEAU" in texts[n_fixed] and "Option: modifiée" in texts[n_fixed + 4]
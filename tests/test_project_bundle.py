@@ -0,0 +1,39 @@
+"""Archive ZIP du projet : une fiche par repère, ressources partagées écrites une fois, écriture en flux."""
+import json
+import zipfile
+
+from svg_corpus import corpus_project
+
+
+def test_bundle_shares_assets_between_fiches(app, tmp_path):
+    import project_bundle
+
+    project = corpus_project(app)
+    path = tmp_path / "projet.zip"
+    progress = []
+    stats = project_bundle.write_bundle(str(path), project, app.project_fiche_html, logo=app.LOGO,
+                                        on_progress=lambda done, total: progress.append((done, total)))
+
+    n = len(project['configs'])
+    assert stats['fiches'] == n and stats['errors'] == 0
+    assert progress[-1] == (n, n)
+
+    with zipfile.ZipFile(path) as zf:
+        names = zf.namelist()
+        assert len(names) == len(set(names))
+        fiches = [name for name in names if name.startswith("fiches/")]
+        assert len(fiches) == n
+        assert json.loads(zf.read("project.json"))['name'] == project['name']
+
+        logo = f"assets/{app.LOGO.static_name}"
+        assert names.count(logo) == 1
+        assert len([name for name in names if name.startswith("css/")]) == 4
+        index = zf.read("index.html").decode()
+        assert all(f'href="{name}"' in index for name in fiches)
+
+        for name in fiches:
+            html = zf.read(name).decode()
+            assert "base64," not in html and "<style>" not in html
+            assert f'src="../{logo}"' in html
+            assert 'rel="stylesheet" href="../css/fiche_' in html
+            assert "window.print" not in html
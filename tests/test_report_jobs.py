@@ -0,0 +1,71 @@
+"""File d'exports en arrière-plan : doublons, équité entre sessions, annulation, expiration."""
+import os
+import threading
+import time
+
+import pytest
+
+import report_jobs
+
+
+def _wait(job, timeout=5.0):
+    t0 = time.time()
+    while job.active and time.time() - t0 < timeout:
+        time.sleep(0.01)
+    return job.status
+
+
+def test_double_click_fairness_and_expiry(tmp_path):
+    queue = report_jobs.ReportQueue(workers=1, result_dir=str(tmp_path))
+    gate = threading.Event()
+    order = []
+
+    def make(name, block=False):
+        def run(job):
+            if block:
+                gate.wait(5)
+            order.append(name)
+            return name.encode()
+        return run
+
+    first = queue.submit("A", "pdf", make("A1", block=True), "a1.pdf")
+    # Double clic : même job renvoyé tant qu'il est actif
+    assert queue.submit("A", "pdf", make("dup"), "dup.pdf") is first
+    a2 = queue.submit("A", "html", make("A2"), "a2.html")
+    a3 = queue.submit("A", "csv", make("A3"), "a3.csv")
+    b1 = queue.submit("B", "pdf", make("B1"), "b1.pdf")
+    gate.set()
+    for job in (first, a2, a3, b1):
+        assert _wait(job) == report_jobs.DONE
+
+    # B n'attend pas que toute la file de A soit vidée
+    assert order == ["A1", "B1", "A2", "A3"]
+    assert b1.read() == b"B1" and os.path.exists(b1.path) and b1.size == 2
+
+    assert queue.purge(now=time.time() + queue.ttl + 1) == 4
+    assert queue.get(b1.id) is None and not os.path.exists(b1.path)
+    # Bouton affiché avant l'expiration, cliqué après : erreur, jamais un fichier vide
+    assert b1.size is None
+    with pytest.raises(report_jobs.JobExpired):
+        b1.read_or_raise()
+
+
+def test_cancel_running_and_queued_jobs(tmp_path):
+    queue = report_jobs.ReportQueue(workers=1, result_dir=str(tmp_path))
+    started = threading.Event()
+
+    def slow(job):
+        started.set()
+        for i in range(500):
+            job.report(i, 500)
+            time.sleep(0.01)
+        return b"never"
+
+    running = queue.submit("A", "pdf", slow, "a.pdf")
+    queued = queue.submit("B", "pdf", slow, "b.pdf")
+    assert started.wait(5)
+    assert queue.cancel(queued.id) and queued.status == report_jobs.CANCELLED
+    assert queue.cancel(running.id)
+    assert _wait(running) == report_jobs.CANCELLED
+    assert running.read() is None and running.fn is None
+    assert not queue.cancel(running.id)
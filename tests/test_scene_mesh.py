@@ -0,0 +1,42 @@
+"""Maillage 3D calculé côté serveur : tampons cohérents, mis en cache par configuration."""
+import base64
+import json
+
+import numpy as np
+
+import artifact_cache
+import scene_mesh
+
+ZONES = [
+    {'x': 0, 'y': 0, 'w': 600, 'h': 1200, 'type': "1 Vantail", 'label': "A"},
+    {'x': 600, 'y': 0, 'w': 600, 'h': 1200, 'type': "Coulissant"},
+    {'x': 0, 'y': 1200, 'w': 1200, 'h': 300, 'type': "Soufflet"},
+]
+
+
+def test_buffers_are_consistent():
+    params = scene_mesh.scene_params(1200, 1500, 70, ZONES, 340, 1140, 1470, 900)
+    buffers = scene_mesh.build_scene(params).buffers()
+    assert {'wall', 'sill', 'frame', 'glass', 'handle'} <= set(buffers)
+    for positions, normals, indices in buffers.values():
+        assert positions.dtype == np.dtype("<f4") and indices.dtype == np.dtype("<u4")
+        assert positions.shape == normals.shape and indices.max() < len(positions)
+        # sens des triangles cohérent avec les normales (faces visibles de l'extérieur)
+        tri = positions[indices].astype(np.float64)
+        cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        assert (np.einsum("ij,ij->i", cross, normals[indices[:, 0]]) > 0).all()
+    frame = buffers['frame'][0]
+    assert frame[:, 0].min() < -600 and frame[:, 0].max() > 600  # ailes du dormant
+
+
+def test_payload_cached_by_geometry(tmp_path):
+    cache = artifact_cache.ArtifactCache(str(tmp_path))
+    params = scene_mesh.scene_params(1000, 1200, 70, ZONES[:1], 340, 940, 1170, 0)
+    first = scene_mesh.cached_payload(params, cache)
+    relabelled = [dict(ZONES[0], label="B", params={'x': 1})]
+    assert scene_mesh.cached_payload(scene_mesh.scene_params(1000, 1200, 70, relabelled, 340, 940, 1170, 0), cache) == first
+    assert (cache.misses, cache.hits) == (1, 1)
+
+    glass = json.loads(first)['materials']['glass']
+    indices = np.frombuffer(base64.b64decode(glass['index']), dtype="<u4")
+    assert len(indices) == 3 * glass['triangles']
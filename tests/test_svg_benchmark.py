@@ -0,0 +1,91 @@
+"""Benchmark des moteurs de rendu : temps et taille du SVG par cas du corpus.
+
+Chaque mesure est comparée à tests/benchmarks/baseline.json : la taille (déterministe)
+ne doit pas dépasser baseline * SVG_BENCH_BYTES_FACTOR, vérifié à chaque lancement ;
+le temps, baseline * SVG_BENCH_TIME_FACTOR (+ marge absolue). Les mesures du dernier
+lancement sont écrites dans tests/benchmarks/last_run.json.
+
+Budget de temps hors lancement par défaut (marqueur `benchmark`) :
+    RUN_BENCHMARK=1 python -m pytest tests/test_svg_benchmark.py
+
+La baseline de temps dépend de la machine ; la régénérer en local :
+    UPDATE_BENCHMARK=1 python -m pytest tests/test_svg_benchmark.py
+"""
+import json
+import os
+import time
+
+import pytest
+
+from conftest import BENCHMARK_DIR
+from svg_corpus import CASES
+
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+LAST_RUN_PATH = os.path.join(BENCHMARK_DIR, "last_run.json")
+
+REPEAT = 5
+TIME_FACTOR = float(os.environ.get("SVG_BENCH_TIME_FACTOR", "1.5"))
+TIME_SLACK_MS = float(os.environ.get("SVG_BENCH_TIME_SLACK_MS", "2.0"))
+BYTES_FACTOR = float(os.environ.get("SVG_BENCH_BYTES_FACTOR", "1.10"))
+
+
+def _load_baseline():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def results():
+    """Collecte les mesures puis les écrit (et la baseline si demandé)."""
+    data = {}
+    yield data
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(LAST_RUN_PATH, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    if os.environ.get("UPDATE_BENCHMARK"):
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+
+
+def _reference(case):
+    ref = _load_baseline().get(case['id'])
+    if ref is None:
+        pytest.skip(f"Pas de baseline pour {case['id']} (lancer avec UPDATE_BENCHMARK=1)")
+    return ref
+
+
+@pytest.mark.parametrize("case", CASES, ids=[c['id'] for c in CASES])
+def test_svg_output_size(case, render, results):
+    size = len(render(case).encode("utf-8"))
+    results.setdefault(case['id'], {})["bytes"] = size
+
+    if os.environ.get("UPDATE_BENCHMARK"):
+        return
+    ref = _reference(case)
+    max_bytes = ref["bytes"] * BYTES_FACTOR
+    assert size <= max_bytes, f"{case['id']}: {size} octets > {int(max_bytes)} (baseline {ref['bytes']})"
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("case", CASES, ids=[c['id'] for c in CASES])
+def test_svg_render_budget(case, render, results):
+    import streamlit as st
+
+    timings = []
+    for _ in range(REPEAT):
+        # Mesure à froid : pas de hit sur les caches st.cache_data
+        st.cache_data.clear()
+        t0 = time.perf_counter()
+        render(case)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    ms = min(timings)
+    results.setdefault(case['id'], {})["ms"] = round(ms, 3)
+
+    if os.environ.get("UPDATE_BENCHMARK"):
+        return
+    ref = _reference(case)
+    max_ms = ref["ms"] * TIME_FACTOR + TIME_SLACK_MS
+    assert ms <= max_ms, f"{case['id']}: {ms:.2f} ms > {max_ms:.2f} ms (baseline {ref['ms']} ms)"
@@ -0,0 +1,45 @@
+"""Non-régression des dessins : chaque cas du corpus est comparé à son golden.
+
+Régénérer après un changement de rendu volontaire :
+    UPDATE_GOLDEN=1 python -m pytest tests/test_svg_golden.py
+En cas d'écart, le rendu obtenu est écrit dans tests/golden/_failed/ pour diff.
+"""
+import difflib
+import os
+
+import pytest
+
+from conftest import GOLDEN_DIR
+from svg_corpus import CASES
+
+FAILED_DIR = os.path.join(GOLDEN_DIR, "_failed")
+
+
+@pytest.mark.parametrize("case", CASES, ids=[c['id'] for c in CASES])
+def test_svg_matches_golden(case, render):
+    svg = render(case)
+    assert svg.startswith("<svg") and svg.rstrip().endswith("</svg>")
+
+    golden_path = os.path.join(GOLDEN_DIR, f"{case['id']}.svg")
+    if os.environ.get("UPDATE_GOLDEN"):
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(golden_path, "w", encoding="utf-8") as f:
+            f.write(svg)
+        return
+
+    if not os.path.exists(golden_path):
+        pytest.fail(f"Golden manquant : {golden_path} (lancer avec UPDATE_GOLDEN=1)")
+    with open(golden_path, encoding="utf-8") as f:
+        expected = f.read()
+
+    if svg != expected:
+        os.makedirs(FAILED_DIR, exist_ok=True)
+        with open(os.path.join(FAILED_DIR, f"{case['id']}.svg"), "w", encoding="utf-8") as f:
+            f.write(svg)
+        # Un élément SVG par ligne pour un diff lisible
+        diff = difflib.unified_diff(
+            expected.replace("><", ">\n<").splitlines(),
+            svg.replace("><", ">\n<").splitlines(),
+            "golden", "actuel", lineterm="", n=1,
+        )
+        pytest.fail(f"{case['id']} diffère du golden :\n" + "\n".join(list(diff)[:40]))
@@ -0,0 +1,48 @@
+"""Aperçu incrémental : découpage en primitives à pid stable et patchs minimaux."""
+import json
+
+
+def apply_patch(items, patch):
+    """Rejoue un patch comme le fait components/svg_preview/index.html."""
+    if patch.get('full'):
+        return [tuple(it) for it in patch['items']]
+    removed = set(patch['remove'])
+    out = [it for it in items if it[0] not in removed]
+    for index, pid, markup in patch['insert']:
+        out.insert(index, (pid, markup))
+    return out
+
+
+def test_handle_height_edit_sends_small_patch(app, render):
+    import streamlit as st
+    from svg_corpus import CASES
+
+    case = next(c for c in CASES if c['id'] == "men_1vantail_tg")
+    svg_before = render(case)
+    st.session_state['zone_tree']['zone_params']['params']['h_poignee'] = 1200
+    svg_after = app.generate_svg_v73()
+    assert svg_before != svg_after
+
+    state, full = app.svg_patch(None, svg_before)
+    assert full['full'] and state['rev'] == 1
+    client = apply_patch([], full)
+
+    state2, patch = app.svg_patch(state, svg_after)
+    assert patch['base'] == 1 and patch['rev'] == 2
+    client = apply_patch(client, patch)
+    # Le client retrouve exactement la liste de primitives du nouveau rendu
+    assert client == app.svg_primitives(svg_after)[1]
+    # Seules la poignée et la cote HP changent
+    assert len(json.dumps(patch)) < len(svg_after) / 3
+
+    # Rerun sans changement : patch vide, même révision
+    state3, noop = app.svg_patch(state2, svg_after)
+    assert noop['rev'] == 2 and not noop['remove'] and not noop['insert']
+
+
+def test_primitives_flatten_group_and_dedupe_ids(app):
+    svg = '<svg viewBox="0 0 10 10"><g><rect x="0"/><rect x="0"/><text x="1">A&lt;B</text></g></svg>'
+    root, items = app.svg_primitives(svg)
+    assert root == '<svg viewBox="0 0 10 10">'
+    assert [m for _, m in items] == ['<rect x="0"/>', '<rect x="0"/>', '<text x="1">A&lt;B</text>']
+    assert len({pid for pid, _ in items}) == 3
@@ -0,0 +1,58 @@
+"""Bibliothèques JS embarquées : sommes vérifiées, publication sous une URL empreintée, pas de repli CDN implicite."""
+import hashlib
+import mimetypes
+import os
+
+import pytest
+
+import vendor_assets
+
+CDN_THREE = "https://unpkg.com/three@0.154.0/build/three.module.js"
+
+
+def _vendor(tmp_path, files):
+    base = vendor_assets.package_dir('three', str(tmp_path / "vendor"))
+    sums = []
+    for rel, data in files.items():
+        path = os.path.join(base, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        sums.append(f"{hashlib.sha256(data).hexdigest()}  {rel}\n")
+    with open(os.path.join(base, vendor_assets.SUMS_NAME), "w", encoding="utf-8") as f:
+        f.write("".join(sums))
+    return base
+
+
+def test_shipped_three_is_vendored(tmp_path):
+    sums = vendor_assets.check('three')
+    assert set(sums) == set(vendor_assets.VENDOR_PACKAGES['three']['files'])
+    urls = vendor_assets.module_urls('three', static_dir=str(tmp_path / "static"))
+    assert all(url.startswith("app/static/vendor/three/") for url in urls.values())
+    # Servis avec un type JavaScript, sinon le navigateur refuse le <script type="module">
+    assert all(mimetypes.guess_type(url)[0] in ("text/javascript", "application/javascript")
+               for url in urls.values())
+
+
+def test_local_three_published_with_relative_layout(tmp_path):
+    vendor_dir, static_dir = str(tmp_path / "vendor"), str(tmp_path / "static")
+    with pytest.raises(vendor_assets.VendorError):
+        vendor_assets.module_urls('three', vendor_dir, static_dir)
+    assert vendor_assets.module_urls('three', vendor_dir, static_dir, cdn_fallback=True)["three"] == CDN_THREE
+
+    base = _vendor(tmp_path, {"build/three.module.js": b"export const REVISION = '154';",
+                              "examples/jsm/controls/OrbitControls.js": b"import {} from 'three';"})
+    urls = vendor_assets.module_urls('three', vendor_dir, static_dir)
+    prefix = urls["three"][:-len("build/three.module.js")]
+    assert prefix.startswith("app/static/vendor/three/") and urls["three/examples/jsm/controls/OrbitControls"].startswith(prefix)
+    published = os.path.join(static_dir, "vendor", "three", prefix.rstrip("/").rsplit("/", 1)[1])
+    assert sorted(os.listdir(published)) == ["build", "examples"]
+    assert vendor_assets.module_urls('three', vendor_dir, static_dir) == urls
+    assert vendor_assets.module_urls('three', vendor_dir, static_dir, local=False)["three"] == CDN_THREE
+
+    with open(os.path.join(base, "build", "three.module.js"), "wb") as f:
+        f.write(b"altered")
+    with pytest.raises(vendor_assets.VendorError):
+        vendor_assets.check('three', vendor_dir)
+    with pytest.raises(vendor_assets.VendorError):
+        vendor_assets.module_urls('three', vendor_dir, static_dir)
@@ -0,0 +1,160 @@
+"""Bibliothèques JavaScript embarquées (three.js du visualiseur 3D), servies en local.
+
+Les fichiers sont versionnés dans vendor/<paquet>@<version>/ (mêmes chemins que sur
+le CDN : les imports entre modules restent valides) avec leurs sommes SHA-256, puis
+publiés sous static/vendor/<paquet>/<empreinte>/ : URL immuables, mises en cache par
+le navigateur, aucun accès réseau au chargement du visualiseur.
+
+    python vendor_assets.py fetch      # (re)télécharge les versions épinglées dans vendor/
+    python vendor_assets.py check      # vérifie les sommes
+
+Fichier absent ou altéré : VendorError, pas de repli silencieux sur le CDN (le CDN
+n'est utilisé que sans service statique, ou sur demande explicite).
+Un module ES n'est exécuté que servi avec un type JavaScript : Streamlit >= 1.58
+(serveur Starlette) le déduit du suffixe .js, les versions antérieures envoyaient
+text/plain avec nosniff (cf. requirements.txt).
+Module importable sans Streamlit.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import urllib.request
+
+import brand_assets
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+VENDOR_DIR = os.path.join(ROOT_DIR, "vendor")
+STATIC_VENDOR_SUBDIR = "vendor"
+SUMS_NAME = "SHA256SUMS"
+
+# paquet -> version épinglée, CDN d'origine, fichiers utilisés, spécificateurs d'import
+VENDOR_PACKAGES = {
+    'three': {
+        'version': "0.154.0",
+        'cdn': "https://unpkg.com/three@{version}/",
+        'files': ("build/three.module.js", "examples/jsm/controls/OrbitControls.js"),
+        'imports': {
+            "three": "build/three.module.js",
+            "three/examples/jsm/controls/OrbitControls": "examples/jsm/controls/OrbitControls.js",
+        },
+    },
+}
+
+
+class VendorError(Exception):
+    """Fichier embarqué absent ou altéré."""
+
+
+def package_dir(name, vendor_dir=VENDOR_DIR):
+    spec = VENDOR_PACKAGES[name]
+    return os.path.join(vendor_dir, f"{name}@{spec['version']}")
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(brand_assets.CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_sums(name, vendor_dir=VENDOR_DIR):
+    """{chemin relatif: sha256} du fichier SHA256SUMS, None si le paquet n'est pas embarqué."""
+    try:
+        with open(os.path.join(package_dir(name, vendor_dir), SUMS_NAME), encoding="utf-8") as f:
+            lines = [line.split(None, 1) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return {rel.strip(): sha for sha, rel in lines}
+
+
+def check(name, vendor_dir=VENDOR_DIR):
+    """Vérifie les fichiers embarqués ; renvoie leurs sommes (VendorError sinon)."""
+    sums = read_sums(name, vendor_dir)
+    if sums is None:
+        raise VendorError(f"{name} : non embarqué (python vendor_assets.py fetch)")
+    base = package_dir(name, vendor_dir)
+    for rel in VENDOR_PACKAGES[name]['files']:
+        path = os.path.join(base, rel)
+        if rel not in sums or not os.path.exists(path):
+            raise VendorError(f"{name} : {rel} manquant")
+        if _sha256(path) != sums[rel]:
+            raise VendorError(f"{name} : {rel} modifié (somme SHA-256 différente)")
+    return sums
+
+
+def fetch(name, vendor_dir=VENDOR_DIR, timeout=60):
+    """Télécharge les fichiers de la version épinglée et écrit SHA256SUMS."""
+    spec = VENDOR_PACKAGES[name]
+    base = package_dir(name, vendor_dir)
+    lines = []
+    for rel in spec['files']:
+        url = cdn_base(name) + rel
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = response.read()
+        path = os.path.join(base, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        lines.append(f"{hashlib.sha256(data).hexdigest()}  {rel}\n")
+    with open(os.path.join(base, SUMS_NAME), "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    return base
+
+
+def publish(name, vendor_dir=VENDOR_DIR, static_dir=brand_assets.STATIC_DIR):
+    """Copie le paquet sous static/vendor/<paquet>/<empreinte>/ (une fois) ; renvoie l'URL de base."""
+    sums = check(name, vendor_dir)
+    version_sha = hashlib.sha256("".join(f"{rel}:{sums[rel]}" for rel in sorted(sums)).encode()).hexdigest()[:12]
+    target = os.path.join(static_dir, STATIC_VENDOR_SUBDIR, name, version_sha)
+    if not os.path.isdir(target):
+        tmp = f"{target}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        base = package_dir(name, vendor_dir)
+        for rel in VENDOR_PACKAGES[name]['files']:
+            os.makedirs(os.path.dirname(os.path.join(tmp, rel)), exist_ok=True)
+            shutil.copyfile(os.path.join(base, rel), os.path.join(tmp, rel))
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # publié entre-temps par un autre processus
+    return f"{brand_assets.STATIC_URL_PREFIX}/{STATIC_VENDOR_SUBDIR}/{name}/{version_sha}/"
+
+
+def cdn_base(name):
+    spec = VENDOR_PACKAGES[name]
+    return spec['cdn'].format(version=spec['version'])
+
+
+def module_urls(name, vendor_dir=VENDOR_DIR, static_dir=brand_assets.STATIC_DIR, local=True, cdn_fallback=False):
+    """{spécificateur: URL} pour une import map : copie locale publiée sous static/.
+
+    local=False (service statique coupé) : URL du CDN. Copie locale absente ou altérée :
+    VendorError, sauf cdn_fallback=True.
+    """
+    spec = VENDOR_PACKAGES[name]
+    if not local:
+        base = cdn_base(name)
+    else:
+        try:
+            base = publish(name, vendor_dir, static_dir)
+        except VendorError:
+            if not cdn_fallback:
+                raise
+            base = cdn_base(name)
+    return {specifier: base + rel for specifier, rel in spec['imports'].items()}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    for package in VENDOR_PACKAGES:
+        if command == "fetch":
+            print(f"{package} -> {fetch(package)}")
+        else:
+            try:
+                check(package)
+                print(f"{package} : OK")
+            except VendorError as e:
+                print(e)
+                sys.exit(1)